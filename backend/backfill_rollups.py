@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily analytics rollups from the raw analytics rows.
+
+Run once after deploying the rollups, and whenever they need repairing:
+
+    python backfill_rollups.py                          # every user, all history
+    python backfill_rollups.py --user-id <id>           # one user
+    python backfill_rollups.py --since 2025-01-01       # only days from this date on
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+from indexes import ensure_indexes
+from utils.rollups import backfill_rollups
+
+
+async def main(user_id, since) -> int:
+    from database import connect_to_mongo, close_mongo_connection, get_database, is_database_connected
+
+    await connect_to_mongo()
+    if not is_database_connected():
+        print("❌ Could not connect to MongoDB")
+        return 1
+
+    try:
+        db = get_database()
+        # The backfill merges on the rollups' unique key, which must exist first
+        await ensure_indexes(db, report=print)
+
+        scope = f"user {user_id}" if user_id else "all users"
+        print(f"📊 Backfilling daily analytics rollups for {scope}{f' since {since.date()}' if since else ''}")
+        started = time.monotonic()
+        count = await backfill_rollups(db, user_id=user_id, since=since)
+        print(f"✅ {count} rollup documents in {time.monotonic() - started:.1f}s")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild daily analytics rollups from raw analytics rows")
+    parser.add_argument("--user-id", type=ObjectId, help="Only rebuild this user's rollups")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only rebuild days from this date (YYYY-MM-DD) on")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.user_id, args.since)))
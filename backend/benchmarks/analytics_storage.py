@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Analytics storage benchmark: plain collection vs time-series collection.
+
+Seeds the same synthetic analytics rows into a plain collection and a
+time-series collection (``date`` timeField, ``{user_id, platform}`` metaField)
+in a scratch database, each with the indexes the app creates for that layout,
+then reports on-disk size and times typical range scans on both:
+
+- window:  one user's rows for the last 30 days
+- summary: the raw ``$facet`` summary aggregation for one user
+- day:     every row of a single day across all users
+
+Usage (against a local MongoDB 5.0+):
+    python benchmarks/analytics_storage.py
+    python benchmarks/analytics_storage.py --rows 10000000 --users 1000 --days 365 --runs 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indexes import analytics_indexes
+from utils.analytics import raw_summary_pipeline, window_start, SUMMARY_PLATFORMS, SUMMARY_WINDOW_DAYS
+from utils.analytics_store import storage_query, to_storage, TIMESERIES_OPTIONS
+
+SEED_CHUNK = 10000
+
+LAYOUTS = {"plain": False, "timeseries": True}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50):.1f}ms "
+        f"p95={percentile(samples, 95):.1f}ms "
+        f"mean={statistics.mean(samples):.1f}ms"
+    )
+
+
+def synthetic_rows(user_ids, count, days, now):
+    """One row per (user, platform, day) until ``count`` rows, like daily metric snapshots."""
+    rows = []
+    for day in range(days):
+        date = (now - timedelta(days=day)).replace(hour=0, minute=0, second=0, microsecond=0)
+        for user_id in user_ids:
+            for platform in SUMMARY_PLATFORMS:
+                if len(rows) >= count:
+                    return rows
+                rows.append({
+                    "user_id": user_id,
+                    "platform": platform,
+                    "date": date + timedelta(minutes=random.randint(0, 59)),
+                    "followers_count": 1000 + day * 3 + random.randint(0, 50),
+                    "likes_count": random.randint(0, 200),
+                    "comments_count": random.randint(0, 40),
+                    "shares_count": random.randint(0, 20),
+                    "impressions_count": random.randint(0, 10000),
+                    "reach_count": random.randint(0, 8000),
+                    "engagement_rate": round(random.random() * 10, 2)
+                })
+    return rows
+
+
+async def seed(db, rows):
+    for name, timeseries in LAYOUTS.items():
+        await db[name].drop()
+        if timeseries:
+            await db.create_collection(name, timeseries=TIMESERIES_OPTIONS)
+        started = time.perf_counter()
+        for offset in range(0, len(rows), SEED_CHUNK):
+            chunk = [to_storage(dict(row), timeseries=timeseries) for row in rows[offset:offset + SEED_CHUNK]]
+            await db[name].insert_many(chunk, ordered=False)
+        await db[name].create_indexes(analytics_indexes(timeseries))
+        print(f"  {name}: {len(rows)} rows in {time.perf_counter() - started:.1f}s")
+
+
+async def storage_stats(db, name):
+    stats = await db.command("collStats", name)
+    return {
+        "storage_mb": stats.get("storageSize", 0) / 1e6,
+        "index_mb": stats.get("totalIndexSize", 0) / 1e6,
+        "data_mb": stats.get("size", 0) / 1e6
+    }
+
+
+async def time_runs(func, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.database]
+    try:
+        now = datetime.utcnow()
+        users = [ObjectId() for _ in range(args.users)]
+        print(f"Seeding {args.rows} rows into {args.database}")
+        await seed(db, synthetic_rows(users, args.rows, args.days, now))
+
+        user_id = users[0]
+        start = window_start(now, SUMMARY_WINDOW_DAYS)
+        day_start = window_start(now - timedelta(days=1), 1)
+        for name, timeseries in LAYOUTS.items():
+            collection = db[name]
+            stats = await storage_stats(db, name)
+            print(f"{name}: data {stats['data_mb']:.1f}MB, storage {stats['storage_mb']:.1f}MB, "
+                  f"indexes {stats['index_mb']:.1f}MB")
+
+            window = storage_query({"user_id": user_id, "date": {"$gte": start, "$lte": now}}, timeseries)
+            day = {"date": {"$gte": day_start, "$lt": day_start + timedelta(days=1)}}
+            pipeline = raw_summary_pipeline(user_id, start, now, timeseries)
+
+            report(f"  {name} window ", await time_runs(
+                lambda: collection.find(window).to_list(length=None), args.runs))
+            report(f"  {name} summary", await time_runs(
+                lambda: collection.aggregate(pipeline).to_list(length=None), args.runs))
+            report(f"  {name} day    ", await time_runs(
+                lambda: collection.find(day).to_list(length=None), args.runs))
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare plain and time-series storage for analytics rows")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="social_media_automation_storage_bench")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--days", type=int, default=730, help="Days of history the rows go back")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    asyncio.run(main(parser.parse_args()))
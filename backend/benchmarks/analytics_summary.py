@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Analytics summary benchmark.
+
+Seeds a scratch database with synthetic analytics rows (1M by default) and
+times the summary three ways for the same user and window:
+
+- legacy:  load the 30-day window into Python and loop over it per platform
+           and per trend day, as the endpoint used to
+- facet:   the single ``$facet`` aggregation over the raw rows
+- rollups: the same aggregation over the daily rollups, which the endpoint
+           now reads (built here with the backfill)
+
+All results are compared before timing starts, so a mismatch fails fast.
+
+Usage (against a local MongoDB):
+    python benchmarks/analytics_summary.py
+    python benchmarks/analytics_summary.py --rows 1000000 --users 50 --days 90 --runs 20 --keep
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from database import ANALYTICS_COLLECTION
+from indexes import ensure_indexes
+from utils.analytics import (
+    compute_summary, compute_raw_summary, window_start, SUMMARY_PLATFORMS, SUMMARY_WINDOW_DAYS, TREND_DAYS
+)
+from utils.rollups import backfill_rollups
+from utils.analytics_store import storage_query, to_storage, from_storage, ensure_analytics_collection
+
+SEED_CHUNK = 10000
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50):.1f}ms "
+        f"p95={percentile(samples, 95):.1f}ms "
+        f"max={max(samples):.1f}ms "
+        f"mean={statistics.mean(samples):.1f}ms"
+    )
+
+
+async def legacy_summary(db, user_id, end_date):
+    """The summary as the endpoint computed it before the aggregation pipeline."""
+    start_date = window_start(end_date, SUMMARY_WINDOW_DAYS)
+    analytics_data = await db[ANALYTICS_COLLECTION].find(storage_query({
+        "user_id": user_id,
+        "date": {"$gte": start_date, "$lte": end_date}
+    })).to_list(length=None)
+    analytics_data = [from_storage(data) for data in analytics_data]
+
+    total_followers = sum(data.get("followers_count", 0) for data in analytics_data)
+    total_engagement = sum(
+        data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
+        for data in analytics_data
+    )
+    engagement_rates = [data.get("engagement_rate", 0) for data in analytics_data if data.get("engagement_rate", 0) > 0]
+    average_engagement_rate = sum(engagement_rates) / len(engagement_rates) if engagement_rates else 0
+
+    platform_breakdown = {}
+    for platform in SUMMARY_PLATFORMS:
+        platform_data = [data for data in analytics_data if data.get("platform") == platform]
+        platform_breakdown[platform] = {
+            "followers": sum(data.get("followers_count", 0) for data in platform_data),
+            "engagement": sum(
+                data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
+                for data in platform_data
+            ),
+            "posts": len(platform_data)
+        }
+
+    growth_trend = []
+    for i in range(TREND_DAYS):
+        date = end_date - timedelta(days=i)
+        day_data = [data for data in analytics_data if data.get("date").date() == date.date()]
+        growth_trend.append({
+            "date": date.strftime("%Y-%m-%d"),
+            "followers": sum(data.get("followers_count", 0) for data in day_data),
+            "engagement": sum(
+                data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
+                for data in day_data
+            )
+        })
+
+    return {
+        "total_followers": total_followers,
+        "total_engagement": total_engagement,
+        "average_engagement_rate": average_engagement_rate,
+        "platform_breakdown": platform_breakdown,
+        "growth_trend": growth_trend
+    }
+
+
+async def seed(db, rows, users, days):
+    """Insert ``rows`` analytics rows spread over ``users`` users and the last ``days`` days."""
+    user_ids = [ObjectId() for _ in range(users)]
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    for offset in range(0, rows, SEED_CHUNK):
+        batch = []
+        for _ in range(min(SEED_CHUNK, rows - offset)):
+            batch.append(to_storage({
+                "user_id": random.choice(user_ids),
+                "platform": random.choice(SUMMARY_PLATFORMS),
+                "date": now - timedelta(seconds=random.randint(0, days * 86400)),
+                "followers_count": random.randint(0, 5000),
+                "likes_count": random.randint(0, 200),
+                "comments_count": random.randint(0, 40),
+                "shares_count": random.randint(0, 20),
+                "engagement_rate": round(random.random() * 10, 2) if random.random() < 0.8 else 0.0
+            }))
+        await db[ANALYTICS_COLLECTION].insert_many(batch, ordered=False)
+        print(f"  seeded {offset + len(batch)}/{rows} rows", end="\r")
+    print(f"  seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+    return user_ids
+
+
+def assert_same(expected, actual, label):
+    for field in ("total_followers", "total_engagement", "platform_breakdown", "growth_trend"):
+        assert expected[field] == actual[field], f"{label}: {field} differs"
+    assert abs(expected["average_engagement_rate"] - actual["average_engagement_rate"]) < 1e-6, \
+        f"{label}: average_engagement_rate differs"
+
+
+async def time_runs(func, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.database]
+    try:
+        await db[ANALYTICS_COLLECTION].drop()
+        await ensure_analytics_collection(db, report=print)
+        print(f"Seeding {args.database}.{ANALYTICS_COLLECTION}")
+        user_ids = await seed(db, args.rows, args.users, args.days)
+        await ensure_indexes(db, report=print)
+        started = time.perf_counter()
+        rollups = await backfill_rollups(db)
+        print(f"  backfilled {rollups} rollups in {time.perf_counter() - started:.1f}s")
+
+        user_id = user_ids[0]
+        end_date = datetime.utcnow()
+        window_rows = await db[ANALYTICS_COLLECTION].count_documents(storage_query({
+            "user_id": user_id,
+            "date": {"$gte": window_start(end_date, SUMMARY_WINDOW_DAYS), "$lte": end_date}
+        }))
+        print(f"Summary window for one user: {window_rows} rows")
+
+        expected = await legacy_summary(db, user_id, end_date)
+        assert_same(expected, await compute_raw_summary(db, user_id, end_date), "facet")
+        assert_same(expected, await compute_summary(db, user_id, end_date), "rollups")
+        print("Results match")
+
+        legacy = await time_runs(lambda: legacy_summary(db, user_id, end_date), args.runs)
+        facet = await time_runs(lambda: compute_raw_summary(db, user_id, end_date), args.runs)
+        rollup = await time_runs(lambda: compute_summary(db, user_id, end_date), args.runs)
+        report("  legacy  (find + Python loops)", legacy)
+        report("  facet   (raw aggregation)    ", facet)
+        report("  rollups (daily aggregation)  ", rollup)
+        print(f"Speedup at p50: facet {percentile(legacy, 50) / percentile(facet, 50):.1f}x, "
+              f"rollups {percentile(legacy, 50) / percentile(rollup, 50):.1f}x")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy and aggregation analytics summary paths")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="social_media_automation_bench")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=50, help="Users the rows are spread over")
+    parser.add_argument("--days", type=int, default=90, help="Days of history the rows are spread over")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Engagement sync benchmark and end-to-end check.
+
+Seeds a scratch database with published posts spread over four platforms and
+a range of ages, starts the fake platform APIs (benchmarks/fake_platform.py),
+points the publisher adapters at them and runs the engagement sync worker:
+
+1. the first run polls every post, and each post's stored engagement must
+   match what the fake server reported, using a handful of batched calls
+2. a run 20 minutes later only picks up the posts young enough to be due again
+3. with ``--failing`` platforms the other platforms still sync and the failed
+   posts are scheduled for a quick retry
+
+Usage (against a local MongoDB):
+    python benchmarks/engagement_sync.py
+    python benchmarks/engagement_sync.py --users 200 --posts 50 --latency 0.2 --failing twitter
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+
+from config import settings
+from database import POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION
+from indexes import ensure_indexes
+from utils.engagement_sync import EngagementSyncWorker, build_engagement, poll_interval
+from utils.publishers import publish_dispatcher
+from benchmarks.fake_platform import FakePlatformServer
+
+PLATFORMS = ["instagram", "linkedin", "facebook", "twitter"]
+
+
+def remote_id(platform, index):
+    return f"urn:li:share:{index}" if platform == "linkedin" else f"{platform}_{index}"
+
+
+async def seed(db, users, posts_per_user, now):
+    connections, posts = [], []
+    for user_index in range(users):
+        user_id = ObjectId()
+        for platform in PLATFORMS:
+            connections.append({
+                "user_id": user_id,
+                "platform": platform,
+                "is_connected": True,
+                "access_token": "fake-token",
+                "platform_user_id": f"{platform}-{user_index}"
+            })
+        for post_index in range(posts_per_user):
+            platforms = random.sample(PLATFORMS, random.randint(1, len(PLATFORMS)))
+            index = len(posts)
+            posts.append({
+                "user_id": user_id,
+                "status": "posted",
+                "platforms": platforms,
+                "posted_at": (now - timedelta(hours=random.choice([1, 3, 12, 48, 120, 400, 2000]))).isoformat(),
+                "deliveries": {
+                    platform: {"state": "posted", "remote_id": remote_id(platform, index)} for platform in platforms
+                }
+            })
+    await db[PLATFORM_CONNECTIONS_COLLECTION].insert_many(connections)
+    await db[POSTS_COLLECTION].insert_many(posts)
+    print(f"  seeded {len(posts)} posts for {users} users")
+
+
+async def check_posts(db, server, failing, now):
+    checked = 0
+    async for post in db[POSTS_COLLECTION].find({}):
+        fetched = {
+            platform: server.metrics(delivery["remote_id"], platform)
+            for platform, delivery in post["deliveries"].items() if platform not in failing
+        }
+        stored = post.get("engagement_data") or {}
+        if fetched:
+            expected = build_engagement(None, fetched, now)
+            for field in ("likes", "comments", "shares", "impressions", "total_engagement", "engagement_rate"):
+                assert stored.get(field) == expected[field], f"post {post['_id']}: {field} differs"
+        else:
+            assert not stored, f"post {post['_id']}: unexpected engagement_data"
+        interval = poll_interval(post, now)
+        if failing & set(post["deliveries"]):
+            interval = min(interval, timedelta(minutes=15))
+        assert post["engagement_next_sync_at"] == (now + interval).isoformat(), f"post {post['_id']}: wrong next sync"
+        checked += 1
+    return checked
+
+
+async def main(args):
+    from database import connect_to_mongo, close_mongo_connection, get_database, is_database_connected
+
+    settings.MONGODB_URL = args.mongodb_url
+    settings.DATABASE_NAME = args.database
+    await connect_to_mongo()
+    if not is_database_connected():
+        print("❌ Could not connect to MongoDB")
+        return 1
+
+    server = FakePlatformServer(latency=args.latency, failing=args.failing)
+    await server.start()
+    server.configure(publish_dispatcher)
+    db = get_database()
+    try:
+        await db.client.drop_database(args.database)
+        await ensure_indexes(db, report=print)
+        now = datetime.now()
+        await seed(db, args.users, args.posts, now)
+
+        worker = EngagementSyncWorker(max_posts=args.users * args.posts)
+        started = time.perf_counter()
+        run = await worker.sync_due_posts(now)
+        elapsed = time.perf_counter() - started
+        print(f"First run: {run['posts']} posts, {run['calls']} platform calls "
+              f"({run['failed_calls']} failed) in {elapsed:.2f}s; calls per platform {dict(server.calls)}")
+
+        checked = await check_posts(db, server, set(args.failing), now)
+        print(f"✅ {checked} posts match the fake platforms")
+
+        later = now + timedelta(minutes=20)
+        run = await worker.sync_due_posts(later)
+        print(f"Run 20 minutes later: {run['posts']} posts due, {run['calls']} platform calls")
+        return 0
+    finally:
+        await server.stop()
+        await publish_dispatcher.close()
+        if not args.keep:
+            await db.client.drop_database(args.database)
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the engagement sync against fake platform APIs")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="social_media_automation_engagement_bench")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=40, help="Published posts per user")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each fake platform call takes")
+    parser.add_argument("--failing", nargs="*", default=[], help="Platforms whose API is down")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    sys.exit(asyncio.run(main(parser.parse_args())))
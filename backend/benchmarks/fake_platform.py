@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the platforms' engagement APIs.
+
+Serves the endpoints the publisher adapters read metrics from, with made-up
+but deterministic counts that grow with every poll:
+
+- Facebook and Instagram: Graph API multi-id lookups (``GET /graph/?ids=...``)
+- Twitter: ``GET /twitter/2/tweets?ids=...&tweet.fields=public_metrics``
+- LinkedIn: ``GET /linkedin/v2/socialActions?ids=List(...)``
+
+Every request is counted per platform, so a driver can check how many calls
+a sync made. ``failing`` platforms answer 503 to exercise retries and error
+handling, ``expired`` platforms answer 401 as for a revoked or expired token,
+and ``rate_limited`` answers the next N requests of a platform with 429.
+Point the adapters at it with ``server.configure(publish_dispatcher)``.
+
+Run on its own for manual testing:
+    python benchmarks/fake_platform.py --port 8765
+"""
+
+import argparse
+import asyncio
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from aiohttp import web
+
+
+# Counts each platform's API reports; the adapters read the others as 0
+REPORTED_COUNTS = {
+    "facebook": ("likes", "comments", "shares"),
+    "instagram": ("likes", "comments"),
+    "linkedin": ("likes", "comments"),
+    "twitter": ("likes", "comments", "shares", "impressions"),
+}
+
+
+class FakePlatformServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 failing: Iterable[str] = (), expired: Iterable[str] = (),
+                 rate_limited: Optional[Dict[str, int]] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failing = set(failing)
+        self.expired = set(expired)
+        self.rate_limited: Counter = Counter(rate_limited or {})
+        self.calls: Counter = Counter()
+        self.polls: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def metrics(self, remote_id: str, platform: Optional[str] = None) -> Dict[str, int]:
+        """
+        Counts of a remote post as of its latest poll; with ``platform``, as
+        that platform's adapter ends up reading them.
+        """
+        seed = zlib.crc32(remote_id.encode())
+        polls = self.polls[remote_id]
+        counts = {
+            "likes": seed % 200 + polls * 3,
+            "comments": seed % 40 + polls,
+            "shares": seed % 20,
+            "impressions": seed % 5000 + 1000 + polls * 50
+        }
+        if platform is not None:
+            counts = {name: value if name in REPORTED_COUNTS[platform] else 0 for name, value in counts.items()}
+        return counts
+
+    def configure(self, dispatcher):
+        """Point the dispatcher's adapters at this server."""
+        dispatcher.get_publisher("facebook").graph_url = f"{self.url}/graph"
+        dispatcher.get_publisher("instagram").graph_url = f"{self.url}/graph"
+        dispatcher.get_publisher("twitter").api_url = f"{self.url}/twitter/2"
+        dispatcher.get_publisher("linkedin").base_url = f"{self.url}/linkedin/v2"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/graph/", self._graph)
+        app.router.add_get("/twitter/2/tweets", self._tweets)
+        app.router.add_get("/linkedin/v2/socialActions", self._social_actions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _answer(self, platform: str, remote_ids):
+        self.calls[platform] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.rate_limited[platform] > 0:
+            self.rate_limited[platform] -= 1
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "1"}, text=f"{platform} rate limit exceeded")
+        if platform in self.expired:
+            raise web.HTTPUnauthorized(text=f"{platform} access token expired")
+        if platform in self.failing:
+            raise web.HTTPServiceUnavailable(text=f"{platform} is down")
+        for remote_id in remote_ids:
+            self.polls[remote_id] += 1
+        return {remote_id: self.metrics(remote_id) for remote_id in remote_ids}
+
+    async def _graph(self, request: web.Request) -> web.Response:
+        instagram = "like_count" in request.query.get("fields", "")
+        remote_ids = [remote_id for remote_id in request.query.get("ids", "").split(",") if remote_id]
+        metrics = await self._answer("instagram" if instagram else "facebook", remote_ids)
+        if instagram:
+            body = {
+                remote_id: {"id": remote_id, "like_count": counts["likes"], "comments_count": counts["comments"]}
+                for remote_id, counts in metrics.items()
+            }
+        else:
+            body = {
+                remote_id: {
+                    "id": remote_id,
+                    "likes": {"data": [], "summary": {"total_count": counts["likes"]}},
+                    "comments": {"data": [], "summary": {"total_count": counts["comments"]}},
+                    "shares": {"count": counts["shares"]}
+                }
+                for remote_id, counts in metrics.items()
+            }
+        return web.json_response(body)
+
+    async def _tweets(self, request: web.Request) -> web.Response:
+        remote_ids = [remote_id for remote_id in request.query.get("ids", "").split(",") if remote_id]
+        metrics = await self._answer("twitter", remote_ids)
+        return web.json_response({"data": [
+            {
+                "id": remote_id,
+                "public_metrics": {
+                    "like_count": counts["likes"],
+                    "reply_count": counts["comments"],
+                    "retweet_count": counts["shares"],
+                    "quote_count": 0,
+                    "impression_count": counts["impressions"]
+                }
+            }
+            for remote_id, counts in metrics.items()
+        ]})
+
+    async def _social_actions(self, request: web.Request) -> web.Response:
+        ids = request.query.get("ids", "")
+        if ids.startswith("List(") and ids.endswith(")"):
+            ids = ids[len("List("):-1]
+        remote_ids = [remote_id for remote_id in ids.split(",") if remote_id]
+        metrics = await self._answer("linkedin", remote_ids)
+        return web.json_response({"results": {
+            remote_id: {
+                "likesSummary": {"totalLikes": counts["likes"]},
+                "commentsSummary": {"aggregatedTotalComments": counts["comments"]}
+            }
+            for remote_id, counts in metrics.items()
+        }, "errors": {}})
+
+
+async def main(args):
+    server = FakePlatformServer(port=args.port, latency=args.latency, failing=args.failing)
+    await server.start()
+    print(f"Fake platform APIs listening on {server.url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fake platform engagement APIs")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--failing", nargs="*", default=[], help="Platforms that answer 503")
+    asyncio.run(main(parser.parse_args()))
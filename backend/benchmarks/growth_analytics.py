@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Growth analytics benchmark.
+
+Seeds a scratch database with daily rollups for one user (four platforms,
+``--days`` of history with some days missing) and times the growth report
+two ways over the same window:
+
+- legacy: find the rollups and build each platform's series with list
+          comprehensions, strftime and Python sums, as the endpoint used to
+- numpy:  the column pipeline and the NumPy computation the endpoint uses now,
+          which also produces the rolling and period-over-period metrics
+
+The series both produce are compared before timing starts.
+
+Usage (against a local MongoDB):
+    python benchmarks/growth_analytics.py
+    python benchmarks/growth_analytics.py --window 365 --runs 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from database import ANALYTICS_DAILY_COLLECTION
+from indexes import ensure_indexes
+from utils.analytics import daily_rollups, SUMMARY_PLATFORMS
+from utils.growth import growth_analytics
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50):.2f}ms "
+        f"p95={percentile(samples, 95):.2f}ms "
+        f"mean={statistics.mean(samples):.2f}ms"
+    )
+
+
+async def legacy_growth(db, user_id, days):
+    """The growth report as the endpoint computed it before NumPy."""
+    rollups = await daily_rollups(db, user_id, days)
+    growth_data = {}
+    for platform in SUMMARY_PLATFORMS:
+        platform_rollups = [rollup for rollup in rollups if rollup["platform"] == platform]
+        growth_data[platform] = {
+            "followers_growth": [
+                {"date": rollup["day"].strftime("%Y-%m-%d"), "followers": rollup.get("followers_max", 0)}
+                for rollup in platform_rollups
+            ],
+            "engagement_growth": [
+                {"date": rollup["day"].strftime("%Y-%m-%d"), "engagement": rollup.get("engagement", 0)}
+                for rollup in platform_rollups
+            ],
+            "total_followers": max((rollup.get("followers_max", 0) for rollup in platform_rollups), default=0),
+            "total_engagement": sum(rollup.get("engagement", 0) for rollup in platform_rollups)
+        }
+    return growth_data
+
+
+async def seed(db, user_id, days):
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    rollups = []
+    for offset in range(days):
+        for platform in SUMMARY_PLATFORMS:
+            if random.random() < 0.2:
+                continue
+            count = random.randint(0, 3)
+            rollups.append({
+                "user_id": user_id,
+                "platform": platform,
+                "day": today - timedelta(days=offset),
+                "rows": count + 1,
+                "followers_max": 1000 + (days - offset) * 5 + random.randint(0, 20),
+                "engagement": random.randint(0, 500),
+                "engagement_rate_sum": round(random.random() * 5 * count, 2),
+                "engagement_rate_count": count
+            })
+    await db[ANALYTICS_DAILY_COLLECTION].insert_many(rollups, ordered=False)
+    print(f"  seeded {len(rollups)} rollups")
+
+
+async def time_runs(func, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.database]
+    try:
+        await db[ANALYTICS_DAILY_COLLECTION].drop()
+        await ensure_indexes(db, report=print)
+        user_id = ObjectId()
+        await seed(db, user_id, args.days)
+
+        expected = await legacy_growth(db, user_id, args.window)
+        actual = await growth_analytics(db, user_id, args.window)
+        for platform, series in expected.items():
+            for field, value in series.items():
+                assert actual[platform][field] == value, f"{platform}.{field} differs"
+        print("Results match")
+
+        legacy = await time_runs(lambda: legacy_growth(db, user_id, args.window), args.runs)
+        vectorized = await time_runs(lambda: growth_analytics(db, user_id, args.window), args.runs)
+        report("  legacy (find + Python loops)", legacy)
+        report("  numpy  (columns + arrays)   ", vectorized)
+        print(f"Speedup at p50: {percentile(legacy, 50) / percentile(vectorized, 50):.1f}x")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the legacy and NumPy growth analytics paths")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="social_media_automation_growth_bench")
+    parser.add_argument("--days", type=int, default=800, help="Days of rollup history to seed")
+    parser.add_argument("--window", type=int, default=365, help="Growth report window in days")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark.
+
+Measures latency of a cheap endpoint while many logins run at once. With bcrypt
+on the event loop every login stalls the whole server; with hashing on the
+password executor other endpoints should stay responsive.
+
+Usage (against a running server):
+    python benchmarks/login_storm.py --email user@example.com --password secret
+    python benchmarks/login_storm.py --logins 100 --probes 200 --probe-path /health
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(label, samples):
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    print(
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50):.1f}ms "
+        f"p95={percentile(samples, 95):.1f}ms "
+        f"p99={percentile(samples, 99):.1f}ms "
+        f"max={max(samples):.1f}ms "
+        f"mean={statistics.mean(samples):.1f}ms"
+    )
+
+
+async def timed_request(session, method, url, **kwargs):
+    started = time.perf_counter()
+    async with session.request(method, url, **kwargs) as response:
+        await response.read()
+        return (time.perf_counter() - started) * 1000, response.status
+
+
+async def probe(session, url, count, interval):
+    """Hit the probe endpoint at a steady rate and collect latencies."""
+    latencies = []
+    for _ in range(count):
+        elapsed, _ = await timed_request(session, "GET", url)
+        latencies.append(elapsed)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_storm(session, url, email, password, logins):
+    payload = {"email": email, "password": password}
+    results = await asyncio.gather(
+        *[timed_request(session, "POST", url, json=payload) for _ in range(logins)],
+        return_exceptions=True
+    )
+    latencies = [r[0] for r in results if not isinstance(r, BaseException)]
+    statuses = {}
+    for r in results:
+        key = r[1] if not isinstance(r, BaseException) else type(r).__name__
+        statuses[key] = statuses.get(key, 0) + 1
+    return latencies, statuses
+
+
+async def main(args):
+    base_url = args.base_url.rstrip("/")
+    probe_url = f"{base_url}{args.probe_path}"
+    login_url = f"{base_url}/api/auth/login"
+
+    connector = aiohttp.TCPConnector(limit=args.logins + 10)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        print(f"Baseline: {args.probes} requests to {args.probe_path}")
+        baseline = await probe(session, probe_url, args.probes, args.interval)
+        report("  probe (idle)", baseline)
+
+        print(f"Storm: {args.logins} concurrent logins while probing {args.probe_path}")
+        started = time.perf_counter()
+        (login_latencies, statuses), during = await asyncio.gather(
+            login_storm(session, login_url, args.email, args.password, args.logins),
+            probe(session, probe_url, args.probes, args.interval)
+        )
+        total = time.perf_counter() - started
+
+        report("  probe (storm)", during)
+        report("  login", login_latencies)
+        print(f"  login statuses: {statuses}")
+        print(f"  wall time: {total:.2f}s")
+
+        p99 = percentile(during, 99) if during else float("inf")
+        verdict = "PASS" if p99 < args.target_p99 else "FAIL"
+        print(f"{verdict}: probe p99 under storm {p99:.1f}ms (target < {args.target_p99:.0f}ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure endpoint latency during a login storm")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="benchmark@example.com")
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between probe requests")
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--target-p99", type=float, default=100.0, help="Target p99 in milliseconds")
+    asyncio.run(main(parser.parse_args()))
@@ -14,6 +14,7 @@ INSTAGRAM_REDIRECT_URI = "http://localhost:3000/auth/instagram/callback"
 INSTAGRAM_AUTH_URL = "https://api.instagram.com/oauth/authorize"
 INSTAGRAM_TOKEN_URL = "https://api.instagram.com/oauth/access_token"
 INSTAGRAM_USER_INFO_URL = "https://graph.instagram.com/me"
+INSTAGRAM_GRAPH_API_URL = "https://graph.facebook.com/v18.0"
 
 # Instagram API scopes
 INSTAGRAM_SCOPES = [
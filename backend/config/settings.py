@@ -26,6 +26,36 @@ JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-producti
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# One-time passwords
+OTP_EXPIRE_MINUTES = 10
+
+# Decoded token cache
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+# Token revocations are stored in MongoDB; each worker caches what it read for
+# this long, so a logout on one worker reaches the others within this window
+REVOCATION_CACHE_TTL_SECONDS = int(os.getenv("REVOCATION_CACHE_TTL_SECONDS", "5"))
+
+# Password hashing
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+# Authenticated user cache
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Analytics result cache: entries are keyed on the user's change versions, so
+# the TTL only bounds memory and how long time-window results can lag
+ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+ANALYTICS_CACHE_MAX_SIZE = int(os.getenv("ANALYTICS_CACHE_MAX_SIZE", "10000"))
+
+# Delta sync: how long deleted posts are remembered for clients that poll for changes
+POST_TOMBSTONE_RETENTION_DAYS = int(os.getenv("POST_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Engagement sync: how often due posts are polled, and at most how many per run
+ENGAGEMENT_SYNC_INTERVAL_SECONDS = int(os.getenv("ENGAGEMENT_SYNC_INTERVAL_SECONDS", "300"))
+ENGAGEMENT_SYNC_MAX_POSTS = int(os.getenv("ENGAGEMENT_SYNC_MAX_POSTS", "1000"))
+
 # Email settings
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
@@ -55,5 +85,19 @@ linkedin_client_secret = os.getenv("LINKEDIN_CLIENT_SECRET", "")
 linkedin_redirect_uri = os.getenv("LINKEDIN_REDIRECT_URI", "http://localhost:3000/linkedin-callback")
 linkedin_scope = os.getenv("LINKEDIN_SCOPE", "r_liteprofile r_emailaddress w_member_social")
 
+# Store raw analytics rows in a MongoDB time-series collection (MongoDB 5.0+;
+# replacing rows through bulk ingestion needs 7.0+); migrate existing data with
+# migrate_analytics_timeseries.py
+ANALYTICS_TIMESERIES = os.getenv("ANALYTICS_TIMESERIES", "false").lower() == "true"
+
+# Bulk analytics ingestion: rows accepted per request
+ANALYTICS_INGEST_MAX_ROWS = int(os.getenv("ANALYTICS_INGEST_MAX_ROWS", "100000"))
+
+# Where export_parquet.py writes the partitioned Parquet datasets
+PARQUET_EXPORT_DIR = os.getenv("PARQUET_EXPORT_DIR", "exports/parquet")
+
+# Query shape recording for query_audit.py (path to a JSONL file, empty to disable)
+QUERY_AUDIT_LOG = os.getenv("QUERY_AUDIT_LOG", "")
+
 # Development settings
 DEBUG = os.getenv("DEBUG", "True").lower() == "true" 
\ No newline at end of file
@@ -23,8 +23,15 @@ async def connect_to_mongo():
         # For MongoDB Atlas, use the connection string as is
         connection_string = settings.MONGODB_URL
         
+        # Optionally record every query shape for the query-plan audit
+        client_options = {}
+        if settings.QUERY_AUDIT_LOG:
+            from query_audit import QueryShapeRecorder
+            client_options["event_listeners"] = [QueryShapeRecorder(settings.QUERY_AUDIT_LOG)]
+            logger.info(f"Recording query shapes to {settings.QUERY_AUDIT_LOG}")
+        
         # Create clients with proper configuration
-        db.client = AsyncIOMotorClient(connection_string, serverSelectionTimeoutMS=10000)
+        db.client = AsyncIOMotorClient(connection_string, serverSelectionTimeoutMS=10000, **client_options)
         db.sync_client = MongoClient(connection_string, serverSelectionTimeoutMS=10000)
         
         # Test the connection
@@ -87,4 +94,10 @@ USERS_COLLECTION = "users"
 POSTS_COLLECTION = "posts"
 PLATFORM_CONNECTIONS_COLLECTION = "platform_connections"
 ANALYTICS_COLLECTION = "analytics"
-OTP_COLLECTION = "otp_codes" 
\ No newline at end of file
+ANALYTICS_DAILY_COLLECTION = "analytics_daily"
+POSTING_HEATMAP_COLLECTION = "posting_heatmap"
+OTP_COLLECTION = "otp_codes" 
+CHANGE_COUNTERS_COLLECTION = "change_counters"
+POST_TOMBSTONES_COLLECTION = "post_tombstones"
+ANALYTICS_INGEST_LOCKS_COLLECTION = "analytics_ingest_locks"
+REVOKED_TOKENS_COLLECTION = "revoked_tokens"
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Export analytics and post engagement to partitioned Parquet files.
+
+Writes ``analytics`` and ``post_engagement`` datasets partitioned by user,
+platform and month (see utils/parquet_export.py). Reruns only write the
+partitions that are new or changed since the last run, so this is cheap to
+run from cron:
+
+    python export_parquet.py                             # everything, incrementally
+    python export_parquet.py --output /data/parquet      # somewhere other than PARQUET_EXPORT_DIR
+    python export_parquet.py --dataset analytics         # one dataset
+    python export_parquet.py --user-id <id> --full       # rewrite one user's partitions
+
+The analytics partitions are tracked through the daily rollups, so run
+backfill_rollups.py first if they are not populated yet.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from bson import ObjectId
+
+from config import settings
+from utils.parquet_export import export_parquet, DATASETS, EXPORT_BATCH_SIZE
+
+
+async def main(args) -> int:
+    from database import connect_to_mongo, close_mongo_connection, get_database, is_database_connected
+
+    await connect_to_mongo()
+    if not is_database_connected():
+        print("❌ Could not connect to MongoDB")
+        return 1
+
+    try:
+        datasets = args.dataset or list(DATASETS)
+        scope = f"user {args.user_id}" if args.user_id else "all users"
+        print(f"📦 Exporting {', '.join(datasets)} for {scope} to {args.output}{' (full)' if args.full else ''}")
+        started = time.monotonic()
+        results = await export_parquet(
+            get_database(), args.output, datasets,
+            user_id=args.user_id, full=args.full, batch_size=args.batch_size, report=print
+        )
+        for dataset, stats in results.items():
+            print(f"✅ {dataset}: {stats['written']} partitions written ({stats['rows']} rows), "
+                  f"{stats['skipped']} unchanged, {stats['removed']} removed")
+        print(f"⏱️  {time.monotonic() - started:.1f}s")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export analytics and post engagement to partitioned Parquet files")
+    parser.add_argument("--output", default=settings.PARQUET_EXPORT_DIR, help="Export root directory")
+    parser.add_argument("--dataset", action="append", choices=list(DATASETS), help="Only export this dataset (repeatable)")
+    parser.add_argument("--user-id", type=ObjectId, help="Only export this user's partitions")
+    parser.add_argument("--full", action="store_true", help="Rewrite partitions even if they are unchanged")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows per record batch")
+    sys.exit(asyncio.run(main(parser.parse_args())))
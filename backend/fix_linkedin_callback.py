@@ -22,7 +22,7 @@ async def linkedin_oauth_callback(
     try:
         # Verify user token
         token = credentials.credentials
-        email = verify_token(token)
+        email = await verify_token(token)
         if not email:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
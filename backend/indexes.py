@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Declarative index registry.
+
+Every index the application relies on is listed in INDEXES. ensure_indexes
+creates whatever is missing, brings drifted TTLs in line, drops the indexes
+listed in RETIRED_INDEXES once their replacements exist and otherwise leaves
+existing indexes alone, so it is safe to run on every startup and from the
+command line:
+
+    python indexes.py            # create missing indexes, reporting progress
+    python indexes.py --dry-run  # only show what would be created or dropped
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional, Callable, Tuple
+
+from pymongo import IndexModel, ASCENDING
+
+from config import settings
+from database import (
+    USERS_COLLECTION, POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION,
+    ANALYTICS_COLLECTION, ANALYTICS_DAILY_COLLECTION, OTP_COLLECTION, POST_TOMBSTONES_COLLECTION,
+    POSTING_HEATMAP_COLLECTION, ANALYTICS_INGEST_LOCKS_COLLECTION, REVOKED_TOKENS_COLLECTION
+)
+from utils.analytics_store import storage_field, ensure_analytics_collection
+
+logger = logging.getLogger(__name__)
+
+# How often to poll the server for build progress while an index is building
+PROGRESS_POLL_SECONDS = 2.0
+
+
+def analytics_indexes(timeseries: Optional[bool] = None) -> List[IndexModel]:
+    """
+    Raw analytics indexes for the plain or time-series storage layout.
+
+    The natural key is unique in a plain collection; time-series collections
+    do not support unique indexes.
+    """
+    timeseries = settings.ANALYTICS_TIMESERIES if timeseries is None else timeseries
+    user_id = storage_field("user_id", timeseries)
+    platform = storage_field("platform", timeseries)
+    return [
+        IndexModel(
+            [(user_id, ASCENDING), (platform, ASCENDING), ("date", ASCENDING)],
+            name="user_platform_date", unique=not timeseries
+        ),
+        # Cross-platform date range scans
+        IndexModel([(user_id, ASCENDING), ("date", ASCENDING)], name="user_date"),
+    ]
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    USERS_COLLECTION: [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("initial_batch_status", ASCENDING)], name="initial_batch_status", sparse=True),
+    ],
+    POSTS_COLLECTION: [
+        # Keyset pages ordered by (scheduled_date, _id), with and without a status filter
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("scheduled_date", ASCENDING), ("_id", ASCENDING)],
+            name="user_status_scheduled_date_id"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("scheduled_date", ASCENDING), ("_id", ASCENDING)],
+            name="user_scheduled_date_id"
+        ),
+        IndexModel([("user_id", ASCENDING), ("batch_id", ASCENDING)], name="user_batch"),
+        # Scheduler scan for due posts across all users
+        IndexModel([("status", ASCENDING), ("scheduled_date", ASCENDING)], name="status_scheduled_date"),
+        # Publish intents awaiting reconciliation
+        IndexModel([("pending_intents", ASCENDING)], name="pending_intents", sparse=True),
+        # Engagement sync scan for posted posts that are due for polling
+        IndexModel([("status", ASCENDING), ("engagement_next_sync_at", ASCENDING)], name="status_engagement_next_sync"),
+        # Delta sync reads a user's posts in change order
+        IndexModel([("user_id", ASCENDING), ("change_seq", ASCENDING), ("_id", ASCENDING)], name="user_change_seq"),
+    ],
+    POST_TOMBSTONES_COLLECTION: [
+        IndexModel([("user_id", ASCENDING), ("change_seq", ASCENDING), ("_id", ASCENDING)], name="user_change_seq"),
+        IndexModel(
+            [("changed_at", ASCENDING)], name="changed_at_ttl",
+            expireAfterSeconds=settings.POST_TOMBSTONE_RETENTION_DAYS * 86400
+        ),
+    ],
+    PLATFORM_CONNECTIONS_COLLECTION: [
+        IndexModel([("user_id", ASCENDING), ("platform", ASCENDING)], name="user_platform"),
+    ],
+    ANALYTICS_COLLECTION: analytics_indexes(),
+    ANALYTICS_DAILY_COLLECTION: [
+        # Upsert key of the $inc rollups and the $merge key of the backfill
+        IndexModel(
+            [("user_id", ASCENDING), ("platform", ASCENDING), ("day", ASCENDING)],
+            name="user_platform_day_unique", unique=True
+        ),
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day"),
+    ],
+    POSTING_HEATMAP_COLLECTION: [
+        # Upsert key of the engagement sync's $inc updates and the $merge key of the rebuild
+        IndexModel(
+            [("user_id", ASCENDING), ("platform", ASCENDING), ("weekday", ASCENDING), ("hour", ASCENDING)],
+            name="user_platform_weekday_hour_unique", unique=True
+        ),
+    ],
+    ANALYTICS_INGEST_LOCKS_COLLECTION: [
+        # Leases left by a writer that died are removed by the server
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    REVOKED_TOKENS_COLLECTION: [
+        # Revocations are dropped once every token they cover has expired
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    OTP_COLLECTION: [
+        IndexModel([("email", ASCENDING)], name="email"),
+        # Expired codes are removed by the server
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+# Indexes earlier releases created that the registry has replaced
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    # Superseded by user_status_scheduled_date_id, which also covers the _id tiebreak
+    POSTS_COLLECTION: ["user_status_scheduled_date"],
+}
+
+
+# Index options that change what an index enforces or keeps; an index whose
+# options drifted from the registry is not treated as existing
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _option_drift(current: Dict[str, Any], document: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """Options of an existing index that differ from its registered definition, as (current, wanted)."""
+    drift = {}
+    for option in COMPARED_OPTIONS:
+        have, want = current.get(option), document.get(option)
+        if option in ("unique", "sparse"):
+            have, want = bool(have), bool(want)
+        if have != want:
+            drift[option] = (have, want)
+    return drift
+
+
+def _describe(index: IndexModel) -> str:
+    document = index.document
+    keys = ", ".join(f"{field}:{direction}" for field, direction in document["key"].items())
+    options = [option for option in ("unique", "sparse") if document.get(option)]
+    if "expireAfterSeconds" in document:
+        options.append(f"ttl={document['expireAfterSeconds']}s")
+    return f"{document['name']} ({keys}{'; ' + ', '.join(options) if options else ''})"
+
+
+async def _report_build_progress(db, collection: str, report: Callable[[str], None]):
+    """Poll currentOp for createIndexes progress until cancelled."""
+    while True:
+        await asyncio.sleep(PROGRESS_POLL_SECONDS)
+        try:
+            ops = await db.client.admin.aggregate([
+                {"$currentOp": {"allUsers": True}},
+                {"$match": {"command.createIndexes": collection}}
+            ]).to_list(length=None)
+        except Exception:
+            # Not every deployment lets us read currentOp; keep waiting quietly
+            continue
+        for op in ops:
+            progress = op.get("progress") or {}
+            if progress.get("total"):
+                percent = 100.0 * progress.get("done", 0) / progress["total"]
+                report(f"  {collection}: {op.get('msg', 'building')} {percent:.1f}% "
+                       f"({progress.get('done', 0)}/{progress['total']})")
+            elif op.get("msg"):
+                report(f"  {collection}: {op['msg']}")
+
+
+async def ensure_indexes(db, dry_run: bool = False,
+                         report: Optional[Callable[[str], None]] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create every registered index that does not exist yet.
+
+    An existing index whose TTL differs from the registry has it changed in
+    place with ``collMod``. Any other difference in keys or options is
+    reported as a conflict and left alone, since fixing it means dropping and
+    rebuilding the index. Retired indexes are dropped only after every
+    registered index of their collection exists, so queries never lose
+    their index in between.
+
+    Returns:
+        Per collection, the index names that were created, updated, dropped,
+        already existed, conflict with an existing index of the same name, or
+        failed
+    """
+    report = report or logger.info
+    summary: Dict[str, Dict[str, List[str]]] = {}
+
+    # A time-series collection has to exist before indexes are created on it
+    if not dry_run:
+        await ensure_analytics_collection(db, report)
+
+    for collection, indexes in INDEXES.items():
+        result = {"created": [], "updated": [], "dropped": [], "existing": [], "conflicts": [], "failed": []}
+        summary[collection] = result
+        existing = await db[collection].index_information()
+
+        missing = []
+        for index in indexes:
+            document = index.document
+            name = document["name"]
+            current = existing.get(name)
+            if current is None:
+                missing.append(index)
+                continue
+            if list(current["key"]) != list(document["key"].items()):
+                result["conflicts"].append(name)
+                report(f"  {collection}: index {name} exists with different keys {current['key']}, leaving it")
+                continue
+
+            drift = _option_drift(current, document)
+            if not drift:
+                result["existing"].append(name)
+            elif set(drift) == {"expireAfterSeconds"} and None not in drift["expireAfterSeconds"]:
+                have, want = drift["expireAfterSeconds"]
+                if dry_run:
+                    report(f"  {collection}: would change the TTL of {name} from {have}s to {want}s")
+                    continue
+                try:
+                    await db.command("collMod", collection, index={"name": name, "expireAfterSeconds": want})
+                    result["updated"].append(name)
+                    report(f"  {collection}: changed the TTL of {name} from {have}s to {want}s")
+                except Exception as e:
+                    result["failed"].append(name)
+                    report(f"  {collection}: failed to change the TTL of {name}: {e}")
+            else:
+                result["conflicts"].append(name)
+                differences = ", ".join(f"{option} {have!r} (want {want!r})" for option, (have, want) in drift.items())
+                report(f"  {collection}: index {name} exists with different options: {differences}; leaving it")
+
+        for index in missing:
+            name = index.document["name"]
+            if dry_run:
+                report(f"  {collection}: would create {_describe(index)}")
+                continue
+
+            report(f"  {collection}: creating {_describe(index)}")
+            started = time.monotonic()
+            progress_task = asyncio.create_task(_report_build_progress(db, collection, report))
+            try:
+                await db[collection].create_indexes([index])
+                result["created"].append(name)
+                report(f"  {collection}: created {name} in {time.monotonic() - started:.1f}s")
+            except Exception as e:
+                result["failed"].append(name)
+                report(f"  {collection}: failed to create {name}: {e}")
+            finally:
+                progress_task.cancel()
+
+        for name in RETIRED_INDEXES.get(collection, []):
+            if name not in existing:
+                continue
+            if dry_run:
+                report(f"  {collection}: would drop retired index {name}")
+                continue
+            if result["failed"]:
+                report(f"  {collection}: keeping retired index {name} until its replacement exists")
+                continue
+            try:
+                await db[collection].drop_index(name)
+                result["dropped"].append(name)
+                report(f"  {collection}: dropped retired index {name}")
+            except Exception as e:
+                result["failed"].append(name)
+                report(f"  {collection}: failed to drop retired index {name}: {e}")
+
+    return summary
+
+
+async def ensure_indexes_in_background(db):
+    """Startup hook: build indexes without holding up the application."""
+    try:
+        summary = await ensure_indexes(db)
+        created = sum(len(result["created"]) for result in summary.values())
+        failed = sum(len(result["failed"]) for result in summary.values())
+        logger.info(f"Index bootstrap complete: {created} created, {failed} failed")
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {e}")
+
+
+async def main(dry_run: bool) -> int:
+    from database import connect_to_mongo, close_mongo_connection, get_database, is_database_connected
+
+    await connect_to_mongo()
+    if not is_database_connected():
+        print("❌ Could not connect to MongoDB")
+        return 1
+
+    try:
+        print(f"🔧 {'Checking' if dry_run else 'Ensuring'} indexes")
+        print("=" * 50)
+        summary = await ensure_indexes(get_database(), dry_run=dry_run, report=print)
+        print("=" * 50)
+        for collection, result in summary.items():
+            print(f"{collection}: {len(result['created'])} created, {len(result['updated'])} updated, "
+                  f"{len(result['dropped'])} dropped, "
+                  f"{len(result['existing'])} existing, "
+                  f"{len(result['conflicts'])} conflicts, {len(result['failed'])} failed")
+        return 1 if any(result["failed"] for result in summary.values()) else 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the application's MongoDB indexes")
+    parser.add_argument("--dry-run", action="store_true", help="Only report indexes that are missing")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.dry_run)))
@@ -12,12 +12,20 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import settings
-from database import connect_to_mongo, close_mongo_connection, db
+from database import connect_to_mongo, close_mongo_connection, db, get_database, is_database_connected
+from indexes import ensure_indexes_in_background
 from utils import verify_token
 from utils.scheduler import start_scheduler, stop_scheduler
+from utils.engagement_sync import engagement_sync, start_engagement_sync, stop_engagement_sync
+from utils.resilience import get_breaker_states
+from utils.auth import password_executor
+from utils.jobs import job_queue, start_job_queue, stop_job_queue
+from utils.onboarding import requeue_initial_batches
+from utils.analytics_store import ensure_analytics_collection
+from utils.result_cache import analytics_cache
 
 # Import routers
-from routers import auth, users, posts, platforms, analytics
+from routers import auth, users, posts, platforms, analytics, dashboard
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,9 +39,14 @@ security = HTTPBearer()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up Social Media Automation Platform...")
+    index_task = None
     try:
         await connect_to_mongo()
         logger.info("MongoDB connection successful!")
+        if is_database_connected():
+            # Created up front so the first tracked row cannot create a plain collection
+            await ensure_analytics_collection(get_database())
+            index_task = asyncio.create_task(ensure_indexes_in_background(get_database()))
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {e}")
         logger.warning("Application will start without database connection. Some features may not work.")
@@ -51,6 +64,21 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to start scheduler: {e}")
         logger.warning("Application will start without scheduler. Automatic posting may not work.")
     
+    # Start polling the platforms for engagement on published posts
+    try:
+        asyncio.create_task(start_engagement_sync())
+        logger.info("Engagement sync started successfully!")
+    except Exception as e:
+        logger.error(f"Failed to start engagement sync: {e}")
+    
+    # Start background job workers and pick up work queued before a restart
+    try:
+        await start_job_queue()
+        await requeue_initial_batches()
+        logger.info("Background job queue started successfully!")
+    except Exception as e:
+        logger.error(f"Failed to start background job queue: {e}")
+    
     logger.info("Application startup complete!")
     
     yield
@@ -63,6 +91,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping scheduler: {e}")
     
+    try:
+        await stop_engagement_sync()
+    except Exception as e:
+        logger.error(f"Error stopping engagement sync: {e}")
+    
+    try:
+        await stop_job_queue()
+    except Exception as e:
+        logger.error(f"Error stopping background job queue: {e}")
+    
+    if index_task is not None and not index_task.done():
+        # Stop waiting on index builds before the connection closes under them;
+        # the server finishes any build it already started
+        index_task.cancel()
+        try:
+            await index_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Index bootstrap cancelled")
+    
+    password_executor.shutdown(wait=False)
+    
     try:
         await close_mongo_connection()
         logger.info("MongoDB connection closed successfully!")
@@ -86,6 +136,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Mount static files
@@ -94,7 +145,7 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Dependency to get current user
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    email = verify_token(token)
+    email = await verify_token(token)
     if email is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -116,6 +167,7 @@ app.include_router(
 )
 logger.info("Platform routes registered")
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 
 
 @app.get("/")
@@ -137,7 +189,11 @@ async def health_check():
     return {
         "status": "healthy", 
         "timestamp": datetime.utcnow().isoformat(),
-        "database": "connected" if hasattr(db, 'client') and db.client else "disconnected"
+        "database": "connected" if hasattr(db, 'client') and db.client else "disconnected",
+        "dependencies": get_breaker_states(),
+        "jobs": job_queue.stats(),
+        "engagement_sync": engagement_sync.stats(),
+        "analytics_cache": analytics_cache.stats()
     }
 
 
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Move raw analytics rows into a time-series collection.
+
+1. Set ANALYTICS_TIMESERIES=true and restart the backend, so that new rows
+   are written in the time-series layout.
+2. Run this script. It renames the plain ``analytics`` collection to
+   ``analytics_legacy``, creates ``analytics`` as a time-series collection
+   with its indexes, and copies the legacy rows across in batches:
+
+    python migrate_analytics_timeseries.py              # migrate, keep the legacy copy
+    python migrate_analytics_timeseries.py --drop-legacy
+
+The copy goes in _id order and resumes after the last copied row, so an
+interrupted run can simply be started again. The legacy collection is only
+dropped once every row is accounted for.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from pymongo.errors import BulkWriteError
+
+from config import settings
+from database import ANALYTICS_COLLECTION
+from indexes import ensure_indexes
+from utils.analytics_store import is_timeseries_collection, to_storage, TIMESERIES_OPTIONS
+
+LEGACY_COLLECTION = f"{ANALYTICS_COLLECTION}_legacy"
+COPY_BATCH_SIZE = 5000
+
+
+async def _legacy_max_id(db):
+    newest = await db[LEGACY_COLLECTION].find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return newest["_id"] if newest else None
+
+
+async def copy_rows(db, batch_size: int) -> int:
+    """Copy legacy rows not yet present in the time-series collection; returns rows copied."""
+    target = db[ANALYTICS_COLLECTION]
+    legacy_max = await _legacy_max_id(db)
+    if legacy_max is None:
+        return 0
+
+    # Rows tracked since the switch have newer _ids than any legacy row, so the
+    # newest copied legacy _id marks how far an earlier run got
+    query = {}
+    last = await target.find({"_id": {"$lte": legacy_max}}, {"_id": 1}).sort("_id", -1).limit(1).to_list(length=1)
+    if last:
+        query["_id"] = {"$gt": last[0]["_id"]}
+        print(f"  resuming after {last[0]['_id']}")
+
+    copied = 0
+    batch = []
+    started = time.monotonic()
+    async for row in db[LEGACY_COLLECTION].find(query).sort("_id", 1).batch_size(batch_size):
+        batch.append(to_storage(row, timeseries=True))
+        if len(batch) >= batch_size:
+            copied += await _insert(target, batch)
+            batch = []
+            print(f"  copied {copied} rows ({copied / max(time.monotonic() - started, 1e-6):.0f}/s)", end="\r")
+    if batch:
+        copied += await _insert(target, batch)
+    print(f"  copied {copied} rows in {time.monotonic() - started:.1f}s")
+    return copied
+
+
+async def _insert(collection, batch) -> int:
+    try:
+        result = await collection.insert_many(batch, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        print(f"  {len(e.details.get('writeErrors', []))} rows failed to copy in this batch")
+        return e.details.get("nInserted", 0)
+
+
+async def main(drop_legacy: bool, batch_size: int) -> int:
+    from database import connect_to_mongo, close_mongo_connection, get_database, is_database_connected
+
+    await connect_to_mongo()
+    if not is_database_connected():
+        print("❌ Could not connect to MongoDB")
+        return 1
+
+    try:
+        db = get_database()
+        if not settings.ANALYTICS_TIMESERIES:
+            print("⚠️  ANALYTICS_TIMESERIES is not enabled; the app will keep reading the plain layout")
+
+        current = await is_timeseries_collection(db, ANALYTICS_COLLECTION)
+        legacy = await is_timeseries_collection(db, LEGACY_COLLECTION)
+
+        if current is False:
+            if legacy is not None:
+                print(f"❌ Both {ANALYTICS_COLLECTION} and {LEGACY_COLLECTION} are plain collections; resolve by hand")
+                return 1
+            print(f"🔁 Renaming {ANALYTICS_COLLECTION} to {LEGACY_COLLECTION}")
+            await db[ANALYTICS_COLLECTION].rename(LEGACY_COLLECTION)
+            legacy, current = False, None
+
+        if current is None:
+            print(f"🆕 Creating time-series collection {ANALYTICS_COLLECTION}")
+            await db.create_collection(ANALYTICS_COLLECTION, timeseries=TIMESERIES_OPTIONS)
+        await ensure_indexes(db, report=print)
+
+        if legacy is None:
+            print("✅ No legacy collection to copy from; nothing to migrate")
+            return 0
+
+        print(f"📦 Copying {LEGACY_COLLECTION} into {ANALYTICS_COLLECTION}")
+        await copy_rows(db, batch_size)
+
+        legacy_count = await db[LEGACY_COLLECTION].count_documents({})
+        legacy_max = await _legacy_max_id(db)
+        copied_count = await db[ANALYTICS_COLLECTION].count_documents(
+            {"_id": {"$lte": legacy_max}} if legacy_max is not None else {"_id": None}
+        )
+        print(f"Legacy rows: {legacy_count}, copied: {copied_count}")
+        if copied_count < legacy_count:
+            print("❌ Not every legacy row was copied; rerun to resume")
+            return 1
+
+        if drop_legacy:
+            print(f"🗑️  Dropping {LEGACY_COLLECTION}")
+            await db[LEGACY_COLLECTION].drop()
+        else:
+            print(f"Keeping {LEGACY_COLLECTION}; rerun with --drop-legacy once you have checked the data")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate raw analytics rows into a time-series collection")
+    parser.add_argument("--drop-legacy", action="store_true", help="Drop the plain collection after copying")
+    parser.add_argument("--batch-size", type=int, default=COPY_BATCH_SIZE)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.drop_legacy, args.batch_size)))
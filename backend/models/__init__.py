@@ -1,6 +1,6 @@
 from .user import (
     UserBase, UserCreate, UserUpdate, UserInDB, User,
-    UserLogin, OTPRequest, OTPVerify, Token, TokenData
+    UserLogin, PasswordChange, OTPRequest, OTPVerify, Token, TokenData
 )
 from .post import (
     PostBase, PostCreate, PostUpdate, PostInDB, Post,
@@ -18,7 +18,7 @@ from .analytics import (
 __all__ = [
     # User models
     "UserBase", "UserCreate", "UserUpdate", "UserInDB", "User",
-    "UserLogin", "OTPRequest", "OTPVerify", "Token", "TokenData",
+    "UserLogin", "PasswordChange", "OTPRequest", "OTPVerify", "Token", "TokenData",
     
     # Post models
     "PostBase", "PostCreate", "PostUpdate", "PostInDB", "Post",
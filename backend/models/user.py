@@ -76,6 +76,11 @@ class UserLogin(BaseModel):
     password: str
 
 
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str = Field(..., min_length=8)
+
+
 class OTPRequest(BaseModel):
     email: EmailStr
 
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Query-plan audit.
+
+1. Record: set QUERY_AUDIT_LOG=queries.jsonl and run the app (or a test run).
+   Every distinct query shape the app sends to MongoDB is appended to the file
+   together with one concrete example of it.
+2. Audit: replay the recorded shapes through ``explain`` against a local,
+   seeded database and flag collection scans, poor docs-examined/returned
+   ratios and in-memory sorts.
+
+    python query_audit.py queries.jsonl --database audit_db --seed 2000 --ensure-indexes
+
+Exits non-zero when any shape is flagged, so it can gate CI.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Iterator
+
+from bson import ObjectId, json_util
+from pymongo import monitoring
+
+from database import (
+    USERS_COLLECTION, POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION,
+    ANALYTICS_COLLECTION
+)
+from utils.analytics_store import to_storage
+
+# Commands whose plans are worth auditing
+AUDITED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Driver and session fields that must not be passed back to explain
+_SESSION_FIELDS = {
+    "$db", "lsid", "$clusterTime", "txnNumber", "$readPreference", "readConcern",
+    "writeConcern", "startTransaction", "autocommit", "ordered", "bypassDocumentValidation",
+    "cursor", "batchSize", "singleBatch", "maxTimeMS"
+}
+
+DEFAULT_MAX_RATIO = 10.0
+# Below this many examined documents a high ratio is noise, not a problem
+MIN_DOCS_EXAMINED = 100
+
+
+def query_shape(value: Any) -> Any:
+    """Replace literal values with their type names, keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [query_shape(item) for item in value]
+        if all(isinstance(shape, str) for shape in shapes):
+            # $in lists and the like: the shape is the set of element types
+            return sorted(set(shapes))
+        return shapes
+    return type(value).__name__
+
+
+def _command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    shape = {"command": command_name, "collection": command.get(command_name)}
+    for key in ("filter", "query", "sort", "projection", "pipeline", "key", "updates", "deletes", "update"):
+        if key in command:
+            shape[key] = query_shape(command[key])
+    return shape
+
+
+class QueryShapeRecorder(monitoring.CommandListener):
+    """Command listener that appends every new query shape to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen = set()
+        self._lock = threading.Lock()
+        for entry in load_recording(path, missing_ok=True):
+            self._seen.add(entry["key"])
+
+    def started(self, event):
+        if event.command_name not in AUDITED_COMMANDS:
+            return
+        command = dict(event.command)
+        shape = _command_shape(event.command_name, command)
+        key = json.dumps(shape, sort_keys=True)
+
+        with self._lock:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+            example = {field: item for field, item in command.items() if field not in _SESSION_FIELDS}
+            entry = {"key": key, "shape": shape, "database": event.database_name, "example": example}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json_util.dumps(entry) + "\n")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def load_recording(path: str, missing_ok: bool = False) -> List[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json_util.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        if missing_ok:
+            return []
+        raise
+
+
+def _plan_stages(node: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every plan stage in an explain document, skipping rejected plans."""
+    if isinstance(node, dict):
+        if "stage" in node:
+            yield node
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                yield from _plan_stages(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _plan_stages(item)
+
+
+def _execution_stats(node: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(node, dict):
+        if "executionStats" in node:
+            return node["executionStats"]
+        for value in node.values():
+            found = _execution_stats(value)
+            if found:
+                return found
+    elif isinstance(node, list):
+        for item in node:
+            found = _execution_stats(item)
+            if found:
+                return found
+    return None
+
+
+def analyze_explain(explain: Dict[str, Any], max_ratio: float = DEFAULT_MAX_RATIO) -> Dict[str, Any]:
+    """Summarize an explain result and list the problems found in it."""
+    stages = [stage for stage in _plan_stages(explain.get("queryPlanner", explain))]
+    stage_names = [stage["stage"] for stage in stages]
+    stats = _execution_stats(explain) or {}
+    examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+    ratio = examined / max(returned, 1)
+
+    # Aggregation stages the query layer could not absorb show up by name
+    pipeline_stages = [
+        next(iter(stage)) for stage in explain.get("stages", []) if isinstance(stage, dict)
+    ]
+
+    problems = []
+    if "COLLSCAN" in stage_names:
+        problems.append("COLLSCAN")
+    if "SORT" in stage_names or "$sort" in pipeline_stages:
+        problems.append("in-memory sort")
+    if examined >= MIN_DOCS_EXAMINED and ratio > max_ratio:
+        problems.append(f"examined/returned ratio {ratio:.1f}")
+
+    return {
+        "stages": stage_names,
+        "indexes": sorted({stage["indexName"] for stage in stages if stage.get("indexName")}),
+        "docs_examined": examined,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "returned": returned,
+        "ratio": round(ratio, 2),
+        "problems": problems
+    }
+
+
+async def explain_entry(db, entry: Dict[str, Any]) -> Dict[str, Any]:
+    return await db.command({"explain": entry["example"], "verbosity": "executionStats"})
+
+
+async def seed_database(db, users: int):
+    """Fill the audit database with synthetic data so the planner has real choices to make."""
+    platforms = ["instagram", "linkedin", "facebook", "twitter"]
+    statuses = ["pending_approval", "approved", "scheduled", "posted", "failed"]
+    now = datetime.now()
+
+    for start in range(0, users, 100):
+        user_docs, post_docs, connection_docs, analytics_docs = [], [], [], []
+        for n in range(start, min(users, start + 100)):
+            user_id = ObjectId()
+            user_docs.append({"_id": user_id, "email": f"audit{n}@example.com", "role": "individual"})
+            for day in range(14):
+                scheduled = now + timedelta(days=day - 7)
+                post_docs.append({
+                    "user_id": user_id,
+                    "status": random.choice(statuses),
+                    "scheduled_date": scheduled.isoformat(),
+                    "batch_id": f"batch_{n}_{day // 7}",
+                    "platforms": random.sample(platforms, 2),
+                    "caption": "seed",
+                    "created_at": now.isoformat()
+                })
+            for platform in platforms:
+                connection_docs.append({"user_id": user_id, "platform": platform, "is_connected": random.random() < 0.5})
+                for day in range(30):
+                    analytics_docs.append({
+                        "user_id": user_id,
+                        "platform": platform,
+                        "date": now - timedelta(days=day),
+                        "likes_count": random.randint(0, 50)
+                    })
+
+        await db[USERS_COLLECTION].insert_many(user_docs)
+        await db[POSTS_COLLECTION].insert_many(post_docs)
+        await db[PLATFORM_CONNECTIONS_COLLECTION].insert_many(connection_docs)
+        await db[ANALYTICS_COLLECTION].insert_many([to_storage(doc) for doc in analytics_docs])
+        print(f"  seeded {min(users, start + 100)}/{users} users")
+
+
+async def run_audit(args) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from indexes import ensure_indexes
+
+    entries = load_recording(args.recording)
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.database]
+
+    try:
+        if args.seed:
+            print(f"🌱 Seeding {args.database} with {args.seed} users")
+            await seed_database(db, args.seed)
+        if args.ensure_indexes:
+            await ensure_indexes(db, report=print)
+
+        print(f"🔎 Explaining {len(entries)} query shapes")
+        print("=" * 70)
+        flagged = 0
+        for entry in entries:
+            shape = entry["shape"]
+            label = f"{shape['command']} {shape['collection']}"
+            try:
+                result = analyze_explain(await explain_entry(db, entry), max_ratio=args.max_ratio)
+            except Exception as e:
+                print(f"⚠️  {label}: explain failed: {e}")
+                continue
+
+            status = "❌" if result["problems"] else "✅"
+            flagged += bool(result["problems"])
+            print(f"{status} {label}")
+            print(f"   shape:    {json.dumps({k: v for k, v in shape.items() if k not in ('command', 'collection')})}")
+            print(f"   plan:     {' <- '.join(result['stages']) or 'n/a'}")
+            print(f"   indexes:  {', '.join(result['indexes']) or 'none'}")
+            print(f"   examined: {result['docs_examined']} docs / {result['keys_examined']} keys, "
+                  f"returned {result['returned']} (ratio {result['ratio']})")
+            if result["problems"]:
+                print(f"   problems: {', '.join(result['problems'])}")
+
+        print("=" * 70)
+        print(f"{flagged} of {len(entries)} query shapes flagged")
+        return 1 if flagged else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explain recorded query shapes and flag unindexed queries")
+    parser.add_argument("recording", help="JSONL file written with QUERY_AUDIT_LOG")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="social_media_automation_audit")
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic users first")
+    parser.add_argument("--ensure-indexes", action="store_true", help="Apply the index registry first")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="Flag shapes examining more than this many docs per returned doc")
+    sys.exit(asyncio.run(run_audit(parser.parse_args())))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rebuild the posting-time heatmaps from the posts' synced engagement.
+
+The engagement sync keeps the heatmaps current; run this once after deploying
+them, and whenever they need repairing:
+
+    python rebuild_heatmaps.py                          # every user
+    python rebuild_heatmaps.py --user-id <id>           # one user
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from bson import ObjectId
+
+from indexes import ensure_indexes
+from utils.heatmap import rebuild_heatmaps
+
+
+async def main(user_id) -> int:
+    from database import connect_to_mongo, close_mongo_connection, get_database, is_database_connected
+
+    await connect_to_mongo()
+    if not is_database_connected():
+        print("❌ Could not connect to MongoDB")
+        return 1
+
+    try:
+        db = get_database()
+        # The rebuild merges on the heatmap cells' unique key, which must exist first
+        await ensure_indexes(db, report=print)
+
+        scope = f"user {user_id}" if user_id else "all users"
+        print(f"🗓️  Rebuilding posting-time heatmaps for {scope}")
+        started = time.monotonic()
+        count = await rebuild_heatmaps(db, user_id=user_id)
+        print(f"✅ {count} heatmap cells in {time.monotonic() - started:.1f}s")
+        return 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild posting-time heatmaps from posts' engagement")
+    parser.add_argument("--user-id", type=ObjectId, help="Only rebuild this user's heatmaps")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.user_id)))
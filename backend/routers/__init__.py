@@ -1,3 +1,3 @@
-from . import auth, users, posts, platforms, analytics
+from . import auth, users, posts, platforms, analytics, dashboard
 
-__all__ = ["auth", "users", "posts", "platforms", "analytics"] 
\ No newline at end of file
+__all__ = ["auth", "users", "posts", "platforms", "analytics", "dashboard"] 
\ No newline at end of file
@@ -1,125 +1,68 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from typing import List, Dict, Any, Optional
 from bson import ObjectId
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
+import ijson
 
-from database import get_database, USERS_COLLECTION, ANALYTICS_COLLECTION, POSTS_COLLECTION
+from config import settings
+from database import get_database, ANALYTICS_COLLECTION, POSTS_COLLECTION
 from models import Analytics, AnalyticsCreate, AnalyticsSummary, AnalyticsRequest
-from utils import verify_token
+from utils import get_current_user
+from utils.export import export_response
+from utils.changes import ANALYTICS_SCOPE, POSTS_SCOPE
+from utils.etag import check_not_modified
+from utils.analytics import compute_summary, daily_rollups, average_engagement_rate, SUMMARY_PLATFORMS
+from utils.analytics_store import storage_query, from_storage
+from utils.analytics_ingest import ingest_rows, ingest_date, write_chunk, IngestResult
+from utils.growth import growth_analytics
+from utils.heatmap import load_heatmaps, heatmap_report
+from utils.result_cache import cached_result
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-security = HTTPBearer()
 
 
 @router.get("/summary", response_model=AnalyticsSummary)
 async def get_analytics_summary(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user)
 ):
-    """Get analytics summary for the current user."""
+    """
+    Get analytics summary for the current user.
+
+    Supports If-None-Match. Besides analytics and post writes the ETag changes
+    every hour, as the 30-day window moves on.
+    """
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
-        
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Get analytics data for the last 30 days
         end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=30)
-        
-        analytics_data = await db[ANALYTICS_COLLECTION].find({
-            "user_id": ObjectId(user["_id"]),
-            "date": {"$gte": start_date, "$lte": end_date}
-        }).to_list(length=None)
         
-        # Calculate summary
-        total_followers = sum(data.get("followers_count", 0) for data in analytics_data)
-        total_engagement = sum(
-            data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
-            for data in analytics_data
+        not_modified = await check_not_modified(
+            request, response, db, user["_id"], [ANALYTICS_SCOPE, POSTS_SCOPE], end_date.strftime("%Y%m%d%H")
         )
+        if not_modified:
+            return not_modified
         
-        # Calculate average engagement rate
-        engagement_rates = [data.get("engagement_rate", 0) for data in analytics_data if data.get("engagement_rate", 0) > 0]
-        average_engagement_rate = sum(engagement_rates) / len(engagement_rates) if engagement_rates else 0
-        
-        # Platform breakdown
-        platform_breakdown = {}
-        platforms = ["instagram", "linkedin", "facebook", "twitter"]
-        
-        for platform in platforms:
-            platform_data = [data for data in analytics_data if data.get("platform") == platform]
-            if platform_data:
-                platform_breakdown[platform] = {
-                    "followers": sum(data.get("followers_count", 0) for data in platform_data),
-                    "engagement": sum(
-                        data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
-                        for data in platform_data
-                    ),
-                    "posts": len(platform_data)
-                }
-            else:
-                platform_breakdown[platform] = {
-                    "followers": 0,
-                    "engagement": 0,
-                    "posts": 0
-                }
-        
-        # Growth trend (last 7 days)
-        growth_trend = []
-        for i in range(7):
-            date = end_date - timedelta(days=i)
-            day_data = [data for data in analytics_data if data.get("date").date() == date.date()]
+        async def compute():
+            summary = await compute_summary(db, ObjectId(user["_id"]), end_date)
             
-            if day_data:
-                growth_trend.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "followers": sum(data.get("followers_count", 0) for data in day_data),
-                    "engagement": sum(
-                        data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
-                        for data in day_data
-                    )
-                })
-            else:
-                growth_trend.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "followers": 0,
-                    "engagement": 0
-                })
-        
-        # Top posts (based on engagement)
-        top_posts = await db[POSTS_COLLECTION].find({
-            "user_id": ObjectId(user["_id"]),
-            "status": "posted"
-        }).sort("engagement_data.total_engagement", -1).limit(5).to_list(length=None)
-        
-        # Convert ObjectIds to strings
-        for post in top_posts:
-            post["_id"] = str(post["_id"])
-            post["user_id"] = str(post["user_id"])
+            # Top posts (based on engagement)
+            top_posts = await db[POSTS_COLLECTION].find({
+                "user_id": ObjectId(user["_id"]),
+                "status": "posted"
+            }).sort("engagement_data.total_engagement", -1).limit(5).to_list(length=None)
+            
+            # Convert ObjectIds to strings
+            for post in top_posts:
+                post["_id"] = str(post["_id"])
+                post["user_id"] = str(post["user_id"])
+            
+            return AnalyticsSummary(**summary, top_posts=top_posts)
         
-        return AnalyticsSummary(
-            total_followers=total_followers,
-            total_engagement=total_engagement,
-            average_engagement_rate=average_engagement_rate,
-            platform_breakdown=platform_breakdown,
-            growth_trend=growth_trend,
-            top_posts=top_posts
+        return await cached_result(
+            db, user["_id"], "summary", [ANALYTICS_SCOPE, POSTS_SCOPE], [end_date.strftime("%Y%m%d%H")], compute
         )
         
     except HTTPException:
@@ -135,53 +78,22 @@ async def get_analytics_summary(
 @router.get("/platform/{platform}", response_model=List[Analytics])
 async def get_platform_analytics(
     platform: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: dict = Depends(get_current_user),
     days: int = 30
 ):
-    """Get analytics for a specific platform."""
+    """Get daily analytics for a specific platform, one entry per day from the rollups."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Validate platform
-        valid_platforms = ["instagram", "linkedin", "facebook", "twitter"]
-        if platform not in valid_platforms:
+        if platform not in SUMMARY_PLATFORMS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid platform"
             )
         
-        # Get analytics data
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        analytics_data = await db[ANALYTICS_COLLECTION].find({
-            "user_id": ObjectId(user["_id"]),
-            "platform": platform,
-            "date": {"$gte": start_date, "$lte": end_date}
-        }).sort("date", 1).to_list(length=None)
-        
-        # Convert ObjectIds to strings
-        for data in analytics_data:
-            data["_id"] = str(data["_id"])
-            data["user_id"] = str(data["user_id"])
-        
-        return analytics_data
+        rollups = await daily_rollups(db, ObjectId(user["_id"]), days, platform)
+        return [_rollup_as_analytics(rollup) for rollup in rollups]
         
     except HTTPException:
         raise
@@ -193,43 +105,95 @@ async def get_platform_analytics(
         )
 
 
+def _rollup_as_analytics(rollup: dict) -> dict:
+    """A daily rollup in the shape of a raw analytics row; followers is the day's highest count."""
+    return {
+        "_id": str(rollup["_id"]),
+        "user_id": str(rollup["user_id"]),
+        "platform": rollup["platform"],
+        "date": rollup["day"],
+        "followers_count": rollup.get("followers_max", 0),
+        "likes_count": rollup.get("likes", 0),
+        "comments_count": rollup.get("comments", 0),
+        "shares_count": rollup.get("shares", 0),
+        "impressions_count": rollup.get("impressions", 0),
+        "reach_count": rollup.get("reach", 0),
+        "engagement_rate": average_engagement_rate(rollup),
+        "created_at": rollup.get("created_at"),
+        "updated_at": rollup.get("updated_at")
+    }
+
+
+ANALYTICS_EXPORT_COLUMNS = [
+    "date", "platform", "followers_count", "likes_count", "comments_count", "shares_count",
+    "impressions_count", "reach_count", "engagement_rate"
+]
+
+
+def _serialize_analytics(data: dict) -> dict:
+    return {
+        "_id": str(data["_id"]),
+        "date": data.get("date"),
+        "platform": data.get("platform"),
+        **{column: data.get(column, 0) for column in ANALYTICS_EXPORT_COLUMNS[2:]}
+    }
+
+
+@router.get("/export")
+async def export_analytics(
+    user: dict = Depends(get_current_user),
+    export_format: str = Query("ndjson", alias="format"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    platform: Optional[str] = None
+):
+    """Stream the user's analytics as NDJSON or CSV, optionally filtered by date range and platform."""
+    db = get_database()
+    
+    query = {"user_id": ObjectId(user["_id"])}
+    if platform:
+        query["platform"] = platform
+    if start_date or end_date:
+        query["date"] = {}
+        if start_date:
+            query["date"]["$gte"] = start_date
+        if end_date:
+            query["date"]["$lte"] = end_date
+    
+    cursor = db[ANALYTICS_COLLECTION].find(storage_query(query)).sort([("date", 1), ("_id", 1)])
+    return export_response(
+        cursor, export_format, f"analytics-{datetime.now().strftime('%Y%m%d')}",
+        ANALYTICS_EXPORT_COLUMNS, lambda data: _serialize_analytics(from_storage(data))
+    )
+
+
 @router.post("/track", response_model=dict)
 async def track_analytics(
     analytics_data: AnalyticsCreate,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
-    """Track analytics data for a platform."""
+    """
+    Track analytics data for a platform.
+
+    Written like one ingested row: a row with the same platform and date
+    replaces the stored one.
+    """
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
+        analytics_doc = analytics_data.dict(exclude={"user_id"})
+        analytics_doc["date"] = ingest_date(analytics_doc["date"])
+        result = IngestResult()
+        await write_chunk(db, ObjectId(user["_id"]), [(0, analytics_doc)], result)
+        if result.errors:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                status_code=status.HTTP_409_CONFLICT,
+                detail=result.errors[0]["error"]
             )
         
-        # Create analytics document
-        analytics_doc = analytics_data.dict()
-        analytics_doc["user_id"] = ObjectId(user["_id"])
-        analytics_doc["created_at"] = "2024-01-01T00:00:00Z"
-        analytics_doc["updated_at"] = "2024-01-01T00:00:00Z"
-        
-        # Insert analytics data
-        result = await db[ANALYTICS_COLLECTION].insert_one(analytics_doc)
-        
         return {
             "message": "Analytics data tracked successfully",
-            "analytics_id": str(result.inserted_id)
+            "analytics_id": str(analytics_doc["_id"])
         }
         
     except HTTPException:
@@ -242,81 +206,115 @@ async def track_analytics(
         )
 
 
-@router.get("/growth", response_model=Dict[str, Any])
-async def get_growth_analytics(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    days: int = 30
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def _ndjson_lines(request: Request):
+    """Lines of an NDJSON request body, read as it streams in."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+class _BodyReader:
+    """Async file-like view of a request body, for ijson."""
+    
+    def __init__(self, request: Request):
+        self._chunks = request.stream().__aiter__()
+        self._started = False
+    
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            # ijson probes the stream type with an empty read
+            return b""
+        async for chunk in self._chunks:
+            if not chunk:
+                continue
+            if not self._started:
+                self._started = True
+                if not chunk.lstrip().startswith(b"["):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of analytics rows"
+                    )
+            return chunk
+        return b""
+
+
+async def _json_array(request: Request):
+    """Items of a JSON array request body, parsed as it streams in."""
+    try:
+        async for row in ijson.items(_BodyReader(request), "item", use_float=True):
+            yield row
+    except ijson.JSONError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request body is not valid JSON")
+
+
+@router.post("/track/bulk", response_model=Dict[str, Any])
+async def track_analytics_bulk(
+    request: Request,
+    user: dict = Depends(get_current_user)
 ):
-    """Get growth analytics data."""
+    """
+    Track many analytics rows in one request.
+
+    The body is either NDJSON (``Content-Type: application/x-ndjson``), one
+    ``AnalyticsCreate`` object per line, or a JSON array of them; either is
+    validated and written as it streams in. Rows are keyed on (platform, date):
+    sending a row again replaces it. Invalid rows are skipped and reported by
+    their zero-based position in ``errors``; the others are still written. A
+    JSON array that turns out to be malformed is rejected with 400, after the
+    chunks before the error have been written.
+    """
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        rows = _ndjson_lines(request) if content_type in NDJSON_MEDIA_TYPES else _json_array(request)
         
-        # Get analytics data
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        result = await ingest_rows(db, ObjectId(user["_id"]), rows, max_rows=settings.ANALYTICS_INGEST_MAX_ROWS)
         
-        analytics_data = await db[ANALYTICS_COLLECTION].find({
-            "user_id": ObjectId(user["_id"]),
-            "date": {"$gte": start_date, "$lte": end_date}
-        }).sort("date", 1).to_list(length=None)
+        return {
+            "message": f"Tracked {result.written} of {result.received} analytics rows",
+            **result.as_dict()
+        }
         
-        # Process growth data
-        growth_data = {}
-        platforms = ["instagram", "linkedin", "facebook", "twitter"]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in track_analytics_bulk: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
+@router.get("/growth", response_model=Dict[str, Any])
+async def get_growth_analytics(
+    user: dict = Depends(get_current_user),
+    days: int = Query(30, ge=1, le=730)
+):
+    """
+    Get growth analytics data.
+
+    Besides the daily follower and engagement series, each platform reports its
+    daily engagement rate, a 7-day rolling engagement average, and the change
+    against the previous period of the same length and against last week.
+    """
+    try:
+        db = get_database()
         
-        for platform in platforms:
-            platform_data = [data for data in analytics_data if data.get("platform") == platform]
-            
-            if platform_data:
-                # Calculate growth metrics
-                followers_growth = []
-                engagement_growth = []
-                
-                for data in platform_data:
-                    followers_growth.append({
-                        "date": data["date"].strftime("%Y-%m-%d"),
-                        "followers": data.get("followers_count", 0)
-                    })
-                    
-                    engagement_growth.append({
-                        "date": data["date"].strftime("%Y-%m-%d"),
-                        "engagement": data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
-                    })
-                
-                growth_data[platform] = {
-                    "followers_growth": followers_growth,
-                    "engagement_growth": engagement_growth,
-                    "total_followers": max(data.get("followers_count", 0) for data in platform_data),
-                    "total_engagement": sum(
-                        data.get("likes_count", 0) + data.get("comments_count", 0) + data.get("shares_count", 0)
-                        for data in platform_data
-                    )
-                }
-            else:
-                growth_data[platform] = {
-                    "followers_growth": [],
-                    "engagement_growth": [],
-                    "total_followers": 0,
-                    "total_engagement": 0
-                }
+        end_date = datetime.utcnow()
         
-        return growth_data
+        return await cached_result(
+            db, user["_id"], "growth", [ANALYTICS_SCOPE], [days, end_date.strftime("%Y%m%d")],
+            lambda: growth_analytics(db, ObjectId(user["_id"]), days, end_date)
+        )
         
     except HTTPException:
         raise
@@ -328,55 +326,68 @@ async def get_growth_analytics(
         )
 
 
+@router.get("/posting-heatmap", response_model=Dict[str, Any])
+async def get_posting_heatmap(
+    user: dict = Depends(get_current_user)
+):
+    """
+    Get the posting-time heatmap of each platform.
+
+    Cells are keyed by weekday (Monday 0) and hour posted. ``lift`` is the
+    smoothed engagement per post relative to the platform average, and is
+    null until the platform has enough published posts to be trusted.
+    """
+    try:
+        db = get_database()
+        
+        return {"platforms": heatmap_report(await load_heatmaps(db, ObjectId(user["_id"])))}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_posting_heatmap: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @router.get("/posts-performance", response_model=List[Dict[str, Any]])
 async def get_posts_performance(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user: dict = Depends(get_current_user),
     limit: int = 10
 ):
     """Get performance data for posts."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Get posts with engagement data
-        posts = await db[POSTS_COLLECTION].find({
-            "user_id": ObjectId(user["_id"]),
-            "status": "posted",
-            "engagement_data": {"$exists": True}
-        }).sort("engagement_data.total_engagement", -1).limit(limit).to_list(length=None)
+        async def compute():
+            # Get posts with engagement data
+            posts = await db[POSTS_COLLECTION].find({
+                "user_id": ObjectId(user["_id"]),
+                "status": "posted",
+                "engagement_data": {"$exists": True}
+            }).sort("engagement_data.total_engagement", -1).limit(limit).to_list(length=None)
+        
+            # Process posts data
+            posts_performance = []
+            for post in posts:
+                engagement_data = post.get("engagement_data", {})
+                posts_performance.append({
+                    "post_id": str(post["_id"]),
+                    "caption": post.get("caption", "")[:100] + "..." if len(post.get("caption", "")) > 100 else post.get("caption", ""),
+                    "platform": post.get("platforms", [""])[0],
+                    "posted_date": post.get("posted_at", ""),
+                    "likes": engagement_data.get("likes", 0),
+                    "comments": engagement_data.get("comments", 0),
+                    "shares": engagement_data.get("shares", 0),
+                    "total_engagement": engagement_data.get("total_engagement", 0),
+                    "engagement_rate": engagement_data.get("engagement_rate", 0)
+                })
         
-        # Process posts data
-        posts_performance = []
-        for post in posts:
-            engagement_data = post.get("engagement_data", {})
-            posts_performance.append({
-                "post_id": str(post["_id"]),
-                "caption": post.get("caption", "")[:100] + "..." if len(post.get("caption", "")) > 100 else post.get("caption", ""),
-                "platform": post.get("platforms", [""])[0],
-                "posted_date": post.get("posted_at", ""),
-                "likes": engagement_data.get("likes", 0),
-                "comments": engagement_data.get("comments", 0),
-                "shares": engagement_data.get("shares", 0),
-                "total_engagement": engagement_data.get("total_engagement", 0),
-                "engagement_rate": engagement_data.get("engagement_rate", 0)
-            })
+            return posts_performance
         
-        return posts_performance
+        return await cached_result(db, user["_id"], "posts-performance", [POSTS_SCOPE], [limit], compute)
         
     except HTTPException:
         raise
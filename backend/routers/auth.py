@@ -1,20 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from datetime import timedelta
+from fastapi.security import HTTPAuthorizationCredentials
+from datetime import datetime, timedelta
 from bson import ObjectId
 import logging
 
 from database import get_database, USERS_COLLECTION, OTP_COLLECTION, is_database_connected
-from models import UserCreate, UserLogin, OTPRequest, OTPVerify, Token, User
+from models import UserCreate, UserLogin, PasswordChange, OTPRequest, OTPVerify, Token, User
 from utils import (
-    get_password_hash, verify_password, create_access_token,
-    generate_otp, send_otp_email, send_welcome_email
+    hash_password_async, verify_and_update_password, create_access_token,
+    generate_otp, send_otp_email, send_welcome_email,
+    get_current_user, invalidate_user, revoke_token, revoke_user_tokens
 )
+from utils.dependencies import security
+from utils.jobs import job_queue, PRIORITY_HIGH
+from utils.onboarding import queue_signup_jobs, INITIAL_BATCH_QUEUED
 from config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-security = HTTPBearer()
 
 
 @router.get("/test")
@@ -80,7 +83,7 @@ async def signup(user_data: UserCreate):
             )
         
         # Hash password
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         
         # Create user document
         user_doc = user_data.dict()
@@ -89,70 +92,20 @@ async def signup(user_data: UserCreate):
         user_doc["is_verified"] = True  # Auto-verify for development
         user_doc["is_profile_complete"] = True  # Auto-complete profile
         
+        # Only individual users get an auto-generated first batch
+        if user_data.role == 'individual':
+            user_doc["initial_batch_status"] = INITIAL_BATCH_QUEUED
+        
         # Insert user
         result = await db[USERS_COLLECTION].insert_one(user_doc)
         
-        # Auto-generate 7 posts for the new user (only if AI is configured)
-        post_ids = []
-        try:
-            from utils import ai_generator
-            from database import POSTS_COLLECTION
-            from datetime import datetime, timedelta
-            
-            # Only generate posts for individual users
-            if user_data.role == 'individual':
-                logger.info(f"Auto-generating 7 days of posts for new user: {user_data.email}")
-                
-                # Generate 7 days of posts starting from tomorrow
-                start_date = datetime.now() + timedelta(days=1)
-                generated_posts = await ai_generator.generate_7_day_batch(
-                    interests=user_data.interests,
-                    custom_prompt=user_data.custom_prompt,
-                    platforms=['instagram', 'linkedin', 'facebook', 'twitter'],  # Default platforms
-                    start_date=start_date
-                )
-                
-                # Create post documents
-                posts_to_insert = []
-                for post_data in generated_posts:
-                    post_doc = {
-                        "user_id": result.inserted_id,
-                        "caption": post_data["caption"],
-                        "hashtags": post_data["hashtags"],
-                        "scheduled_date": post_data["scheduled_date"],
-                        "platforms": post_data.get("platforms", ["instagram"]),
-                        "status": "pending_approval",  # New status for approval workflow
-                        "custom_prompt": user_data.custom_prompt,
-                        "image_prompt": post_data["image_prompt"],
-                        "image_url": post_data.get("image_url"),
-                        "created_at": datetime.now().isoformat(),
-                        "updated_at": datetime.now().isoformat(),
-                        "batch_id": f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                        "is_auto_generated": True
-                    }
-                    posts_to_insert.append(post_doc)
-                
-                # Insert posts
-                if posts_to_insert:
-                    posts_result = await db[POSTS_COLLECTION].insert_many(posts_to_insert)
-                    post_ids = [str(post_id) for post_id in posts_result.inserted_ids]
-                    logger.info(f"Generated {len(post_ids)} posts for user {user_data.email}")
-                
-        except Exception as e:
-            logger.error(f"Error auto-generating posts for user {user_data.email}: {e}")
-            # Don't fail signup if post generation fails
-        
-        # Send welcome email
-        try:
-            await send_welcome_email(user_data.email, user_data.full_name)
-        except Exception as e:
-            logger.error(f"Error sending welcome email: {e}")
+        # Welcome email and post generation run in the background
+        queue_signup_jobs(user_doc)
         
         return {
             "message": "User created successfully",
             "user_id": str(result.inserted_id),
-            "auto_generated_posts": len(post_ids),
-            "posts_ready_for_approval": len(post_ids) > 0
+            "initial_batch_status": user_doc.get("initial_batch_status")
         }
         
     except HTTPException:
@@ -195,12 +148,26 @@ async def login(user_credentials: UserLogin):
             )
         
         # Verify password
-        if not verify_password(user_credentials.password, user["hashed_password"]):
+        is_valid, new_hash = await verify_and_update_password(
+            user_credentials.password, user["hashed_password"]
+        )
+        if not is_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
         
+        # Transparently upgrade hashes made with an older cost setting
+        if new_hash:
+            try:
+                await db[USERS_COLLECTION].update_one(
+                    {"_id": user["_id"], "hashed_password": user["hashed_password"]},
+                    {"$set": {"hashed_password": new_hash}}
+                )
+                invalidate_user(user["email"])
+            except Exception as rehash_error:
+                logger.warning(f"Could not rehash password for {user['email']}: {rehash_error}")
+        
         # Check if user is verified (commented out for development)
         # if not user.get("is_verified", False):
         #     raise HTTPException(
@@ -233,6 +200,56 @@ async def login(user_credentials: UserLogin):
         )
 
 
+@router.post("/logout", response_model=dict)
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the current access token."""
+    await revoke_token(credentials.credentials)
+    return {"message": "Logged out successfully"}
+
+
+@router.post("/change-password", response_model=Token)
+async def change_password(
+    password_change: PasswordChange,
+    user: dict = Depends(get_current_user)
+):
+    """Change the current user's password and revoke all of their existing tokens."""
+    try:
+        is_valid, _ = await verify_and_update_password(
+            password_change.current_password, user["hashed_password"]
+        )
+        if not is_valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Current password is incorrect"
+            )
+        
+        db = get_database()
+        hashed_password = await hash_password_async(password_change.new_password)
+        await db[USERS_COLLECTION].update_one(
+            {"_id": user["_id"]},
+            {"$set": {"hashed_password": hashed_password}}
+        )
+        invalidate_user(user["email"])
+        
+        # Sessions opened with the old password end here; the caller gets a fresh token
+        await revoke_user_tokens(user["email"])
+        access_token = create_access_token(
+            data={"sub": user["email"]},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        
+        return {"access_token": access_token, "token_type": "bearer"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in change_password: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @router.post("/request-otp", response_model=dict)
 async def request_otp(otp_request: OTPRequest):
     """Request OTP for email verification."""
@@ -258,11 +275,13 @@ async def request_otp(otp_request: OTPRequest):
         otp = generate_otp()
         
         # Update or create OTP record
+        # expires_at is a real date so the TTL index can remove expired codes
+        now = datetime.utcnow()
         otp_doc = {
             "email": otp_request.email,
             "otp": otp,
-            "created_at": "2024-01-01T00:00:00Z",
-            "expires_at": "2024-01-01T00:00:00Z"
+            "created_at": now,
+            "expires_at": now + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
         }
         
         await db[OTP_COLLECTION].replace_one(
@@ -314,14 +333,20 @@ async def verify_otp(otp_verify: OTPVerify):
                 detail="Invalid OTP"
             )
         
-        # Check if OTP is expired (10 minutes)
-        # In production, you'd check the actual timestamp
+        # The TTL monitor only runs once a minute, so check expiry here too
+        expires_at = otp_record.get("expires_at")
+        if not isinstance(expires_at, datetime) or expires_at <= datetime.utcnow():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="OTP has expired"
+            )
         
         # Update user as verified
         result = await db[USERS_COLLECTION].update_one(
             {"email": otp_verify.email},
             {"$set": {"is_verified": True}}
         )
+        invalidate_user(otp_verify.email)
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -333,7 +358,11 @@ async def verify_otp(otp_verify: OTPVerify):
         user = await db[USERS_COLLECTION].find_one({"email": otp_verify.email})
         
         # Send welcome email
-        await send_welcome_email(otp_verify.email, user["full_name"])
+        job_queue.enqueue(
+            f"welcome_email:{otp_verify.email}",
+            send_welcome_email, otp_verify.email, user["full_name"],
+            priority=PRIORITY_HIGH
+        )
         
         # Delete OTP record
         await db[OTP_COLLECTION].delete_one({"email": otp_verify.email})
@@ -353,62 +382,30 @@ async def verify_otp(otp_verify: OTPVerify):
 
 
 @router.get("/me", response_model=dict)
-async def get_current_user_info(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user_info(user: dict = Depends(get_current_user)):
     """Get current user information."""
     try:
-        from utils import verify_token
-        
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        # Check database connection first
-        if not is_database_connected():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database service unavailable. Please check your MongoDB connection."
-            )
+        # Convert ObjectId to string and prepare user data
+        user_data = {
+            "_id": str(user["_id"]),
+            "full_name": user.get("full_name", ""),
+            "email": user.get("email", ""),
+            "mobile_number": user.get("mobile_number", ""),
+            "profession": user.get("profession", ""),
+            "interests": user.get("interests", []),
+            "custom_prompt": user.get("custom_prompt", ""),
+            "role": user.get("role", "individual"),
+            "company_name": user.get("company_name"),
+            "website": user.get("website"),
+            "industry": user.get("industry"),
+            "is_verified": user.get("is_verified", False),
+            "is_profile_complete": user.get("is_profile_complete", False),
+            "initial_batch_status": user.get("initial_batch_status"),
+            "created_at": user.get("created_at"),
+            "updated_at": user.get("updated_at")
+        }
         
-        try:
-            db = get_database()
-            user = await db[USERS_COLLECTION].find_one({"email": email})
-            
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found"
-                )
-            
-            # Convert ObjectId to string and prepare user data
-            user_data = {
-                "_id": str(user["_id"]),
-                "full_name": user.get("full_name", ""),
-                "email": user.get("email", ""),
-                "mobile_number": user.get("mobile_number", ""),
-                "profession": user.get("profession", ""),
-                "interests": user.get("interests", []),
-                "custom_prompt": user.get("custom_prompt", ""),
-                "role": user.get("role", "individual"),
-                "company_name": user.get("company_name"),
-                "website": user.get("website"),
-                "industry": user.get("industry"),
-                "is_verified": user.get("is_verified", False),
-                "is_profile_complete": user.get("is_profile_complete", False),
-                "created_at": user.get("created_at"),
-                "updated_at": user.get("updated_at")
-            }
-            
-            return user_data
-        except Exception as db_error:
-            logger.error(f"Database error in get_current_user_info: {db_error}")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database service unavailable"
-            )
+        return user_data
         
     except HTTPException:
         raise
@@ -0,0 +1,148 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response, Query
+from typing import Dict, Any
+from bson import ObjectId
+from datetime import datetime
+import asyncio
+import logging
+
+from database import get_database, POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION
+from utils import get_current_user
+from utils.analytics import compute_summary
+from utils.changes import ANALYTICS_SCOPE, POSTS_SCOPE, PLATFORMS_SCOPE
+from utils.etag import check_not_modified
+from utils.pagination import fetch_page
+from utils.result_cache import cached_result
+from routers.posts import POST_VIEWS, batches_pipeline
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+DASHBOARD_PLATFORMS = ["linkedin", "facebook", "twitter", "instagram"]
+
+TOP_POST_PROJECTION = {"caption": 1, "platforms": 1, "posted_at": 1, "engagement_data": 1}
+CONNECTION_PROJECTION = {"_id": 0, "platform": 1, "is_connected": 1, "platform_username": 1}
+
+
+async def _summary(db, user_id: ObjectId, end_date: datetime) -> Dict[str, Any]:
+    """The analytics summary without the growth trend, with lean top posts."""
+    summary, top_posts = await asyncio.gather(
+        compute_summary(db, user_id, end_date),
+        db[POSTS_COLLECTION].find(
+            {"user_id": user_id, "status": "posted"}, TOP_POST_PROJECTION
+        ).sort("engagement_data.total_engagement", -1).limit(5).to_list(length=None)
+    )
+    return {
+        "total_followers": summary["total_followers"],
+        "total_engagement": summary["total_engagement"],
+        "average_engagement_rate": summary["average_engagement_rate"],
+        "platform_breakdown": summary["platform_breakdown"],
+        "top_posts": [
+            {
+                "_id": str(post["_id"]),
+                "caption": (post.get("caption") or "")[:100],
+                "platforms": post.get("platforms", []),
+                "posted_at": post.get("posted_at"),
+                "total_engagement": (post.get("engagement_data") or {}).get("total_engagement", 0),
+                "engagement_rate": (post.get("engagement_data") or {}).get("engagement_rate", 0)
+            }
+            for post in top_posts
+        ]
+    }
+
+
+async def _calendar_page(db, query: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    posts, next_cursor = await fetch_page(
+        db[POSTS_COLLECTION], query, "scheduled_date", None, limit,
+        {field: 1 for field in POST_VIEWS["calendar"]}
+    )
+    return {
+        "posts": [
+            {"_id": str(post["_id"]), **{field: post.get(field) for field in POST_VIEWS["calendar"]}}
+            for post in posts
+        ],
+        "next_cursor": next_cursor
+    }
+
+
+async def _platforms(db, user_id: ObjectId) -> Dict[str, Any]:
+    connections = await db[PLATFORM_CONNECTIONS_COLLECTION].find(
+        {"user_id": user_id}, CONNECTION_PROJECTION
+    ).to_list(length=None)
+    platforms = {platform: {"connected": False, "username": None} for platform in DASHBOARD_PLATFORMS}
+    for connection in connections:
+        if connection.get("is_connected"):
+            platforms[connection["platform"]] = {
+                "connected": True, "username": connection.get("platform_username")
+            }
+    return platforms
+
+
+@router.get("", response_model=Dict[str, Any])
+@router.get("/", response_model=Dict[str, Any])
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user),
+    limit: int = Query(200, ge=1, le=500)
+):
+    """
+    Everything the dashboard renders, in one request.
+
+    Combines the profile, the analytics summary, platform status, batches,
+    and the calendar and pending-approval posts (calendar view). The post
+    lists are first pages of up to ``limit`` posts; page on with
+    ``GET /api/posts/`` and ``/api/posts/pending-approval`` and the returned
+    ``next_cursor``. The queries run concurrently. Supports If-None-Match.
+    """
+    try:
+        db = get_database()
+        user_id = ObjectId(user["_id"])
+        end_date = datetime.utcnow()
+
+        profile = {
+            "_id": str(user["_id"]),
+            "full_name": user.get("full_name", ""),
+            "email": user.get("email", ""),
+            "role": user.get("role", "individual"),
+            "is_profile_complete": user.get("is_profile_complete", False),
+            "initial_batch_status": user.get("initial_batch_status"),
+            "schedule_time": user.get("schedule_time")
+        }
+
+        # The profile is part of the ETag itself: not every change to these
+        # fields (e.g. the initial batch status) touches the user's updated_at
+        not_modified = await check_not_modified(
+            request, response, db, user_id, [ANALYTICS_SCOPE, POSTS_SCOPE, PLATFORMS_SCOPE],
+            end_date.strftime("%Y%m%d%H"), sorted(profile.items())
+        )
+        if not_modified:
+            return not_modified
+
+        summary, platforms, batches, calendar, pending = await asyncio.gather(
+            cached_result(
+                db, user_id, "dashboard-summary", [ANALYTICS_SCOPE, POSTS_SCOPE], [end_date.strftime("%Y%m%d%H")],
+                lambda: _summary(db, user_id, end_date)
+            ),
+            _platforms(db, user_id),
+            db[POSTS_COLLECTION].aggregate(batches_pipeline(user_id)).to_list(length=None),
+            _calendar_page(db, {"user_id": user_id}, limit),
+            _calendar_page(db, {"user_id": user_id, "status": "pending_approval"}, limit)
+        )
+
+        return {
+            "user": profile,
+            "summary": summary,
+            "platforms": platforms,
+            "batches": batches,
+            "calendar": calendar,
+            "pending_approval": pending
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_dashboard: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
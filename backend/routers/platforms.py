@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List
 from bson import ObjectId
@@ -10,9 +10,11 @@ from models import (
     PlatformConnection, PlatformConnectionCreate, PlatformConnectionUpdate,
     PlatformAuthRequest, PlatformAuthResponse
 )
-from utils import verify_token
+from utils import verify_token, get_current_user
 from utils.linkedin_service import linkedin_service
 from utils.token_manager import linkedin_token_manager
+from utils.changes import next_change_seq, PLATFORMS_SCOPE
+from utils.etag import check_not_modified
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/platforms")
@@ -22,33 +24,18 @@ security = HTTPBearer()
 @router.get("/", response_model=List[dict])
 @router.get("", response_model=List[dict])
 async def get_platform_connections(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user)
 ):
-    """Get user's platform connections."""
+    """Get user's platform connections. Supports If-None-Match."""
     try:
         logger.info("Platform connections request received")
-        token = credentials.credentials
-        logger.info(f"Token received, length: {len(token) if token else 0}")
-        
-        email = verify_token(token)
-        logger.info(f"Token verification result: {email}")
-        
-        if not email:
-            logger.error("Invalid token for platform connections")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        not_modified = await check_not_modified(request, response, db, user["_id"], [PLATFORMS_SCOPE])
+        if not_modified:
+            return not_modified
         
         # Get platform connections
         connections = await db[PLATFORM_CONNECTIONS_COLLECTION].find(
@@ -95,7 +82,7 @@ async def get_linkedin_auth_url(
         token = credentials.credentials
         logger.info(f"Token length: {len(token) if token else 0}")
         
-        email = verify_token(token)
+        email = await verify_token(token)
         logger.info(f"Verified email: {email}")
         
         if not email:
@@ -246,6 +233,7 @@ async def linkedin_oauth_callback(
             {"$set": platform_data},
             upsert=True
         )
+        await next_change_seq(db, user["_id"], PLATFORMS_SCOPE)
         
         # Store token in token manager
         await linkedin_token_manager.store_token(
@@ -273,28 +261,12 @@ async def linkedin_oauth_callback(
 
 @router.get("/status", response_model=dict)
 async def get_platform_status(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Get status of all platform connections."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Get all platform connections
         connections = await db[PLATFORM_CONNECTIONS_COLLECTION].find(
             {"user_id": ObjectId(user["_id"])}
@@ -326,28 +298,12 @@ async def get_platform_status(
 @router.delete("/disconnect/{platform}", response_model=dict)
 async def disconnect_platform(
     platform: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Disconnect a social media platform."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Update connection status
         result = await db[PLATFORM_CONNECTIONS_COLLECTION].update_one(
             {
@@ -363,6 +319,7 @@ async def disconnect_platform(
                 }
             }
         )
+        await next_change_seq(db, user["_id"], PLATFORMS_SCOPE)
         
         # Also revoke token in token manager for LinkedIn
         if platform == "linkedin":
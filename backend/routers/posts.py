@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Set
 from bson import ObjectId
+from pymongo import UpdateOne
+import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
 from pydantic import BaseModel
@@ -12,46 +15,188 @@ class ScheduleTimeRequest(BaseModel):
 class BatchApproveRequest(BaseModel):
     batch_id: str
 
+class BatchPostRequest(BaseModel):
+    post_ids: List[str]
+
 from database import get_database, USERS_COLLECTION, POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION
 from models import (
     PostCreate, PostUpdate, Post, PostGenerationRequest, 
     PostApprovalRequest, PostBatch
 )
-from utils import verify_token, ai_generator
-from utils.linkedin_service import linkedin_service
+from utils import ai_generator, get_current_user, invalidate_user
 from utils.token_manager import linkedin_token_manager
+from utils.pagination import fetch_page, keyset_sort, InvalidCursorError
+from utils.export import export_response
+from utils.changes import post_change, record_post_deletions, fetch_post_changes, POSTS_SCOPE
+from utils.etag import check_not_modified
+from utils.publishers import (
+    publish_dispatcher, PublishError, PublishResult, DELIVERY_POSTED, DELIVERY_FAILED,
+    DELIVERY_PENDING, get_delivery, claim_delivery, confirmation_update, status_fields
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-security = HTTPBearer()
+
+# Maximum number of LinkedIn publishes in flight for one batch request
+LINKEDIN_BATCH_CONCURRENCY = 5
+
+# Batch publishes still running, referenced so they finish even if the request goes away
+_batch_publishes: Set[asyncio.Task] = set()
+
+# Fields read for each listing view; "full" reads the whole document
+POST_VIEWS = {
+    "calendar": ["scheduled_date", "status", "platforms", "caption", "batch_id"],
+    "list": [
+        "user_id", "scheduled_date", "status", "platforms", "caption", "hashtags", "image_url",
+        "batch_id", "is_auto_generated", "posted_to", "posted_to_linkedin", "posted_at"
+    ],
+    "full": None
+}
+
+
+def _view_projection(view: str) -> Optional[dict]:
+    if view not in POST_VIEWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid view. Use one of: {', '.join(POST_VIEWS)}"
+        )
+    fields = POST_VIEWS[view]
+    return {field: 1 for field in fields} if fields is not None else None
+
+
+def _serialize_post(post: dict, view: str) -> dict:
+    """Convert a post document to the response shape of the given view."""
+    if view == "full":
+        return {
+            "_id": str(post["_id"]),
+            "user_id": str(post["user_id"]),
+            "caption": post.get("caption", ""),
+            "hashtags": post.get("hashtags", []),
+            "image_url": post.get("image_url"),
+            "scheduled_date": post.get("scheduled_date"),
+            "platforms": post.get("platforms", []),
+            "status": post.get("status", "draft"),
+            "custom_prompt": post.get("custom_prompt"),
+            "image_prompt": post.get("image_prompt"),
+            "batch_id": post.get("batch_id"),
+            "is_auto_generated": post.get("is_auto_generated", False),
+            "created_at": post.get("created_at"),
+            "updated_at": post.get("updated_at"),
+            "posted_at": post.get("posted_at"),
+            "engagement_data": post.get("engagement_data")
+        }
+
+    post_data = {"_id": str(post["_id"])}
+    for field in POST_VIEWS[view]:
+        value = post.get(field)
+        post_data[field] = str(value) if isinstance(value, ObjectId) else value
+    return post_data
+
+
+async def _list_posts_page(db, query: dict, view: str, cursor: Optional[str],
+                           limit: Optional[int], response: Response) -> List[dict]:
+    """
+    Fetch one keyset page of posts; the next page's cursor goes in X-Next-Cursor.
+
+    Without a ``cursor`` or ``limit`` every matching post is returned in the
+    same order, as these listings did before they were paginated.
+    """
+    projection = _view_projection(view)
+    if cursor is None and limit is None:
+        posts = await db[POSTS_COLLECTION].find(query, projection).sort(
+            keyset_sort("scheduled_date")
+        ).to_list(length=None)
+        return [_serialize_post(post, view) for post in posts]
+
+    try:
+        posts, next_cursor = await fetch_page(
+            db[POSTS_COLLECTION], query, "scheduled_date", cursor, limit, projection
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_serialize_post(post, view) for post in posts]
+
+
+async def _publish_linkedin_intent(db, post: dict, connection: dict, access_token: str):
+    """
+    Claim the LinkedIn intent for a post and publish it.
+
+    The confirmation update carries no change stamp: callers add one right
+    before they write it.
+
+    Returns:
+        Tuple of (PublishResult, confirmation update or None if nothing to write)
+    """
+    delivery = get_delivery(post, "linkedin")
+    if delivery.get("state") == DELIVERY_POSTED or post.get("posted_to_linkedin"):
+        # Already delivered - never publish the same content twice
+        return PublishResult(
+            "linkedin", success=True, remote_id=delivery.get("remote_id") or post.get("linkedin_post_id")
+        ), None
+    
+    now = datetime.now()
+    if not await claim_delivery(db, post, "linkedin", now):
+        current = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]}, {"deliveries.linkedin": 1})
+        current_delivery = get_delivery(current or {}, "linkedin")
+        if current_delivery.get("state") == DELIVERY_POSTED:
+            return PublishResult("linkedin", success=True, remote_id=current_delivery.get("remote_id")), None
+        return PublishResult(
+            "linkedin", success=False, error="A LinkedIn publish for this post is already in progress"
+        ), None
+    
+    try:
+        result = await publish_dispatcher.get_publisher("linkedin").publish(post, connection, access_token)
+    except PublishError as e:
+        logger.error(f"Error posting {post['_id']} to LinkedIn: {e}")
+        result = PublishResult(
+            "linkedin", success=False, error=str(e), retryable=e.retryable, outcome_unknown=e.outcome_unknown
+        )
+    
+    now = datetime.now()
+    update, deliveries = confirmation_update(post, {"linkedin": result}, now)
+    
+    if result.success:
+        # The post's other platforms keep their own deliveries: it only counts as
+        # posted once none of them is still pending or due for a retry
+        platforms = list(dict.fromkeys([*post.get("platforms", []), "linkedin"]))
+        update["$set"].update(status_fields(post, deliveries, now, platforms))
+        update["$set"].update({
+            "posted_to_linkedin": True,
+            "linkedin_post_id": result.remote_id
+        })
+    
+    return result, update
+
+
+async def publish_post_to_linkedin(db, post: dict, connection: dict, access_token: str) -> PublishResult:
+    """
+    Publish a post to LinkedIn using the outbox protocol: record the intent,
+    publish, then confirm the LinkedIn delivery on the post.
+    """
+    result, update = await _publish_linkedin_intent(db, post, connection, access_token)
+    if update:
+        async with post_change(db, post["user_id"]) as stamp:
+            update["$set"].update(stamp)
+            await db[POSTS_COLLECTION].update_one({"_id": post["_id"]}, update)
+    return result
 
 
 # 1. All static routes (no path params)
 @router.post("/generate", response_model=List[dict])
 async def generate_posts(
     request: PostGenerationRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Generate 7 days of social media posts using AI."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user data
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Check if profile is complete
         if not user.get("is_profile_complete", False):
             raise HTTPException(
@@ -87,7 +232,10 @@ async def generate_posts(
         
         # Insert posts
         if posts_to_insert:
-            result = await db[POSTS_COLLECTION].insert_many(posts_to_insert)
+            async with post_change(db, user["_id"]) as stamp:
+                result = await db[POSTS_COLLECTION].insert_many(
+                    [{**post_doc, **stamp} for post_doc in posts_to_insert]
+                )
             
             # Get inserted posts
             inserted_posts = await db[POSTS_COLLECTION].find(
@@ -131,29 +279,29 @@ async def generate_posts(
 
 @router.get("/", response_model=List[dict])
 async def get_user_posts(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user),
     status_filter: str = None,
-    platform: str = None
+    platform: str = None,
+    view: str = "full",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
 ):
-    """Get user's posts with optional filtering."""
+    """
+    Get user's posts with optional filtering, ordered by scheduled date.
+
+    Pass a ``limit`` to page through the results: the X-Next-Cursor
+    response header goes back as ``cursor`` to get the next page. Without
+    either, all posts are returned at once. ``view`` selects the fields
+    returned (calendar, list or full). Supports If-None-Match.
+    """
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        not_modified = await check_not_modified(request, response, db, user["_id"], [POSTS_SCOPE])
+        if not_modified:
+            return not_modified
         
         # Build query
         query = {"user_id": ObjectId(user["_id"])}
@@ -164,31 +312,7 @@ async def get_user_posts(
         if platform:
             query["platforms"] = platform
         
-        # Get posts
-        posts = await db[POSTS_COLLECTION].find(query).sort("scheduled_date", 1).to_list(length=None)
-        
-        # Convert ObjectIds to strings and prepare post data
-        post_list = []
-        for post in posts:
-            post_data = {
-                "_id": str(post["_id"]),
-                "user_id": str(post["user_id"]),
-                "caption": post.get("caption", ""),
-                "hashtags": post.get("hashtags", []),
-                "image_url": post.get("image_url"),
-                "scheduled_date": post.get("scheduled_date"),
-                "platforms": post.get("platforms", []),
-                "status": post.get("status", "draft"),
-                "custom_prompt": post.get("custom_prompt"),
-                "image_prompt": post.get("image_prompt"),
-                "created_at": post.get("created_at"),
-                "updated_at": post.get("updated_at"),
-                "posted_at": post.get("posted_at"),
-                "engagement_data": post.get("engagement_data")
-            }
-            post_list.append(post_data)
-        
-        return post_list
+        return await _list_posts_page(db, query, view, cursor, limit, response)
         
     except HTTPException:
         raise
@@ -200,45 +324,110 @@ async def get_user_posts(
         )
 
 
+POST_EXPORT_COLUMNS = [
+    "_id", "scheduled_date", "status", "platforms", "caption", "hashtags", "batch_id",
+    "is_auto_generated", "image_url", "created_at", "posted_at", "engagement_data"
+]
+
+
+@router.get("/export")
+async def export_posts(
+    user: dict = Depends(get_current_user),
+    export_format: str = Query("ndjson", alias="format"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    status_filter: Optional[str] = None,
+    platform: Optional[str] = None
+):
+    """Stream the user's posts as NDJSON or CSV, optionally filtered by scheduled date range, status and platform."""
+    db = get_database()
+    
+    query = {"user_id": ObjectId(user["_id"])}
+    if start_date or end_date:
+        # scheduled_date is stored as an ISO string, which sorts chronologically
+        query["scheduled_date"] = {}
+        if start_date:
+            query["scheduled_date"]["$gte"] = start_date.isoformat()
+        if end_date:
+            query["scheduled_date"]["$lte"] = end_date.isoformat()
+    if status_filter:
+        query["status"] = status_filter
+    if platform:
+        query["platforms"] = platform
+    
+    cursor = db[POSTS_COLLECTION].find(query).sort([("scheduled_date", 1), ("_id", 1)])
+    return export_response(
+        cursor, export_format, f"posts-{datetime.now().strftime('%Y%m%d')}",
+        POST_EXPORT_COLUMNS, lambda post: _serialize_post(post, "full")
+    )
+
+
+@router.get("/changes", response_model=dict)
+async def get_post_changes(
+    user: dict = Depends(get_current_user),
+    since: Optional[str] = None,
+    view: str = "full",
+    limit: Optional[int] = None
+):
+    """
+    Delta sync: posts created, updated or deleted since a sync cursor.
+
+    Call once without ``since`` to get a starting cursor, load the full list,
+    then poll with the returned ``cursor``. Keep polling while ``has_more`` is
+    true; ``retry_after`` is set when the latest changes are still settling and
+    will be sent again after that many seconds. When ``reset`` is true the
+    cursor has expired and the full list must be reloaded.
+    """
+    try:
+        db = get_database()
+        projection = _view_projection(view)
+
+        try:
+            changes = await fetch_post_changes(db, user["_id"], since, limit, projection)
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+        changes["posts"] = [_serialize_post(post, view) for post in changes["posts"]]
+        return changes
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_post_changes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+
+
 @router.post("/approve", response_model=dict)
 async def approve_posts(
     approval_request: PostApprovalRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Approve posts for scheduling."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         if approval_request.approve_all:
             # Approve all user's draft posts
-            result = await db[POSTS_COLLECTION].update_many(
-                {
-                    "user_id": ObjectId(user["_id"]),
-                    "status": "draft"
-                },
-                {
-                    "$set": {
-                        "status": "approved",
-                        "updated_at": "2024-01-01T00:00:00Z"
+            async with post_change(db, user["_id"]) as stamp:
+                result = await db[POSTS_COLLECTION].update_many(
+                    {
+                        "user_id": ObjectId(user["_id"]),
+                        "status": "draft"
+                    },
+                    {
+                        "$set": {
+                            "status": "approved",
+                            "updated_at": "2024-01-01T00:00:00Z",
+                            **stamp
+                        }
                     }
-                }
-            )
+                )
             
             return {
                 "message": f"Approved {result.modified_count} posts",
@@ -248,18 +437,20 @@ async def approve_posts(
             # Approve specific posts
             post_ids = [ObjectId(pid) for pid in approval_request.post_ids]
             
-            result = await db[POSTS_COLLECTION].update_many(
-                {
-                    "_id": {"$in": post_ids},
-                    "user_id": ObjectId(user["_id"])
-                },
-                {
-                    "$set": {
-                        "status": "approved",
-                        "updated_at": "2024-01-01T00:00:00Z"
+            async with post_change(db, user["_id"]) as stamp:
+                result = await db[POSTS_COLLECTION].update_many(
+                    {
+                        "_id": {"$in": post_ids},
+                        "user_id": ObjectId(user["_id"])
+                    },
+                    {
+                        "$set": {
+                            "status": "approved",
+                            "updated_at": "2024-01-01T00:00:00Z",
+                            **stamp
+                        }
                     }
-                }
-            )
+                )
             
             return {
                 "message": f"Approved {result.modified_count} posts",
@@ -279,43 +470,31 @@ async def approve_posts(
 @router.post("/batch-approve", response_model=dict)
 async def batch_approve_posts(
     req: BatchApproveRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Approve all posts in a batch and start automatic posting."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
+        email = user["email"]
         
         db = get_database()
         
-        # Get user data
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Update all posts in the batch to approved status
-        result = await db[POSTS_COLLECTION].update_many(
-            {
-                "user_id": ObjectId(user["_id"]),
-                "batch_id": req.batch_id,
-                "status": "pending_approval"
-            },
-            {
-                "$set": {
-                    "status": "approved",
-                    "approved_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat()
+        async with post_change(db, user["_id"]) as stamp:
+            result = await db[POSTS_COLLECTION].update_many(
+                {
+                    "user_id": ObjectId(user["_id"]),
+                    "batch_id": req.batch_id,
+                    "status": "pending_approval"
+                },
+                {
+                    "$set": {
+                        "status": "approved",
+                        "approved_at": datetime.now().isoformat(),
+                        "updated_at": datetime.now().isoformat(),
+                        **stamp
+                    }
                 }
-            }
-        )
+            )
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -334,19 +513,21 @@ async def batch_approve_posts(
         if approved_posts:
             from utils.scheduler import schedule_user_posts
             
-            # Get user's schedule time or use default
-            schedule_time = user.get("schedule_time", "09:00")
+            # Users without a schedule time get their best posting times
+            schedule_time = user.get("schedule_time")
             
             # Schedule the posts
             await schedule_user_posts(str(user["_id"]), schedule_time)
             
-            logger.info(f"Scheduled {len(approved_posts)} posts for user {user['email']} at {schedule_time}")
+            logger.info(
+                f"Scheduled {len(approved_posts)} posts for user {user['email']} at {schedule_time or 'best times'}"
+            )
         
         return {
             "message": f"Successfully approved {result.modified_count} posts",
             "approved_count": result.modified_count,
             "batch_id": req.batch_id,
-            "scheduled_time": user.get("schedule_time", "09:00")
+            "scheduled_time": user.get("schedule_time")
         }
         
     except Exception as e:
@@ -359,28 +540,12 @@ async def batch_approve_posts(
 
 @router.post("/regenerate-next-batch", response_model=dict)
 async def regenerate_next_batch(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Generate next 7 days of posts after current batch is approved."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user data
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Find the latest approved batch to determine start date
         latest_post = await db[POSTS_COLLECTION].find_one(
             {
@@ -432,7 +597,10 @@ async def regenerate_next_batch(
         
         # Insert posts
         if posts_to_insert:
-            result = await db[POSTS_COLLECTION].insert_many(posts_to_insert)
+            async with post_change(db, user["_id"]) as stamp:
+                result = await db[POSTS_COLLECTION].insert_many(
+                    [{**post_doc, **stamp} for post_doc in posts_to_insert]
+                )
             post_ids = [str(post_id) for post_id in result.inserted_ids]
             
             # Send notification to user about new batch
@@ -465,62 +633,24 @@ async def regenerate_next_batch(
 
 @router.get("/pending-approval", response_model=List[dict])
 async def get_pending_approval_posts(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    response: Response,
+    user: dict = Depends(get_current_user),
+    view: str = "list",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
 ):
-    """Get all posts pending approval for the current user."""
+    """Get posts pending approval for the current user, paginated like ``GET /``."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user data
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            logger.error(f"User not found for email: {email}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Get posts pending approval
-        try:
-            posts = await db[POSTS_COLLECTION].find({
-                "user_id": user["_id"],
-                "status": "pending_approval"
-            }).sort("scheduled_date", 1).to_list(length=None)
-        except Exception as e:
-            logger.error(f"Error querying posts for pending approval: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Query error: {e}"
-            )
-        
-        # Convert ObjectIds to strings
-        post_list = []
-        for post in posts:
-            post_data = {
-                "_id": str(post["_id"]),
-                "user_id": str(post["user_id"]),
-                "caption": post.get("caption", ""),
-                "hashtags": post.get("hashtags", []),
-                "image_url": post.get("image_url"),
-                "scheduled_date": post.get("scheduled_date"),
-                "platforms": post.get("platforms", []),
-                "status": post.get("status", "pending_approval"),
-                "custom_prompt": post.get("custom_prompt"),
-                "batch_id": post.get("batch_id"),
-                "is_auto_generated": post.get("is_auto_generated", False)
-            }
-            post_list.append(post_data)
-        
-        return post_list
+        return await _list_posts_page(
+            db,
+            {"user_id": user["_id"], "status": "pending_approval"},
+            view, cursor, limit, response
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting pending approval posts: {e}", exc_info=True)
         raise HTTPException(
@@ -529,56 +659,50 @@ async def get_pending_approval_posts(
         )
 
 
+def batches_pipeline(user_id) -> List[dict]:
+    """Aggregation of a user's posts into batches with per-status counts, newest first."""
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": "$batch_id",
+            "batch_id": {"$first": "$batch_id"},
+            "total_posts": {"$sum": 1},
+            "pending_count": {
+                "$sum": {"$cond": [{"$eq": ["$status", "pending_approval"]}, 1, 0]}
+            },
+            "approved_count": {
+                "$sum": {"$cond": [{"$eq": ["$status", "approved"]}, 1, 0]}
+            },
+            "scheduled_count": {
+                "$sum": {"$cond": [{"$eq": ["$status", "scheduled"]}, 1, 0]}
+            },
+            "posted_count": {
+                "$sum": {"$cond": [{"$eq": ["$status", "posted"]}, 1, 0]}
+            },
+            "created_at": {"$first": "$created_at"},
+            "is_auto_generated": {"$first": "$is_auto_generated"}
+        }},
+        {"$sort": {"created_at": -1}}
+    ]
+
+
 @router.get("/batches", response_model=List[dict])
 async def get_user_batches(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user)
 ):
-    """Get all batches for the current user."""
+    """Get all batches for the current user. Supports If-None-Match."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user data
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            logger.error(f"User not found for email: {email}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        not_modified = await check_not_modified(request, response, db, user["_id"], [POSTS_SCOPE])
+        if not_modified:
+            return not_modified
         
         # Get all batches with their status
         try:
-            pipeline = [
-                {"$match": {"user_id": user["_id"]}},
-                {"$group": {
-                    "_id": "$batch_id",
-                    "batch_id": {"$first": "$batch_id"},
-                    "total_posts": {"$sum": 1},
-                    "pending_count": {
-                        "$sum": {"$cond": [{"$eq": ["$status", "pending_approval"]}, 1, 0]}
-                    },
-                    "approved_count": {
-                        "$sum": {"$cond": [{"$eq": ["$status", "approved"]}, 1, 0]}
-                    },
-                    "scheduled_count": {
-                        "$sum": {"$cond": [{"$eq": ["$status", "scheduled"]}, 1, 0]}
-                    },
-                    "posted_count": {
-                        "$sum": {"$cond": [{"$eq": ["$status", "posted"]}, 1, 0]}
-                    },
-                    "created_at": {"$first": "$created_at"},
-                    "is_auto_generated": {"$first": "$is_auto_generated"}
-                }},
-                {"$sort": {"created_at": -1}}
-            ]
+            pipeline = batches_pipeline(user["_id"])
             batches = await db[POSTS_COLLECTION].aggregate(pipeline).to_list(length=None)
         except Exception as e:
             logger.error(f"Error in aggregation pipeline for batches: {e}")
@@ -600,17 +724,11 @@ async def get_user_batches(
 @router.put("/schedule-time", response_model=dict)
 async def update_schedule_time(
     req: ScheduleTimeRequest,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Update the default posting time for the user."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
+        email = user["email"]
         
         db = get_database()
         
@@ -639,6 +757,7 @@ async def update_schedule_time(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        invalidate_user(email)
         
         return {
             "message": "Schedule time updated successfully",
@@ -653,31 +772,22 @@ async def update_schedule_time(
         ) 
 
 
-@router.post("/batch-post-to-linkedin", response_model=dict)
+@router.post("/batch-post-to-linkedin")
 async def batch_post_to_linkedin(
-    post_ids: List[str],
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    req: BatchPostRequest,
+    request: Request,
+    stream: bool = False,
+    user: dict = Depends(get_current_user)
 ):
-    """Post multiple posts to LinkedIn."""
+    """
+    Post multiple posts to LinkedIn concurrently.
+    
+    With ``?stream=true`` or ``Accept: application/x-ndjson`` each post's result is
+    streamed as an NDJSON line as soon as it finishes, followed by a summary line.
+    """
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Check if LinkedIn is connected
         linkedin_connection = await db[PLATFORM_CONNECTIONS_COLLECTION].find_one({
             "user_id": ObjectId(user["_id"]),
@@ -701,7 +811,7 @@ async def batch_post_to_linkedin(
         
         # Get posts
         try:
-            post_object_ids = [ObjectId(pid) for pid in post_ids]
+            post_object_ids = [ObjectId(pid) for pid in req.post_ids]
             posts = await db[POSTS_COLLECTION].find({
                 "_id": {"$in": post_object_ids},
                 "user_id": ObjectId(user["_id"])
@@ -712,57 +822,36 @@ async def batch_post_to_linkedin(
                 detail="Invalid post IDs"
             )
         
-        if len(posts) != len(post_ids):
+        if len(posts) != len(req.post_ids):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Some posts not found"
             )
         
-        # Post each post to LinkedIn
-        results = []
-        for post in posts:
-            caption = post.get("caption", "")
-            hashtags = post.get("hashtags", [])
-            image_url = post.get("image_url")
+        results = _batch_post_results(_start_batch_publish(db, posts, linkedin_connection, access_token))
+        
+        if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+            async def ndjson_lines():
+                success_count = 0
+                async for row in results:
+                    success_count += 1 if row["success"] else 0
+                    yield json.dumps({"type": "result", **row}) + "\n"
+                yield json.dumps({
+                    "type": "summary",
+                    "message": f"Posted {success_count} out of {len(posts)} posts to LinkedIn",
+                    "total_posts": len(posts),
+                    "successful_posts": success_count
+                }) + "\n"
             
-            content = caption
-            if hashtags:
-                content += "\n\n" + " ".join(hashtags)
-            
-            result = await linkedin_service.create_post(access_token, content, image_url)
-            
-            if result and result.get("success"):
-                # Update post status
-                await db[POSTS_COLLECTION].update_one(
-                    {"_id": post["_id"]},
-                    {
-                        "$set": {
-                            "status": "posted",
-                            "posted_to_linkedin": True,
-                            "linkedin_post_id": result.get("post_id"),
-                            "updated_at": "2024-01-01T00:00:00Z"
-                        }
-                    }
-                )
-                
-                results.append({
-                    "post_id": str(post["_id"]),
-                    "success": True,
-                    "linkedin_post_id": result.get("post_id")
-                })
-            else:
-                results.append({
-                    "post_id": str(post["_id"]),
-                    "success": False,
-                    "error": result.get("message", "Failed to post") if result else "Failed to post"
-                })
-        
-        success_count = sum(1 for r in results if r["success"])
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+        
+        result_list = [row async for row in results]
+        success_count = sum(1 for r in result_list if r["success"])
         
         return {
             "success": True,
             "message": f"Posted {success_count} out of {len(posts)} posts to LinkedIn",
-            "results": results,
+            "results": result_list,
             "total_posts": len(posts),
             "successful_posts": success_count
         }
@@ -777,32 +866,80 @@ async def batch_post_to_linkedin(
         ) 
 
 
+def _start_batch_publish(db, posts: List[dict], connection: dict, access_token: str) -> asyncio.Queue:
+    """
+    Publish posts to LinkedIn with bounded concurrency in a task detached from the request.
+    
+    Each post's result row is put on the returned queue as soon as it finishes, then None
+    once the confirmations for every post have been written in a single unordered
+    bulk_write, which carries one change stamp taken right before it. The task does not depend on anyone reading the queue, so a client that
+    disconnects mid-stream does not leave its posts in ``publishing``.
+    """
+    rows: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(LINKEDIN_BATCH_CONCURRENCY)
+    
+    async def publish_one(post):
+        async with semaphore:
+            result, update = await _publish_linkedin_intent(db, post, connection, access_token)
+        if result.success:
+            rows.put_nowait({
+                "post_id": str(post["_id"]),
+                "success": True,
+                "linkedin_post_id": result.remote_id
+            })
+        else:
+            rows.put_nowait({
+                "post_id": str(post["_id"]),
+                "success": False,
+                "error": result.error or "Failed to post"
+            })
+        return post, update
+    
+    async def publish_all():
+        try:
+            outcomes = await asyncio.gather(*[publish_one(post) for post in posts], return_exceptions=True)
+            confirmed = []
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    logger.error(f"Error in batch LinkedIn publish: {outcome}")
+                elif outcome[1]:
+                    confirmed.append(outcome)
+            if confirmed:
+                # Stamp the batch only now: a sequence taken when each publish finished
+                # would sit uncommitted until the slowest one returned
+                async with post_change(db, confirmed[0][0]["user_id"]) as stamp:
+                    await db[POSTS_COLLECTION].bulk_write([
+                        UpdateOne({"_id": post["_id"]}, {**update, "$set": {**update["$set"], **stamp}})
+                        for post, update in confirmed
+                    ], ordered=False)
+        finally:
+            rows.put_nowait(None)
+    
+    task = asyncio.create_task(publish_all())
+    _batch_publishes.add(task)
+    task.add_done_callback(_batch_publishes.discard)
+    return rows
+
+
+async def _batch_post_results(rows: asyncio.Queue):
+    """Yield the result rows of a batch publish until it has finished."""
+    while True:
+        row = await rows.get()
+        if row is None:
+            return
+        yield row
+
+
 # 2. All dynamic routes (with path params) at the end
 @router.get("/{post_id}", response_model=dict)
 async def get_post(
     post_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Get a specific post by ID."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Get post
         post = await db[POSTS_COLLECTION].find_one({
             "_id": ObjectId(post_id),
@@ -849,28 +986,12 @@ async def get_post(
 async def update_post(
     post_id: str,
     post_update: PostUpdate,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Update a specific post."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Remove None values from update data
         update_data = {k: v for k, v in post_update.dict().items() if v is not None}
         
@@ -884,13 +1005,14 @@ async def update_post(
         update_data["updated_at"] = "2024-01-01T00:00:00Z"
         
         # Update post
-        result = await db[POSTS_COLLECTION].update_one(
-            {
-                "_id": ObjectId(post_id),
-                "user_id": ObjectId(user["_id"])
-            },
-            {"$set": update_data}
-        )
+        async with post_change(db, user["_id"]) as stamp:
+            result = await db[POSTS_COLLECTION].update_one(
+                {
+                    "_id": ObjectId(post_id),
+                    "user_id": ObjectId(user["_id"])
+                },
+                {"$set": {**update_data, **stamp}}
+            )
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -934,34 +1056,14 @@ async def update_post(
 @router.delete("/{post_id}", response_model=dict)
 async def delete_post(
     post_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Delete a specific post."""
     try:
         logger.info(f"Delete request for post_id: {post_id}")
         
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            logger.error(f"Invalid token for delete request")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        logger.info(f"Token verified for email: {email}")
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            logger.error(f"User not found for email: {email}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         logger.info(f"User found: {user['_id']}")
         
         # Check if post exists first
@@ -992,6 +1094,8 @@ async def delete_post(
                 detail="Post not found"
             )
         
+        await record_post_deletions(db, user["_id"], [existing_post["_id"]])
+        
         logger.info(f"Post deleted successfully: {post_id}")
         return {"message": "Post deleted successfully"}
         
@@ -1008,28 +1112,12 @@ async def delete_post(
 @router.post("/{post_id}/regenerate", response_model=dict)
 async def regenerate_post(
     post_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Regenerate content for a specific post using AI."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Get existing post
         post = await db[POSTS_COLLECTION].find_one({
             "_id": ObjectId(post_id),
@@ -1059,10 +1147,11 @@ async def regenerate_post(
             "updated_at": "2024-01-01T00:00:00Z"
         }
         
-        result = await db[POSTS_COLLECTION].update_one(
-            {"_id": ObjectId(post_id)},
-            {"$set": update_data}
-        )
+        async with post_change(db, post["user_id"]) as stamp:
+            result = await db[POSTS_COLLECTION].update_one(
+                {"_id": ObjectId(post_id)},
+                {"$set": {**update_data, **stamp}}
+            )
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -1106,28 +1195,12 @@ async def regenerate_post(
 @router.post("/{post_id}/upload-image", response_model=dict)
 async def upload_post_image(
     post_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Upload a custom image for a specific post."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Get existing post
         post = await db[POSTS_COLLECTION].find_one({
             "_id": ObjectId(post_id),
@@ -1164,28 +1237,12 @@ async def upload_post_image(
 @router.post("/{post_id}/post-to-linkedin", response_model=dict)
 async def post_to_linkedin(
     post_id: str,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Post a specific post to LinkedIn."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
         db = get_database()
         
-        # Get user
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Get the post
         try:
             post = await db[POSTS_COLLECTION].find_one({
@@ -1217,16 +1274,6 @@ async def post_to_linkedin(
                 detail="LinkedIn account not connected. Please connect your LinkedIn account first."
             )
         
-        # Prepare content for LinkedIn
-        caption = post.get("caption", "")
-        hashtags = post.get("hashtags", [])
-        image_url = post.get("image_url")
-        
-        # Combine caption and hashtags
-        content = caption
-        if hashtags:
-            content += "\n\n" + " ".join(hashtags)
-        
         # Get valid access token using token manager
         access_token = await linkedin_token_manager.get_valid_token(ObjectId(user["_id"]))
         if not access_token:
@@ -1236,31 +1283,18 @@ async def post_to_linkedin(
             )
         
         # Create post on LinkedIn
-        result = await linkedin_service.create_post(access_token, content, image_url)
+        result = await publish_post_to_linkedin(db, post, linkedin_connection, access_token)
         
-        if result and result.get("success"):
-            # Update post status to indicate it was posted
-            await db[POSTS_COLLECTION].update_one(
-                {"_id": ObjectId(post_id)},
-                {
-                    "$set": {
-                        "status": "posted",
-                        "posted_to_linkedin": True,
-                        "linkedin_post_id": result.get("post_id"),
-                        "updated_at": "2024-01-01T00:00:00Z"
-                    }
-                }
-            )
-            
+        if result.success:
             return {
                 "success": True,
                 "message": "Post successfully shared on LinkedIn",
-                "linkedin_post_id": result.get("post_id")
+                "linkedin_post_id": result.remote_id
             }
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result.get("message", "Failed to post to LinkedIn") if result else "Failed to post to LinkedIn"
+                detail=result.error or "Failed to post to LinkedIn"
             )
         
     except HTTPException:
@@ -1270,4 +1304,67 @@ async def post_to_linkedin(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.post("/{post_id}/retry", response_model=dict)
+async def retry_failed_platforms(
+    post_id: str,
+    user: dict = Depends(get_current_user)
+):
+    """Re-queue only the platforms that failed for a post."""
+    try:
+        db = get_database()
+        
+        # Get the post
+        post = await db[POSTS_COLLECTION].find_one({
+            "_id": ObjectId(post_id),
+            "user_id": ObjectId(user["_id"])
+        })
+        
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+        
+        failed_platforms = [
+            platform for platform in post.get("platforms", [])
+            if get_delivery(post, platform).get("state") == DELIVERY_FAILED
+        ]
+        
+        if not failed_platforms:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No failed platforms to retry"
+            )
+        
+        # Reset failed deliveries to pending; delivered platforms are left untouched
+        now = datetime.now().isoformat()
+        update = {
+            "status": "scheduled",
+            "next_attempt_at": None,
+            "updated_at": now
+        }
+        for platform in failed_platforms:
+            update[f"deliveries.{platform}.state"] = DELIVERY_PENDING
+            update[f"deliveries.{platform}.next_attempt_at"] = None
+            update[f"deliveries.{platform}.updated_at"] = now
+        
+        async with post_change(db, post["user_id"]) as stamp:
+            await db[POSTS_COLLECTION].update_one({"_id": post["_id"]}, {"$set": {**update, **stamp}})
+        
+        return {
+            "message": f"Retrying {len(failed_platforms)} platform(s)",
+            "post_id": post_id,
+            "retry_platforms": failed_platforms
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in retry_failed_platforms: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
@@ -1,38 +1,19 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
 import logging
 
 from database import get_database, USERS_COLLECTION
 from models import UserUpdate, User
-from utils import verify_token
+from utils import get_current_user, invalidate_user
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-security = HTTPBearer()
 
 
 @router.get("/profile", response_model=dict)
-async def get_user_profile(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_user_profile(user: dict = Depends(get_current_user)):
     """Get current user's profile."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
-        
-        db = get_database()
-        user = await db[USERS_COLLECTION].find_one({"email": email})
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Convert ObjectId to string and prepare user data
         user_data = {
             "_id": str(user["_id"]),
@@ -67,17 +48,11 @@ async def get_user_profile(credentials: HTTPAuthorizationCredentials = Depends(s
 @router.put("/profile", response_model=User)
 async def update_user_profile(
     user_update: UserUpdate,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Update current user's profile."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
+        email = user["email"]
         
         db = get_database()
         
@@ -98,6 +73,7 @@ async def update_user_profile(
             {"email": email},
             {"$set": update_data}
         )
+        invalidate_user(email)
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -124,17 +100,11 @@ async def update_user_profile(
 @router.post("/complete-profile", response_model=dict)
 async def complete_user_profile(
     user_update: UserUpdate,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    user: dict = Depends(get_current_user)
 ):
     """Complete user profile setup."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
+        email = user["email"]
         
         db = get_database()
         
@@ -164,6 +134,7 @@ async def complete_user_profile(
             {"email": email},
             {"$set": update_data}
         )
+        invalidate_user(email)
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -216,21 +187,16 @@ async def get_available_interests():
 
 
 @router.delete("/account", response_model=dict)
-async def delete_user_account(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def delete_user_account(user: dict = Depends(get_current_user)):
     """Delete user account."""
     try:
-        token = credentials.credentials
-        email = verify_token(token)
-        if not email:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token"
-            )
+        email = user["email"]
         
         db = get_database()
         
         # Delete user
         result = await db[USERS_COLLECTION].delete_one({"email": email})
+        invalidate_user(email)
         
         if result.deleted_count == 0:
             raise HTTPException(
@@ -0,0 +1,24 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+from utils import get_current_user
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["socialflow_test"]
+
+
+@pytest.fixture
+def make_client(db, monkeypatch):
+    """HTTP client for routers served from the test database to ``user``."""
+    def make(user, *routers):
+        app = FastAPI()
+        for module, prefix in routers:
+            monkeypatch.setattr(module, "get_database", lambda: db)
+            app.include_router(module.router, prefix=prefix)
+        app.dependency_overrides[get_current_user] = lambda: user
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    return make
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+from starlette.requests import Request
+
+from database import ANALYTICS_COLLECTION, ANALYTICS_DAILY_COLLECTION
+from indexes import analytics_indexes
+from routers import analytics as analytics_router
+from routers.analytics import _json_array
+from utils import analytics_ingest, analytics_store
+
+
+async def _rows(*rows):
+    for row in rows:
+        yield row
+
+
+def _row(day, likes):
+    return {"platform": "twitter", "date": f"2026-03-{day:02d}T00:00:00", "likes_count": likes, "followers_count": 10}
+
+
+@pytest.fixture
+def plain_layout(monkeypatch):
+    monkeypatch.setattr(analytics_ingest.settings, "ANALYTICS_TIMESERIES", False)
+
+
+@pytest.fixture
+def timeseries_layout(monkeypatch):
+    monkeypatch.setattr(analytics_ingest.settings, "ANALYTICS_TIMESERIES", True)
+    monkeypatch.setattr(analytics_store.settings, "ANALYTICS_TIMESERIES", True)
+
+
+async def test_resent_rows_replace_stored_ones(db, plain_layout):
+    user_id = ObjectId()
+    await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 5), _row(2, 7)))
+
+    result = await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 6), _row(3, 1)))
+
+    assert (result.inserted, result.replaced, result.errors) == (1, 1, [])
+    stored = await db[ANALYTICS_COLLECTION].find({"user_id": user_id}).sort("date", 1).to_list(length=None)
+    assert [row["likes_count"] for row in stored] == [6, 7, 1]
+    rollup = await db[ANALYTICS_DAILY_COLLECTION].find_one({"user_id": user_id, "day": datetime(2026, 3, 1)})
+    assert rollup["likes"] == 6
+
+
+async def test_failed_replacement_keeps_stored_row(db, plain_layout, monkeypatch):
+    user_id = ObjectId()
+    await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 5)))
+    collection = db[ANALYTICS_COLLECTION]
+
+    async def failing_bulk_write(operations, ordered=True):
+        raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "disk full"}]})
+
+    monkeypatch.setattr(type(collection), "bulk_write", lambda self, *args, **kwargs: failing_bulk_write(*args, **kwargs))
+    result = await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 9)))
+
+    assert result.errors == [{"row": 0, "error": "disk full"}]
+    stored = await db[ANALYTICS_COLLECTION].find({"user_id": user_id}).to_list(length=None)
+    assert [row["likes_count"] for row in stored] == [5]
+
+
+async def test_timeseries_replacement_needs_mongodb_7(db, timeseries_layout, monkeypatch):
+    monkeypatch.setattr(analytics_store, "_server_version", (6, 0))
+    user_id = ObjectId()
+    await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 5)))
+
+    result = await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 9), _row(2, 3)))
+
+    assert result.inserted == 1
+    assert [error["row"] for error in result.errors] == [0]
+    assert "MongoDB 7.0" in result.errors[0]["error"]
+    stored = await db[ANALYTICS_COLLECTION].find().sort("date", 1).to_list(length=None)
+    assert [row["likes_count"] for row in stored] == [5, 3]
+
+
+async def test_timeseries_replacement_on_mongodb_7(db, timeseries_layout, monkeypatch):
+    monkeypatch.setattr(analytics_store, "_server_version", (7, 0))
+    user_id = ObjectId()
+    await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 5)))
+
+    result = await analytics_ingest.ingest_rows(db, user_id, _rows(_row(1, 9)))
+
+    assert (result.inserted, result.replaced) == (0, 1)
+    stored = await db[ANALYTICS_COLLECTION].find().to_list(length=None)
+    assert [row["likes_count"] for row in stored] == [9]
+    assert stored[0]["meta"] == {"user_id": user_id, "platform": "twitter"}
+
+
+async def _ingest_concurrently(db, monkeypatch, user_id, *row_sets):
+    read_rows = analytics_ingest._existing_rows
+
+    async def slow_read(*args):
+        rows = await read_rows(*args)
+        # Let the other ingest run between this one's read and its write
+        await asyncio.sleep(0.01)
+        return rows
+
+    monkeypatch.setattr(analytics_ingest, "_existing_rows", slow_read)
+    return await asyncio.gather(*[analytics_ingest.ingest_rows(db, user_id, _rows(*rows)) for rows in row_sets])
+
+
+async def test_concurrent_ingests_of_a_key_keep_one_row(db, plain_layout, monkeypatch):
+    await db[ANALYTICS_COLLECTION].create_indexes(analytics_indexes(timeseries=False))
+    user_id = ObjectId()
+
+    results = await _ingest_concurrently(db, monkeypatch, user_id, [_row(1, 5)], [_row(1, 9)])
+
+    assert sorted((result.inserted, result.replaced) for result in results) == [(0, 1), (1, 0)]
+    stored = await db[ANALYTICS_COLLECTION].find({"user_id": user_id}).to_list(length=None)
+    assert len(stored) == 1
+    rollup = await db[ANALYTICS_DAILY_COLLECTION].find_one({"user_id": user_id, "day": datetime(2026, 3, 1)})
+    assert (rollup["rows"], rollup["likes"]) == (1, stored[0]["likes_count"])
+
+
+async def test_concurrent_timeseries_ingests_of_a_key_keep_one_row(db, timeseries_layout, monkeypatch):
+    monkeypatch.setattr(analytics_store, "_server_version", (7, 0))
+    user_id = ObjectId()
+
+    await _ingest_concurrently(db, monkeypatch, user_id, [_row(1, 5)], [_row(1, 9)])
+
+    stored = await db[ANALYTICS_COLLECTION].find().to_list(length=None)
+    assert len(stored) == 1
+    rollup = await db[ANALYTICS_DAILY_COLLECTION].find_one({"user_id": user_id, "day": datetime(2026, 3, 1)})
+    assert (rollup["rows"], rollup["likes"]) == (1, stored[0]["likes_count"])
+
+
+async def test_tracking_a_stored_key_replaces_the_row(db, plain_layout, make_client):
+    user = {"_id": ObjectId(), "email": "track@example.com"}
+    async with make_client(user, (analytics_router, "/api/analytics")) as client:
+        first = await client.post("/api/analytics/track", json=_row(1, 5))
+        second = await client.post("/api/analytics/track", json=_row(1, 9))
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["analytics_id"] == second.json()["analytics_id"]
+    stored = await db[ANALYTICS_COLLECTION].find({"user_id": user["_id"]}).to_list(length=None)
+    assert [row["likes_count"] for row in stored] == [9]
+
+
+def _request(*chunks):
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+
+async def test_json_array_is_parsed_as_it_streams_in():
+    request = _request(b' [{"platform": "twitter", "likes', b'_count": 1.5}, {"plat', b'form": "facebook"}]')
+
+    rows = [row async for row in _json_array(request)]
+
+    assert rows == [{"platform": "twitter", "likes_count": 1.5}, {"platform": "facebook"}]
+
+
+@pytest.mark.parametrize("body", [b'{"platform": "twitter"}', b'[{"platform": '])
+async def test_malformed_json_array_is_rejected(body):
+    with pytest.raises(HTTPException) as raised:
+        [row async for row in _json_array(_request(body))]
+    assert raised.value.status_code == 400
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from jose import jwt
+
+from utils import auth
+from utils.auth import create_access_token, revoke_token, revoke_user_tokens, verify_token
+
+
+def _other_worker():
+    """Forget what this worker cached, as a worker that did not see the revocation would."""
+    auth._revocation_cache.clear()
+    auth.token_claims_cache.clear()
+
+
+async def test_logout_revokes_the_token_on_every_worker(db, monkeypatch):
+    monkeypatch.setattr(auth, "get_database", lambda: db)
+    token = create_access_token({"sub": "logout@example.com"})
+    other = create_access_token({"sub": "logout@example.com"})
+    assert await verify_token(token) == "logout@example.com"
+
+    await revoke_token(token)
+    _other_worker()
+
+    assert await verify_token(token) is None
+    assert await verify_token(other) == "logout@example.com"
+    stored = await db[auth.REVOKED_TOKENS_COLLECTION].find_one({})
+    assert stored["expires_at"] == datetime.utcfromtimestamp(jwt.get_unverified_claims(token)["exp"])
+
+
+async def test_password_change_revokes_earlier_tokens_on_every_worker(db, monkeypatch):
+    monkeypatch.setattr(auth, "get_database", lambda: db)
+    before = create_access_token({"sub": "password@example.com"})
+
+    await revoke_user_tokens("password@example.com")
+    after = create_access_token({"sub": "password@example.com"})
+    _other_worker()
+
+    assert await verify_token(before) is None
+    assert await verify_token(after) == "password@example.com"
+
+
+async def test_revocation_reaches_a_worker_once_its_cached_answer_expires(db, monkeypatch):
+    monkeypatch.setattr(auth, "get_database", lambda: db)
+    token = create_access_token({"sub": "cached@example.com"})
+    assert await verify_token(token) == "cached@example.com"
+
+    # Another worker revokes the token; this one still serves its cached answer
+    key = auth._token_key(token, jwt.get_unverified_claims(token))
+    await db[auth.REVOKED_TOKENS_COLLECTION].insert_one({"_id": key})
+    assert await verify_token(token) == "cached@example.com"
+
+    auth._revocation_cache.clear()
+    assert await verify_token(token) is None
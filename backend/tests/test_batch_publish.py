@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from database import POSTS_COLLECTION
+from routers import posts as posts_router
+from utils.changes import next_change_seq
+from utils.publishers import PublishResult, publish_dispatcher
+
+
+async def _insert_posts(db, count):
+    user_id = ObjectId()
+    posts = [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "caption": f"Post {i}",
+            "platforms": ["linkedin"],
+            "status": "approved",
+            "scheduled_date": datetime.now().isoformat()
+        }
+        for i in range(count)
+    ]
+    await db[POSTS_COLLECTION].insert_many(posts)
+    return posts
+
+
+async def test_confirmations_are_written_after_client_disconnects(db, monkeypatch):
+    release = asyncio.Event()
+
+    async def publish(post, connection, access_token):
+        if post["caption"] != "Post 0":
+            await release.wait()
+        return PublishResult("linkedin", success=True, remote_id=f"urn:li:share:{post['_id']}")
+
+    monkeypatch.setattr(publish_dispatcher.get_publisher("linkedin"), "publish", publish)
+    posts = await _insert_posts(db, 3)
+
+    results = posts_router._batch_post_results(posts_router._start_batch_publish(db, posts, {}, "token"))
+    first = await results.__anext__()
+    assert first["success"]
+
+    # The client goes away after the first line
+    await results.aclose()
+    release.set()
+    await asyncio.gather(*posts_router._batch_publishes)
+
+    stored = await db[POSTS_COLLECTION].find({"_id": {"$in": [p["_id"] for p in posts]}}).to_list(length=None)
+    assert [post["deliveries"]["linkedin"]["state"] for post in stored] == ["posted"] * 3
+    assert all(post["status"] == "posted" and post["pending_intents"] == [] for post in stored)
+
+
+async def test_results_end_once_confirmations_are_written(db, monkeypatch):
+    async def publish(post, connection, access_token):
+        return PublishResult("linkedin", success=False, error="rejected", retryable=False)
+
+    monkeypatch.setattr(publish_dispatcher.get_publisher("linkedin"), "publish", publish)
+    posts = await _insert_posts(db, 2)
+
+    rows = [row async for row in posts_router._batch_post_results(
+        posts_router._start_batch_publish(db, posts, {}, "token")
+    )]
+
+    assert [row["success"] for row in rows] == [False, False]
+    stored = await db[POSTS_COLLECTION].find({"_id": {"$in": [p["_id"] for p in posts]}}).to_list(length=None)
+    assert [post["deliveries"]["linkedin"]["state"] for post in stored] == ["failed"] * 2
+
+
+async def test_batch_is_stamped_when_its_confirmations_are_written(db, monkeypatch):
+    release = asyncio.Event()
+
+    async def publish(post, connection, access_token):
+        if post["caption"] != "Post 0":
+            await release.wait()
+        return PublishResult("linkedin", success=True, remote_id=f"urn:li:share:{post['_id']}")
+
+    monkeypatch.setattr(publish_dispatcher.get_publisher("linkedin"), "publish", publish)
+    posts = await _insert_posts(db, 3)
+
+    results = posts_router._batch_post_results(posts_router._start_batch_publish(db, posts, {}, "token"))
+    assert (await results.__anext__())["success"]
+
+    # Another write for the user lands while the slow publishes are still running
+    other_seq = await next_change_seq(db, posts[0]["user_id"])
+    release.set()
+    assert len([row async for row in results]) == 2
+
+    stored = await db[POSTS_COLLECTION].find({"_id": {"$in": [p["_id"] for p in posts]}}).to_list(length=None)
+    assert len({post["change_seq"] for post in stored}) == 1
+    assert stored[0]["change_seq"] > other_seq
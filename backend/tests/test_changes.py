@@ -0,0 +1,107 @@
+import asyncio
+
+from bson import ObjectId
+
+from database import POSTS_COLLECTION
+from utils import changes
+from utils.changes import (
+    PENDING_RETRY_SECONDS, begin_post_change, end_post_change, fetch_post_changes, post_change
+)
+
+
+async def _insert_changed_post(db, user_id, caption, stamp):
+    await db[POSTS_COLLECTION].insert_one({"user_id": user_id, "caption": caption, **stamp})
+
+
+async def _insert_changed_posts(db, user_id, captions):
+    for caption in captions:
+        async with post_change(db, user_id) as stamp:
+            await _insert_changed_post(db, user_id, caption, stamp)
+
+
+async def test_lower_sequence_committing_late_is_not_skipped(db):
+    user_id = ObjectId()
+    start = (await fetch_post_changes(db, user_id, None, None))["cursor"]
+
+    # A slow write takes its sequence first, a fast one commits a higher one meanwhile
+    slow = await begin_post_change(db, user_id)
+    await _insert_changed_posts(db, user_id, ["Fast"])
+
+    page = await fetch_post_changes(db, user_id, start, None)
+    assert [post["caption"] for post in page["posts"]] == ["Fast"]
+    assert page["has_more"] is False
+    assert page["retry_after"] == PENDING_RETRY_SECONDS
+
+    await _insert_changed_post(db, user_id, "Slow", slow)
+    await end_post_change(db, user_id, slow)
+
+    # The cursor stayed below the slow write, so it is picked up now
+    again = await fetch_post_changes(db, user_id, page["cursor"], None)
+    assert [post["caption"] for post in again["posts"]] == ["Slow", "Fast"]
+    assert again["retry_after"] is None
+    done = await fetch_post_changes(db, user_id, again["cursor"], None)
+    assert done["posts"] == []
+
+
+async def test_concurrent_writers_get_distinct_sequences(db):
+    user_id = ObjectId()
+    stamps = await asyncio.gather(*[begin_post_change(db, user_id) for _ in range(5)])
+    assert sorted(stamp["change_seq"] for stamp in stamps) == [1, 2, 3, 4, 5]
+
+
+async def test_new_cursor_starts_below_pending_writes(db):
+    user_id = ObjectId()
+    await _insert_changed_posts(db, user_id, ["Before"])
+    pending = await begin_post_change(db, user_id)
+
+    start = (await fetch_post_changes(db, user_id, None, None))["cursor"]
+    await _insert_changed_post(db, user_id, "During", pending)
+    await end_post_change(db, user_id, pending)
+
+    page = await fetch_post_changes(db, user_id, start, None)
+    assert [post["caption"] for post in page["posts"]] == ["During"]
+
+
+async def test_failed_write_releases_its_sequence(db):
+    user_id = ObjectId()
+    start = (await fetch_post_changes(db, user_id, None, None))["cursor"]
+
+    try:
+        async with post_change(db, user_id):
+            raise RuntimeError("write failed")
+    except RuntimeError:
+        pass
+    await _insert_changed_posts(db, user_id, ["After"])
+
+    page = await fetch_post_changes(db, user_id, start, None)
+    assert [post["caption"] for post in page["posts"]] == ["After"]
+    assert page["retry_after"] is None
+    assert (await fetch_post_changes(db, user_id, page["cursor"], None))["posts"] == []
+
+
+async def test_abandoned_sequence_is_released_after_its_lease(db, monkeypatch):
+    user_id = ObjectId()
+    start = (await fetch_post_changes(db, user_id, None, None))["cursor"]
+
+    monkeypatch.setattr(changes, "CHANGE_LEASE_SECONDS", 0)
+    await begin_post_change(db, user_id)
+    monkeypatch.undo()
+    await _insert_changed_posts(db, user_id, ["After"])
+
+    page = await fetch_post_changes(db, user_id, start, None)
+    assert page["retry_after"] is None
+    assert (await fetch_post_changes(db, user_id, page["cursor"], None))["posts"] == []
+
+
+async def test_committed_changes_page_on(db):
+    user_id = ObjectId()
+    start = (await fetch_post_changes(db, user_id, None, None))["cursor"]
+    await _insert_changed_posts(db, user_id, ["First", "Second", "Third"])
+
+    page = await fetch_post_changes(db, user_id, start, 2)
+
+    assert page["has_more"] is True
+    assert page["retry_after"] is None
+    rest = await fetch_post_changes(db, user_id, page["cursor"], 2)
+    assert [post["caption"] for post in rest["posts"]] == ["Third"]
+    assert rest["has_more"] is False
@@ -0,0 +1,56 @@
+from bson import ObjectId
+
+from database import PLATFORM_CONNECTIONS_COLLECTION
+from routers import dashboard as dashboard_router, posts as posts_router
+from utils.changes import PLATFORMS_SCOPE, next_change_seq
+
+
+def _client(make_client, user):
+    # The dashboard reuses the posts router's batch pipeline
+    return make_client(user, (dashboard_router, "/api/dashboard"), (posts_router, "/api/posts"))
+
+
+async def _revalidate(client, etag):
+    return await client.get("/api/dashboard", headers={"If-None-Match": etag})
+
+
+async def test_unchanged_dashboard_is_not_modified(db, make_client):
+    user = {"_id": ObjectId(), "email": "dashboard@example.com", "initial_batch_status": "ready"}
+    async with _client(make_client, user) as client:
+        first = await client.get("/api/dashboard")
+        again = await _revalidate(client, first.headers["ETag"])
+
+    assert first.status_code == 200
+    assert first.json()["user"]["initial_batch_status"] == "ready"
+    assert again.status_code == 304
+
+
+async def test_platform_change_invalidates_dashboard(db, make_client):
+    user = {"_id": ObjectId(), "email": "dashboard@example.com"}
+    async with _client(make_client, user) as client:
+        first = await client.get("/api/dashboard")
+        await db[PLATFORM_CONNECTIONS_COLLECTION].insert_one({
+            "user_id": user["_id"], "platform": "linkedin", "is_connected": True, "platform_username": "ada"
+        })
+        await next_change_seq(db, user["_id"], PLATFORMS_SCOPE)
+        again = await _revalidate(client, first.headers["ETag"])
+
+    assert first.json()["platforms"]["linkedin"]["connected"] is False
+    assert again.status_code == 200
+    assert again.json()["platforms"]["linkedin"] == {"connected": True, "username": "ada"}
+
+
+async def test_profile_change_invalidates_dashboard(db, make_client):
+    user = {"_id": ObjectId(), "email": "dashboard@example.com", "initial_batch_status": "generating"}
+    async with _client(make_client, user) as client:
+        first = await client.get("/api/dashboard")
+        # The initial batch finishing does not touch the user's updated_at
+        user["initial_batch_status"] = "ready"
+        after_batch = await _revalidate(client, first.headers["ETag"])
+        user["schedule_time"] = "18:30"
+        after_schedule = await _revalidate(client, after_batch.headers["ETag"])
+
+    assert after_batch.status_code == 200
+    assert after_batch.json()["user"]["initial_batch_status"] == "ready"
+    assert after_schedule.status_code == 200
+    assert after_schedule.json()["user"]["schedule_time"] == "18:30"
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from benchmarks.fake_platform import FakePlatformServer
+from database import POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION
+from utils import engagement_sync as engagement_sync_module
+from utils.engagement_sync import FAILED_POLL_INTERVAL, EngagementSyncWorker, poll_interval
+from utils.publishers import RetryPolicy, publish_dispatcher
+from utils.resilience import CircuitBreaker
+
+
+@pytest.fixture
+async def platforms(db, monkeypatch):
+    """Fake platform APIs the adapters talk to, with fast retries and fresh breakers."""
+    server = FakePlatformServer()
+    await server.start()
+    for publisher in publish_dispatcher.publishers.values():
+        for attribute in ("graph_url", "api_url", "base_url"):
+            if hasattr(publisher, attribute):
+                monkeypatch.setattr(publisher, attribute, getattr(publisher, attribute))
+        monkeypatch.setattr(publisher, "retry_policy", RetryPolicy(max_attempts=3, base_delay=0))
+        monkeypatch.setattr(publisher, "breaker", CircuitBreaker(f"test-{publisher.platform}"))
+        monkeypatch.setattr(publisher, "_session", None)
+    server.configure(publish_dispatcher)
+    monkeypatch.setattr(engagement_sync_module, "get_database", lambda: db)
+    yield server
+    await publish_dispatcher.close()
+    await server.stop()
+
+
+async def _connect(db, user_id, platform, access_token="token"):
+    await db[PLATFORM_CONNECTIONS_COLLECTION].insert_one({
+        "user_id": user_id, "platform": platform, "is_connected": True,
+        "access_token": access_token, "platform_user_id": f"{platform}-account"
+    })
+
+
+async def _posted(db, user_id, platforms, posted_ago=timedelta(days=3), next_sync_at=None, engagement=None):
+    post = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "status": "posted",
+        "platforms": platforms,
+        "posted_at": (datetime.now() - posted_ago).isoformat(),
+        "deliveries": {
+            platform: {"state": "posted", "remote_id": f"{platform}-{ObjectId()}"} for platform in platforms
+        },
+        "engagement_next_sync_at": next_sync_at
+    }
+    if engagement is not None:
+        post["engagement_data"] = engagement
+    await db[POSTS_COLLECTION].insert_one(post)
+    return post
+
+
+def _next_sync(post, now):
+    return datetime.fromisoformat(post["engagement_next_sync_at"]) - now
+
+
+async def test_partial_failure_keeps_other_platforms(db, platforms):
+    platforms.failing.add("facebook")
+    user_id = ObjectId()
+    await _connect(db, user_id, "twitter")
+    await _connect(db, user_id, "facebook")
+    post = await _posted(db, user_id, ["twitter", "facebook"])
+    now = datetime.now()
+
+    run = await EngagementSyncWorker().sync_due_posts(now)
+
+    assert run["failed_calls"] == 1
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert set(stored["engagement_data"]["platforms"]) == {"twitter"}
+    assert _next_sync(stored, now) == FAILED_POLL_INTERVAL
+
+
+async def test_rate_limited_call_is_retried(db, platforms):
+    platforms.rate_limited["twitter"] = 1
+    user_id = ObjectId()
+    await _connect(db, user_id, "twitter")
+    post = await _posted(db, user_id, ["twitter"])
+    now = datetime.now()
+
+    run = await EngagementSyncWorker().sync_due_posts(now)
+
+    assert (run["calls"], run["failed_calls"]) == (1, 0)
+    assert platforms.calls["twitter"] == 2
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    remote_id = post["deliveries"]["twitter"]["remote_id"]
+    assert stored["engagement_data"]["platforms"]["twitter"] == platforms.metrics(remote_id, "twitter")
+    assert _next_sync(stored, now) == poll_interval(post, now)
+
+
+async def test_persistent_rate_limit_keeps_previous_counts(db, platforms):
+    platforms.rate_limited["twitter"] = 10
+    user_id = ObjectId()
+    await _connect(db, user_id, "twitter")
+    previous = {"platforms": {"twitter": {"likes": 7, "comments": 1, "shares": 0, "impressions": 90}}}
+    post = await _posted(db, user_id, ["twitter"], engagement=previous)
+    now = datetime.now()
+
+    run = await EngagementSyncWorker().sync_due_posts(now)
+
+    assert run["failed_calls"] == 1
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["engagement_data"] == previous
+    assert _next_sync(stored, now) == FAILED_POLL_INTERVAL
+
+
+async def test_expired_token_is_not_retried(db, platforms):
+    platforms.expired.add("twitter")
+    user_id = ObjectId()
+    await _connect(db, user_id, "twitter")
+    post = await _posted(db, user_id, ["twitter"])
+    now = datetime.now()
+
+    run = await EngagementSyncWorker().sync_due_posts(now)
+
+    assert run["failed_calls"] == 1
+    assert platforms.calls["twitter"] == 1
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert "engagement_data" not in stored
+    assert _next_sync(stored, now) == FAILED_POLL_INTERVAL
+
+
+async def test_missing_token_skips_the_platform(db, platforms):
+    user_id = ObjectId()
+    await _connect(db, user_id, "twitter", access_token=None)
+    post = await _posted(db, user_id, ["twitter"])
+    now = datetime.now()
+
+    run = await EngagementSyncWorker().sync_due_posts(now)
+
+    assert run["calls"] == 0
+    assert platforms.calls["twitter"] == 0
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert _next_sync(stored, now) == poll_interval(post, now)
+
+
+async def test_longest_overdue_posts_go_first(db, platforms):
+    user_id = ObjectId()
+    await _connect(db, user_id, "twitter")
+    now = datetime.now()
+    fresh = await _posted(db, user_id, ["twitter"], timedelta(hours=1), (now - timedelta(minutes=1)).isoformat())
+    overdue = await _posted(db, user_id, ["twitter"], timedelta(days=20), (now - timedelta(days=2)).isoformat())
+    never = await _posted(db, user_id, ["twitter"], timedelta(days=40))
+
+    run = await EngagementSyncWorker(max_posts=2).sync_due_posts(now)
+
+    assert run["posts"] == 2
+    synced = {
+        post["_id"] for post in await db[POSTS_COLLECTION].find({"engagement_synced_at": {"$ne": None}}).to_list(length=None)
+    }
+    assert synced == {overdue["_id"], never["_id"]}
+    assert fresh["_id"] not in synced
@@ -0,0 +1,76 @@
+from bson import ObjectId
+
+from database import PLATFORM_CONNECTIONS_COLLECTION, POSTS_COLLECTION
+from routers import platforms as platforms_router, posts as posts_router
+from utils.changes import PLATFORMS_SCOPE, begin_post_change, end_post_change, next_change_seq, post_change
+
+
+async def _client(db, make_client):
+    user = {"_id": ObjectId(), "email": "etag@example.com"}
+    await db[POSTS_COLLECTION].insert_one({"user_id": user["_id"], "batch_id": "b1", "status": "draft"})
+    return user, make_client(user, (posts_router, "/api/posts"))
+
+
+async def _set_status(db, user, status, stamp):
+    await db[POSTS_COLLECTION].update_many({"user_id": user["_id"]}, {"$set": {"status": status, **stamp}})
+
+
+async def test_unchanged_resource_is_not_modified(db, make_client):
+    user, client = await _client(db, make_client)
+    async with client:
+        first = await client.get("/api/posts/batches")
+        again = await client.get("/api/posts/batches", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+async def test_write_invalidates_etag(db, make_client):
+    user, client = await _client(db, make_client)
+    async with client:
+        first = await client.get("/api/posts/batches")
+        async with post_change(db, user["_id"]) as stamp:
+            await _set_status(db, user, "approved", stamp)
+        again = await client.get("/api/posts/batches", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 200
+    assert again.json()[0]["approved_count"] == 1
+
+
+async def test_read_between_stamp_and_write_is_not_cached_as_current(db, make_client):
+    user, client = await _client(db, make_client)
+    async with client:
+        stamp = await begin_post_change(db, user["_id"])
+        # This read sees the data from before the write
+        racing = await client.get("/api/posts/batches")
+        assert racing.json()[0]["approved_count"] == 0
+
+        await _set_status(db, user, "approved", stamp)
+        await end_post_change(db, user["_id"], stamp)
+        again = await client.get("/api/posts/batches", headers={"If-None-Match": racing.headers["ETag"]})
+
+    assert again.status_code == 200
+    assert again.json()[0]["approved_count"] == 1
+
+
+async def test_platforms_etag_follows_only_platform_changes(db, make_client):
+    user = {"_id": ObjectId(), "email": "platforms@example.com"}
+    client = make_client(user, (platforms_router, "/api"))
+    async with client:
+        first = await client.get("/api/platforms")
+        # Post writes do not touch the platform list
+        async with post_change(db, user["_id"]) as stamp:
+            await db[POSTS_COLLECTION].insert_one({"user_id": user["_id"], **stamp})
+        unchanged = await client.get("/api/platforms", headers={"If-None-Match": first.headers["ETag"]})
+
+        await db[PLATFORM_CONNECTIONS_COLLECTION].insert_one(
+            {"user_id": user["_id"], "platform": "linkedin", "is_connected": True}
+        )
+        await next_change_seq(db, user["_id"], PLATFORMS_SCOPE)
+        changed = await client.get("/api/platforms", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.json() == []
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200
+    assert [connection["platform"] for connection in changed.json()] == ["linkedin"]
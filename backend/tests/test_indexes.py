@@ -0,0 +1,93 @@
+from pymongo import ASCENDING, IndexModel
+
+import indexes
+
+
+class StubCollection:
+    def __init__(self, info, fail_create=False):
+        self.info = info
+        self.fail_create = fail_create
+        self.created = []
+        self.dropped = []
+
+    async def index_information(self):
+        return self.info
+
+    async def create_indexes(self, models):
+        if self.fail_create:
+            raise RuntimeError("build failed")
+        self.created.extend(model.document["name"] for model in models)
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+
+
+class StubDatabase:
+    def __init__(self, info, fail_create=False):
+        self.collection = StubCollection(info, fail_create)
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self.collection
+
+    async def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+
+def _registry(monkeypatch, *models):
+    monkeypatch.setattr(indexes, "INDEXES", {"things": list(models)})
+
+
+async def test_drifted_ttl_is_changed_in_place(monkeypatch):
+    _registry(monkeypatch, IndexModel([("changed_at", ASCENDING)], name="changed_at_ttl", expireAfterSeconds=86400))
+    db = StubDatabase({"changed_at_ttl": {"key": [("changed_at", 1)], "expireAfterSeconds": 3600}})
+
+    summary = await indexes.ensure_indexes(db, report=lambda message: None)
+
+    assert summary["things"]["updated"] == ["changed_at_ttl"]
+    assert db.commands == [(("collMod", "things"), {"index": {"name": "changed_at_ttl", "expireAfterSeconds": 86400}})]
+
+
+async def test_other_option_drift_is_a_conflict(monkeypatch):
+    _registry(monkeypatch, IndexModel([("email", ASCENDING)], name="email_unique", unique=True))
+    db = StubDatabase({"email_unique": {"key": [("email", 1)]}})
+
+    summary = await indexes.ensure_indexes(db, report=lambda message: None)
+
+    assert summary["things"]["conflicts"] == ["email_unique"]
+    assert summary["things"]["existing"] == []
+    assert db.commands == [] and db.collection.created == []
+
+
+async def test_matching_index_exists(monkeypatch):
+    _registry(monkeypatch, IndexModel([("email", ASCENDING)], name="email_unique", unique=True))
+    db = StubDatabase({"email_unique": {"key": [("email", 1)], "unique": True}})
+
+    summary = await indexes.ensure_indexes(db, report=lambda message: None)
+
+    assert summary["things"]["existing"] == ["email_unique"]
+
+
+async def test_retired_index_is_dropped_once_its_replacement_exists(monkeypatch):
+    _registry(monkeypatch, IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"))
+    monkeypatch.setattr(indexes, "RETIRED_INDEXES", {"things": ["user", "gone"]})
+    db = StubDatabase({"user": {"key": [("user_id", 1)]}})
+
+    summary = await indexes.ensure_indexes(db, report=lambda message: None)
+
+    assert db.collection.created == ["user_id_id"]
+    assert summary["things"]["dropped"] == ["user"]
+    assert db.collection.dropped == ["user"]
+
+
+async def test_retired_index_is_kept_while_its_replacement_is_missing(monkeypatch):
+    _registry(monkeypatch, IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"))
+    monkeypatch.setattr(indexes, "RETIRED_INDEXES", {"things": ["user"]})
+    db = StubDatabase({"user": {"key": [("user_id", 1)]}}, fail_create=True)
+
+    summary = await indexes.ensure_indexes(db, report=lambda message: None)
+    dry_run = await indexes.ensure_indexes(db, dry_run=True, report=lambda message: None)
+
+    assert summary["things"]["failed"] == ["user_id_id"]
+    assert summary["things"]["dropped"] == [] and dry_run["things"]["dropped"] == []
+    assert db.collection.dropped == []
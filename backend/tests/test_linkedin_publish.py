@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from database import POSTS_COLLECTION
+from routers.posts import publish_post_to_linkedin
+from utils.publishers import PublishResult, platforms_to_publish, publish_dispatcher
+
+
+@pytest.fixture
+def linkedin_publishes(monkeypatch):
+    """Stand-in for the LinkedIn adapter that records what it publishes."""
+    published = []
+
+    async def publish(post, connection, access_token):
+        published.append(post["_id"])
+        return PublishResult("linkedin", success=True, remote_id="urn:li:share:1")
+
+    monkeypatch.setattr(publish_dispatcher.get_publisher("linkedin"), "publish", publish)
+    return published
+
+
+async def _insert_post(db, **fields):
+    post = {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "caption": "Launch day",
+        "platforms": ["linkedin", "instagram"],
+        "status": "scheduled",
+        "scheduled_date": datetime.now().isoformat(),
+        **fields
+    }
+    await db[POSTS_COLLECTION].insert_one(post)
+    return post
+
+
+async def test_other_platforms_keep_post_scheduled(db, linkedin_publishes):
+    post = await _insert_post(db)
+
+    result = await publish_post_to_linkedin(db, post, {}, "token")
+
+    assert result.success
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["status"] == "scheduled"
+    assert stored["posted_to"] == ["linkedin"]
+    assert stored["posted_to_linkedin"] is True
+    assert stored["deliveries"]["linkedin"]["state"] == "posted"
+    assert stored["posted_at"]
+    assert platforms_to_publish(stored) == ["instagram"]
+
+
+async def test_retry_of_other_platform_is_kept(db, linkedin_publishes):
+    retry_at = (datetime.now() + timedelta(minutes=5)).isoformat()
+    post = await _insert_post(db, deliveries={
+        "instagram": {"state": "failed", "attempts": 1, "retryable": True, "next_attempt_at": retry_at}
+    })
+
+    await publish_post_to_linkedin(db, post, {}, "token")
+
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["status"] == "scheduled"
+    assert stored["next_attempt_at"] == retry_at
+
+
+async def test_post_is_posted_once_every_platform_is(db, linkedin_publishes):
+    post = await _insert_post(db, deliveries={
+        "instagram": {"state": "posted", "attempts": 1, "remote_id": "ig-1"}
+    }, posted_to=["instagram"])
+
+    await publish_post_to_linkedin(db, post, {}, "token")
+
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["status"] == "posted"
+    assert stored["posted_to"] == ["linkedin", "instagram"]
+    assert stored["next_attempt_at"] is None
+    assert linkedin_publishes == [post["_id"]]
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from database import POSTS_COLLECTION
+from utils.changes import POSTS_SCOPE, change_versions
+from utils.publishers import PUBLISH_LEASE_SECONDS, claim_delivery, reconcile_pending_intents
+
+
+class StubPublisher:
+    def __init__(self, remote_id=None, error=None):
+        self.remote_id = remote_id
+        self.error = error
+
+    async def get_access_token(self, user_id, connection):
+        return "token"
+
+    async def find_published(self, post, connection, access_token, since):
+        if self.error:
+            raise self.error
+        return self.remote_id
+
+
+class StubDispatcher:
+    def __init__(self, publishers):
+        self.publishers = publishers
+
+    async def get_connections(self, user_id):
+        return {platform: {"platform": platform} for platform in self.publishers}
+
+    def get_publisher(self, platform):
+        return self.publishers.get(platform)
+
+
+async def _insert_in_flight(db, now, **deliveries):
+    intent_at = (now - timedelta(seconds=PUBLISH_LEASE_SECONDS + 1)).isoformat()
+    post = {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "caption": "Launch day",
+        "platforms": list(deliveries),
+        "status": "scheduled",
+        "pending_intents": [p for p, state in deliveries.items() if state == "publishing"],
+        "deliveries": {
+            platform: {"state": state, "attempts": 0, "intent_at": intent_at}
+            for platform, state in deliveries.items()
+        }
+    }
+    await db[POSTS_COLLECTION].insert_one(post)
+    return post
+
+
+async def test_confirmed_intent_marks_post_posted(db):
+    now = datetime.now()
+    post = await _insert_in_flight(db, now, linkedin="publishing", twitter="posted")
+
+    counts = await reconcile_pending_intents(db, StubDispatcher({"linkedin": StubPublisher("urn:li:share:1")}), now)
+
+    assert counts["confirmed"] == 1
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["deliveries"]["linkedin"]["state"] == "posted"
+    assert stored["status"] == "posted"
+    assert stored["posted_to"] == ["linkedin", "twitter"]
+    assert stored["pending_intents"] == []
+
+
+async def test_requeued_intent_keeps_post_scheduled(db):
+    now = datetime.now()
+    post = await _insert_in_flight(db, now, linkedin="publishing", twitter="posted")
+    await db[POSTS_COLLECTION].update_one({"_id": post["_id"]}, {"$set": {"status": "posted"}})
+
+    counts = await reconcile_pending_intents(db, StubDispatcher({"linkedin": StubPublisher()}), now)
+
+    assert counts["requeued"] == 1
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["deliveries"]["linkedin"]["state"] == "pending"
+    assert stored["status"] == "scheduled"
+    assert stored["posted_to"] == ["twitter"]
+
+
+async def test_unresolved_intent_fails_post(db):
+    now = datetime.now()
+    post = await _insert_in_flight(db, now, linkedin="publishing")
+
+    counts = await reconcile_pending_intents(
+        db, StubDispatcher({"linkedin": StubPublisher(error=RuntimeError("lookup failed"))}), now
+    )
+
+    assert counts["unresolved"] == 1
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["deliveries"]["linkedin"]["state"] == "failed"
+    assert stored["status"] == "failed"
+
+
+async def test_claim_bumps_post_changes(db):
+    now = datetime.now()
+    post = await _insert_in_flight(db, now, linkedin="pending")
+    before = await change_versions(db, post["user_id"], [POSTS_SCOPE])
+
+    assert await claim_delivery(db, post, "linkedin", now)
+
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    assert stored["deliveries"]["linkedin"]["state"] == "publishing"
+    assert stored["change_seq"] > 0
+    assert await change_versions(db, post["user_id"], [POSTS_SCOPE]) != before
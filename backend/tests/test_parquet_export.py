@@ -0,0 +1,108 @@
+import os
+from datetime import datetime
+
+import pyarrow.parquet as pq
+import pytest
+from bson import ObjectId
+
+from database import ANALYTICS_COLLECTION, ANALYTICS_DAILY_COLLECTION
+from utils import analytics_ingest
+from utils.parquet_export import ANALYTICS_DATASET, PART_NAME, export_dataset, load_manifest
+
+
+@pytest.fixture(autouse=True)
+def plain_layout(monkeypatch):
+    monkeypatch.setattr(analytics_ingest.settings, "ANALYTICS_TIMESERIES", False)
+
+
+async def _track(db, user_id, *rows):
+    async def stream():
+        for date, likes in rows:
+            yield {"platform": "twitter", "date": f"{date}T00:00:00", "likes_count": likes}
+
+    result = await analytics_ingest.ingest_rows(db, user_id, stream())
+    assert result.errors == []
+
+
+async def _forget_month(db, user_id, start, end):
+    """Drop a month of a user's analytics together with its rollups."""
+    await db[ANALYTICS_COLLECTION].delete_many({"user_id": user_id, "date": {"$gte": start, "$lt": end}})
+    await db[ANALYTICS_DAILY_COLLECTION].delete_many({"user_id": user_id, "day": {"$gte": start, "$lt": end}})
+
+
+def _path(user_id, month):
+    return os.path.join(f"user_id={user_id}", "platform=twitter", f"month={month}")
+
+
+def _likes(root, user_id, month):
+    table = pq.read_table(os.path.join(root, ANALYTICS_DATASET, _path(user_id, month), PART_NAME))
+    return [row["likes_count"] for row in table.to_pylist()]
+
+
+def _manifest(root):
+    return load_manifest(os.path.join(root, ANALYTICS_DATASET))["partitions"]
+
+
+async def _export(db, root, **options):
+    return await export_dataset(db, str(root), ANALYTICS_DATASET, report=lambda message: None, **options)
+
+
+async def test_unchanged_partitions_are_skipped(db, tmp_path):
+    user_id = ObjectId()
+    await _track(db, user_id, ("2026-02-10", 3), ("2026-03-05", 5))
+
+    first = await _export(db, tmp_path)
+    written = _manifest(tmp_path)
+    again = await _export(db, tmp_path)
+
+    assert first == {"written": 2, "skipped": 0, "removed": 0, "rows": 2}
+    assert again == {"written": 0, "skipped": 2, "removed": 0, "rows": 0}
+    assert _manifest(tmp_path) == written
+
+
+async def test_changed_fingerprint_rewrites_only_that_partition(db, tmp_path):
+    user_id = ObjectId()
+    await _track(db, user_id, ("2026-02-10", 3), ("2026-03-05", 5))
+    await _export(db, tmp_path)
+    february = _manifest(tmp_path)[_path(user_id, "2026-02")]
+
+    await _track(db, user_id, ("2026-03-06", 8))
+    stats = await _export(db, tmp_path)
+
+    assert stats == {"written": 1, "skipped": 1, "removed": 0, "rows": 2}
+    assert _likes(tmp_path, user_id, "2026-03") == [5, 8]
+    assert _manifest(tmp_path)[_path(user_id, "2026-03")]["rows"] == 2
+    assert _manifest(tmp_path)[_path(user_id, "2026-02")] == february
+
+
+async def test_partition_without_data_is_removed(db, tmp_path):
+    user_id = ObjectId()
+    await _track(db, user_id, ("2026-02-10", 3), ("2026-03-05", 5))
+    await _export(db, tmp_path)
+
+    await _forget_month(db, user_id, datetime(2026, 3, 1), datetime(2026, 4, 1))
+    stats = await _export(db, tmp_path)
+
+    assert stats == {"written": 0, "skipped": 1, "removed": 1, "rows": 0}
+    assert not os.path.exists(os.path.join(tmp_path, ANALYTICS_DATASET, _path(user_id, "2026-03")))
+    assert list(_manifest(tmp_path)) == [_path(user_id, "2026-02")]
+
+
+async def test_user_scoped_export_only_removes_that_users_partitions(db, tmp_path):
+    alice, bob = ObjectId(), ObjectId()
+    await _track(db, alice, ("2026-03-05", 5))
+    await _track(db, bob, ("2026-03-06", 7))
+    await _export(db, tmp_path)
+
+    for user_id in (alice, bob):
+        await _forget_month(db, user_id, datetime(2026, 3, 1), datetime(2026, 4, 1))
+    alice_only = await _export(db, tmp_path, user_id=alice)
+
+    assert alice_only == {"written": 0, "skipped": 0, "removed": 1, "rows": 0}
+    # Bob's partition is out of scope, even though his data is gone as well
+    assert list(_manifest(tmp_path)) == [_path(bob, "2026-03")]
+    assert _likes(tmp_path, bob, "2026-03") == [7]
+
+    everyone = await _export(db, tmp_path)
+    assert everyone["removed"] == 1
+    assert _manifest(tmp_path) == {}
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from database import POSTS_COLLECTION
+from routers import posts as posts_router
+from utils.pagination import DEFAULT_PAGE_SIZE
+
+
+async def _client_with_posts(db, make_client, count):
+    user = {"_id": ObjectId(), "email": "listing@example.com"}
+    start = datetime(2026, 1, 1, 9)
+    await db[POSTS_COLLECTION].insert_many([
+        {"user_id": user["_id"], "status": "pending_approval", "caption": f"Post {day}",
+         "scheduled_date": (start + timedelta(days=day)).isoformat()}
+        for day in reversed(range(count))
+    ])
+    return make_client(user, (posts_router, "/api/posts"))
+
+
+async def test_listing_without_cursor_or_limit_returns_every_post(db, make_client):
+    client = await _client_with_posts(db, make_client, DEFAULT_PAGE_SIZE + 10)
+    async with client:
+        response = await client.get("/api/posts/", params={"view": "list"})
+        pending = await client.get("/api/posts/pending-approval")
+
+    captions = [post["caption"] for post in response.json()]
+    assert captions == [f"Post {day}" for day in range(DEFAULT_PAGE_SIZE + 10)]
+    assert "X-Next-Cursor" not in response.headers
+    assert len(pending.json()) == DEFAULT_PAGE_SIZE + 10
+
+
+async def test_listing_with_limit_pages_by_cursor(db, make_client):
+    client = await _client_with_posts(db, make_client, 5)
+    async with client:
+        first = await client.get("/api/posts/", params={"limit": 3})
+        rest = await client.get("/api/posts/", params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [post["caption"] for post in first.json()] == ["Post 0", "Post 1", "Post 2"]
+    assert [post["caption"] for post in rest.json()] == ["Post 3", "Post 4"]
+    assert "X-Next-Cursor" not in rest.headers
@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bson import ObjectId
+
+from utils.publishers import (
+    PlatformPublisher, PublishError, PublishOutcomeUnknown, PublishResult, RetryPolicy,
+    confirmation_update, summarize_deliveries
+)
+
+
+class StubPublisher(PlatformPublisher):
+    platform = "stub"
+
+
+@pytest.fixture
+async def platform():
+    """Server answering every request with the next queued status."""
+    calls = []
+    statuses = []
+
+    async def handle(request):
+        calls.append(request.method)
+        status = statuses.pop(0) if statuses else 200
+        return web.json_response({"id": "remote-1"}, status=status)
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    publisher = StubPublisher(RetryPolicy(max_attempts=3, base_delay=0))
+    yield server, publisher, calls, statuses
+    await publisher.close()
+    await server.close()
+
+
+async def test_get_is_retried_on_server_errors(platform):
+    server, publisher, calls, statuses = platform
+    statuses.extend([503, 502])
+
+    data, _ = await publisher._request("GET", str(server.make_url("/metrics")))
+
+    assert data == {"id": "remote-1"}
+    assert calls == ["GET", "GET", "GET"]
+
+
+async def test_post_server_error_is_outcome_unknown(platform):
+    server, publisher, calls, statuses = platform
+    statuses.append(503)
+
+    with pytest.raises(PublishOutcomeUnknown):
+        await publisher._request("POST", str(server.make_url("/posts")), json={})
+    assert calls == ["POST"]
+
+
+async def test_post_rate_limit_is_retried(platform):
+    server, publisher, calls, statuses = platform
+    statuses.append(429)
+
+    data, _ = await publisher._request("POST", str(server.make_url("/posts")), json={})
+
+    assert data == {"id": "remote-1"}
+    assert calls == ["POST", "POST"]
+
+
+async def test_post_client_error_is_not_retried(platform):
+    server, publisher, calls, statuses = platform
+    statuses.append(400)
+
+    with pytest.raises(PublishError) as raised:
+        await publisher._request("POST", str(server.make_url("/posts")), json={})
+    assert not raised.value.outcome_unknown
+    assert calls == ["POST"]
+
+
+async def test_post_connection_failure_is_retried():
+    publisher = StubPublisher(RetryPolicy(max_attempts=2, base_delay=0))
+    try:
+        with pytest.raises(PublishError) as raised:
+            await publisher._request("POST", "http://127.0.0.1:9/posts", json={})
+    finally:
+        await publisher.close()
+    assert not raised.value.outcome_unknown
+
+
+def test_unknown_outcome_keeps_intent_in_flight():
+    now = datetime.now()
+    post = {
+        "_id": ObjectId(),
+        "platforms": ["linkedin", "twitter"],
+        "pending_intents": ["linkedin", "twitter"],
+        "deliveries": {
+            "linkedin": {"state": "publishing", "attempts": 0, "intent_at": now.isoformat()},
+            "twitter": {"state": "publishing", "attempts": 0, "intent_at": now.isoformat()}
+        }
+    }
+
+    update, deliveries = confirmation_update(post, {
+        "linkedin": PublishResult("linkedin", success=False, error="timed out", outcome_unknown=True),
+        "twitter": PublishResult("twitter", success=True, remote_id="tw-1")
+    }, now)
+
+    assert "deliveries.linkedin" not in update["$set"]
+    assert update["$set"]["deliveries.linkedin.last_error"] == "timed out"
+    assert update["$pull"] == {"pending_intents": {"$in": ["twitter"]}}
+    assert deliveries["linkedin"]["state"] == "publishing"
+    assert summarize_deliveries(post["platforms"], deliveries)["status"] == "scheduled"
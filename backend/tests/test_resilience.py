@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.resilience import BulkheadFullError, CircuitBreaker
+
+
+async def test_timed_out_thread_keeps_its_slot():
+    breaker = CircuitBreaker("slow-thread", max_concurrency=1, max_wait=0.05, call_timeout=0.05)
+    release = threading.Event()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call_in_thread(release.wait, 5)
+
+    # The thread is still running, so its slot is still taken
+    assert breaker.in_flight == 1
+    with pytest.raises(BulkheadFullError):
+        await breaker.call_in_thread(lambda: "ok")
+
+    release.set()
+    for _ in range(100):
+        if breaker.in_flight == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert await breaker.call_in_thread(lambda: "ok") == "ok"
+
+
+async def test_timed_out_coroutine_is_cancelled_and_frees_its_slot():
+    breaker = CircuitBreaker("slow-coroutine", max_concurrency=1, max_wait=0.05, call_timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(asyncio.sleep, 5)
+
+    assert breaker.in_flight == 0
+    assert await breaker.call(asyncio.sleep, 0, "ok") == "ok"
+
+
+async def test_thread_errors_count_as_failures():
+    breaker = CircuitBreaker("failing-thread", failure_threshold=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await breaker.call_in_thread(fail)
+    assert breaker.state == "open"
+    assert breaker.in_flight == 0
+
+
+async def test_cancelled_half_open_trial_frees_its_slot():
+    breaker = CircuitBreaker("cancelled-trial", failure_threshold=1, recovery_timeout=0)
+
+    async def fail():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        await breaker.call(fail)
+
+    # The first call after recovery is the trial; its caller goes away
+    trial = asyncio.ensure_future(breaker.call(asyncio.sleep, 5))
+    while breaker.in_flight == 0:
+        await asyncio.sleep(0)
+    assert breaker.state == "half_open"
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    assert breaker.half_open_calls == 0
+    assert await breaker.call(asyncio.sleep, 0, "ok") == "ok"
+    assert breaker.state == "closed"
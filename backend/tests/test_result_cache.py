@@ -0,0 +1,83 @@
+import asyncio
+
+from bson import ObjectId
+
+from utils.changes import ANALYTICS_SCOPE, next_change_seq
+from utils.result_cache import ResultCache, cached_result
+
+
+class SlowComputation:
+    """Computation that runs until released, counting how often it was started."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return {"total": self.calls}
+
+
+def _request(db, user_id, cache, compute):
+    return asyncio.ensure_future(
+        cached_result(db, user_id, "summary", [ANALYTICS_SCOPE], ["2026030509"], compute, cache=cache)
+    )
+
+
+async def test_concurrent_callers_share_one_computation(db):
+    user_id, cache, compute = ObjectId(), ResultCache(), SlowComputation()
+    callers = [_request(db, user_id, cache, compute) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    compute.release.set()
+
+    results = await asyncio.gather(*callers)
+
+    assert compute.calls == 1
+    assert cache.coalesced == 4
+    assert all(result is results[0] for result in results)
+
+
+async def test_result_is_recomputed_once_its_scope_changes(db):
+    user_id, cache, compute = ObjectId(), ResultCache(), SlowComputation()
+    compute.release.set()
+
+    first = await _request(db, user_id, cache, compute)
+    cached = await _request(db, user_id, cache, compute)
+    await next_change_seq(db, user_id, ANALYTICS_SCOPE)
+    fresh = await _request(db, user_id, cache, compute)
+
+    assert first == cached == {"total": 1}
+    assert fresh == {"total": 2}
+
+
+async def test_cancelled_caller_does_not_cancel_the_shared_computation(db):
+    user_id, cache, compute = ObjectId(), ResultCache(), SlowComputation()
+    leader = _request(db, user_id, cache, compute)
+    await asyncio.sleep(0.01)
+    follower = _request(db, user_id, cache, compute)
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    compute.release.set()
+
+    assert await follower == {"total": 1}
+    assert leader.cancelled()
+    assert compute.calls == 1
+
+
+async def test_failed_computation_is_not_cached(db):
+    user_id, cache, compute = ObjectId(), ResultCache(), SlowComputation(RuntimeError("query failed"))
+    callers = [_request(db, user_id, cache, compute) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    compute.release.set()
+
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert [str(result) for result in results] == ["query failed", "query failed"]
+
+    compute.error = None
+    assert await _request(db, user_id, cache, compute) == {"total": 2}
+    assert cache.stats()["in_flight"] == 0
@@ -0,0 +1,90 @@
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from bson import ObjectId
+
+from database import POSTS_COLLECTION, POSTING_HEATMAP_COLLECTION, USERS_COLLECTION
+from utils import scheduler as scheduler_module
+from utils.publishers import PublishResult
+from utils.heatmap import spread_minute
+from utils.scheduler import scheduler
+
+
+class LateEvening(datetime):
+    """Thursday 2026-03-05, 23:30."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 3, 5, 23, 30)
+
+
+async def _schedule_tonight(db, monkeypatch, cells=()):
+    monkeypatch.setattr(scheduler_module, "get_database", lambda: db)
+    monkeypatch.setattr(scheduler_module, "datetime", LateEvening)
+    user_id = ObjectId()
+    for weekday, hour, posts, engagement in cells:
+        await db[POSTING_HEATMAP_COLLECTION].insert_one({
+            "user_id": user_id, "platform": "linkedin", "weekday": weekday, "hour": hour,
+            "posts": posts, "engagement": engagement, "impressions": 0
+        })
+    result = await db[POSTS_COLLECTION].insert_one({
+        "user_id": user_id, "status": "approved", "platforms": ["linkedin"],
+        "scheduled_date": "2026-03-05T00:00:00"
+    })
+
+    await scheduler.schedule_posts_for_user(str(user_id))
+
+    post = await db[POSTS_COLLECTION].find_one({"_id": result.inserted_id})
+    assert post["status"] == "scheduled"
+    return post["scheduled_date"], spread_minute(result.inserted_id)
+
+
+async def test_post_approved_at_23_30_moves_to_the_next_day(db, monkeypatch):
+    scheduled_date, minute = await _schedule_tonight(db, monkeypatch)
+
+    assert scheduled_date == f"2026-03-06T09:{minute:02d}:00"
+
+
+async def test_next_day_uses_that_weekdays_heatmap(db, monkeypatch):
+    # Friday afternoons do well, Thursday mornings do not
+    scheduled_date, minute = await _schedule_tonight(db, monkeypatch, [(4, 15, 5, 500), (3, 10, 5, 50)])
+
+    assert scheduled_date == f"2026-03-06T15:{minute:02d}:00"
+
+
+class StubDispatcher:
+    def __init__(self, results):
+        self.results = results
+
+    async def publish_post(self, post, platforms):
+        return {platform: self.results[platform] for platform in platforms}
+
+
+async def test_due_post_gets_status_and_errors_of_its_deliveries(db, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "get_database", lambda: db)
+    monkeypatch.setattr(scheduler_module, "publish_dispatcher", StubDispatcher({
+        "linkedin": PublishResult("linkedin", success=True, remote_id="urn:li:share:1"),
+        "twitter": PublishResult("twitter", success=False, error="duplicate status", retryable=False)
+    }))
+    # The real module connects to the database on import
+    notifications = SimpleNamespace(notify_posting_success=AsyncMock())
+    monkeypatch.setitem(sys.modules, "utils.notifications", notifications)
+    user = await db[USERS_COLLECTION].insert_one({"email": "scheduler@example.com"})
+    post = {
+        "_id": ObjectId(), "user_id": user.inserted_id, "status": "scheduled",
+        "platforms": ["linkedin", "twitter"], "scheduled_date": "2026-03-05T09:00:00"
+    }
+    await db[POSTS_COLLECTION].insert_one(post)
+
+    await scheduler.post_single_post(post)
+
+    stored = await db[POSTS_COLLECTION].find_one({"_id": post["_id"]})
+    # Twitter will not be retried, so the post is done with what got through
+    assert stored["status"] == "posted"
+    assert stored["posted_to"] == ["linkedin"]
+    assert stored["posted_at"]
+    assert stored["next_attempt_at"] is None
+    assert stored["error_message"] == "twitter: duplicate status"
+    notifications.notify_posting_success.assert_awaited_once_with(str(user.inserted_id), 1, ["linkedin"])
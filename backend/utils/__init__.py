@@ -1,18 +1,27 @@
 from .auth import (
-    verify_password, get_password_hash, create_access_token,
-    verify_token, generate_otp, generate_secure_token
+    verify_password, get_password_hash, hash_password_async,
+    verify_and_update_password, create_access_token,
+    verify_token, decode_token, revoke_token, revoke_user_tokens,
+    generate_otp, generate_secure_token
 )
 from .email import send_email, send_otp_email, send_welcome_email
 from .ai_generator import ai_generator, AIContentGenerator
+from .cache import TTLCache
+from .dependencies import get_current_user, invalidate_user
 
 __all__ = [
     # Auth utilities
-    "verify_password", "get_password_hash", "create_access_token",
-    "verify_token", "generate_otp", "generate_secure_token",
+    "verify_password", "get_password_hash", "hash_password_async",
+    "verify_and_update_password", "create_access_token",
+    "verify_token", "decode_token", "revoke_token", "revoke_user_tokens",
+    "generate_otp", "generate_secure_token",
     
     # Email utilities
     "send_email", "send_otp_email", "send_welcome_email",
     
     # AI utilities
-    "ai_generator", "AIContentGenerator"
+    "ai_generator", "AIContentGenerator",
+    
+    # Caching and request dependencies
+    "TTLCache", "get_current_user", "invalidate_user"
 ] 
\ No newline at end of file
@@ -13,6 +13,8 @@ from datetime import datetime, timedelta
 from PIL import Image, ImageDraw, ImageFont
 import io
 
+from utils.resilience import gemini_breaker, openai_breaker, unsplash_breaker
+
 logger = logging.getLogger(__name__)
 
 # Configure Gemini API
@@ -51,7 +53,7 @@ class AIContentGenerator:
             Make it engaging, authentic, and platform-appropriate.
             """
             
-            response = self.model.generate_content(prompt)
+            response = await gemini_breaker.call_in_thread(self.model.generate_content, prompt)
             result = json.loads(response.text)
             
             return {
@@ -77,7 +79,7 @@ class AIContentGenerator:
             Return only the image prompt, no additional text.
             """
             
-            response = self.model.generate_content(prompt)
+            response = await gemini_breaker.call_in_thread(self.model.generate_content, prompt)
             return response.text.strip()
             
         except Exception as e:
@@ -119,7 +121,8 @@ class AIContentGenerator:
             
             dalle_prompt = platform_prompts.get(platform, f"{image_prompt}, professional social media content")
             
-            response = openai.Image.create(
+            response = await openai_breaker.call_in_thread(
+                openai.Image.create,
                 prompt=dalle_prompt,
                 n=1,
                 size="1024x1024"
@@ -148,18 +151,19 @@ class AIContentGenerator:
                 "client_id": settings.unsplash_access_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(unsplash_url, params=params) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        image_url = data['urls']['regular']
-                        
-                        # Download and save the image locally
-                        saved_path = await self._download_and_save_image(image_url, platform, "unsplash")
-                        return saved_path
-                    else:
-                        logger.error(f"Unsplash API error: {resp.status}")
-                        return None
+            async def fetch_random_photo():
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(unsplash_url, params=params) as resp:
+                        if resp.status != 200:
+                            raise Exception(f"Unsplash API error: {resp.status}")
+                        return await resp.json()
+            
+            data = await unsplash_breaker.call(fetch_random_photo)
+            image_url = data['urls']['regular']
+            
+            # Download and save the image locally
+            saved_path = await self._download_and_save_image(image_url, platform, "unsplash")
+            return saved_path
                         
         except Exception as e:
             logger.error(f"Error with Unsplash: {e}")
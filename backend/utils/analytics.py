@@ -0,0 +1,186 @@
+"""
+Analytics aggregations.
+
+The summary is computed by MongoDB in a single ``$facet`` pipeline: an index
+selects the window once and the totals, platform breakdown and daily trend
+are grouped server-side. The endpoints read the daily rollups (see
+utils.rollups), so a window touches at most one document per platform and
+day; the equivalent pipeline over the raw rows is kept for benchmarks and
+for checking the rollups against the raw data.
+
+Windows are whole calendar days (UTC) ending with today.
+"""
+
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from database import ANALYTICS_COLLECTION, ANALYTICS_DAILY_COLLECTION
+from .analytics_store import storage_query, field_ref
+
+SUMMARY_PLATFORMS = ["instagram", "linkedin", "facebook", "twitter"]
+SUMMARY_WINDOW_DAYS = 30
+TREND_DAYS = 7
+
+ENGAGEMENT_EXPRESSION = {"$add": [
+    {"$ifNull": ["$likes_count", 0]},
+    {"$ifNull": ["$comments_count", 0]},
+    {"$ifNull": ["$shares_count", 0]}
+]}
+
+
+def window_start(end_date: datetime, days: int) -> datetime:
+    """Midnight starting a window of ``days`` calendar days that ends on ``end_date``'s day."""
+    return datetime.combine((end_date - timedelta(days=days - 1)).date(), time.min)
+
+
+def raw_summary_pipeline(user_id: ObjectId, start_date: datetime, end_date: datetime,
+                         timeseries: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Summary aggregation over the raw analytics rows, in either storage layout."""
+    return [
+        {"$match": storage_query({"user_id": user_id, "date": {"$gte": start_date, "$lte": end_date}}, timeseries)},
+        {"$project": {
+            "_id": 0,
+            "platform": field_ref("platform", timeseries),
+            "date": 1,
+            "followers": {"$ifNull": ["$followers_count", 0]},
+            "engagement": ENGAGEMENT_EXPRESSION,
+            # Only positive rates count towards the average
+            "engagement_rate": {"$cond": [{"$gt": ["$engagement_rate", 0]}, "$engagement_rate", None]}
+        }},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "followers": {"$sum": "$followers"},
+                    "engagement": {"$sum": "$engagement"},
+                    "average_engagement_rate": {"$avg": "$engagement_rate"}
+                }}
+            ],
+            "platforms": [
+                {"$group": {
+                    "_id": "$platform",
+                    "followers": {"$sum": "$followers"},
+                    "engagement": {"$sum": "$engagement"},
+                    "posts": {"$sum": 1}
+                }}
+            ],
+            "trend": [
+                {"$match": {"date": {"$gte": window_start(end_date, TREND_DAYS)}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                    "followers": {"$sum": "$followers"},
+                    "engagement": {"$sum": "$engagement"}
+                }}
+            ]
+        }}
+    ]
+
+
+def rollup_summary_pipeline(user_id: ObjectId, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    """Summary aggregation over the daily rollups; same output shape as the raw pipeline."""
+    return [
+        {"$match": {"user_id": user_id, "day": {"$gte": start_date, "$lte": end_date}}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "followers": {"$sum": "$followers"},
+                    "engagement": {"$sum": "$engagement"},
+                    "rate_sum": {"$sum": "$engagement_rate_sum"},
+                    "rate_count": {"$sum": "$engagement_rate_count"}
+                }},
+                {"$project": {
+                    "followers": 1,
+                    "engagement": 1,
+                    "average_engagement_rate": {"$cond": [
+                        {"$gt": ["$rate_count", 0]}, {"$divide": ["$rate_sum", "$rate_count"]}, 0
+                    ]}
+                }}
+            ],
+            "platforms": [
+                {"$group": {
+                    "_id": "$platform",
+                    "followers": {"$sum": "$followers"},
+                    "engagement": {"$sum": "$engagement"},
+                    "posts": {"$sum": "$rows"}
+                }}
+            ],
+            "trend": [
+                {"$match": {"day": {"$gte": window_start(end_date, TREND_DAYS)}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$day"}},
+                    "followers": {"$sum": "$followers"},
+                    "engagement": {"$sum": "$engagement"}
+                }}
+            ]
+        }}
+    ]
+
+
+def build_summary(facets: Dict[str, List[Dict[str, Any]]], end_date: datetime) -> Dict[str, Any]:
+    """Shape the ``$facet`` output like the summary response, filling in empty platforms and days."""
+    totals = facets["totals"][0] if facets["totals"] else {}
+    platforms = {row["_id"]: row for row in facets["platforms"]}
+    trend = {row["_id"]: row for row in facets["trend"]}
+
+    platform_breakdown = {}
+    for platform in SUMMARY_PLATFORMS:
+        row = platforms.get(platform, {})
+        platform_breakdown[platform] = {
+            "followers": row.get("followers", 0),
+            "engagement": row.get("engagement", 0),
+            "posts": row.get("posts", 0)
+        }
+
+    growth_trend = []
+    for i in range(TREND_DAYS):
+        day = (end_date - timedelta(days=i)).strftime("%Y-%m-%d")
+        row = trend.get(day, {})
+        growth_trend.append({
+            "date": day,
+            "followers": row.get("followers", 0),
+            "engagement": row.get("engagement", 0)
+        })
+
+    return {
+        "total_followers": totals.get("followers", 0),
+        "total_engagement": totals.get("engagement", 0),
+        "average_engagement_rate": totals.get("average_engagement_rate") or 0,
+        "platform_breakdown": platform_breakdown,
+        "growth_trend": growth_trend
+    }
+
+
+async def compute_summary(db, user_id: ObjectId, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """Analytics summary for the ``SUMMARY_WINDOW_DAYS`` days up to ``end_date``, from the rollups."""
+    end_date = end_date or datetime.utcnow()
+    facets = await db[ANALYTICS_DAILY_COLLECTION].aggregate(
+        rollup_summary_pipeline(user_id, window_start(end_date, SUMMARY_WINDOW_DAYS), end_date)
+    ).to_list(length=1)
+    return build_summary(facets[0], end_date)
+
+
+async def compute_raw_summary(db, user_id: ObjectId, end_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """The same summary computed from the raw analytics rows."""
+    end_date = end_date or datetime.utcnow()
+    facets = await db[ANALYTICS_COLLECTION].aggregate(
+        raw_summary_pipeline(user_id, window_start(end_date, SUMMARY_WINDOW_DAYS), end_date)
+    ).to_list(length=1)
+    return build_summary(facets[0], end_date)
+
+
+async def daily_rollups(db, user_id: ObjectId, days: int, platform: Optional[str] = None,
+                        end_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """A user's rollup documents for the last ``days`` days, oldest first."""
+    end_date = end_date or datetime.utcnow()
+    query: Dict[str, Any] = {"user_id": user_id, "day": {"$gte": window_start(end_date, days), "$lte": end_date}}
+    if platform:
+        query["platform"] = platform
+    return await db[ANALYTICS_DAILY_COLLECTION].find(query).sort("day", 1).to_list(length=None)
+
+
+def average_engagement_rate(rollup: Dict[str, Any]) -> float:
+    count = rollup.get("engagement_rate_count", 0)
+    return rollup.get("engagement_rate_sum", 0) / count if count else 0.0
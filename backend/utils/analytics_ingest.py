@@ -0,0 +1,316 @@
+"""
+Bulk ingestion of raw analytics rows.
+
+Rows are validated one by one as they arrive and written in chunks. A row is
+identified by (user_id, platform, date): ingesting a row whose key already
+exists replaces the stored row (keeping its created_at), so a client can
+safely resend a batch after a timeout. Within a chunk the last row for a key
+wins.
+
+Chunks of one user are written one at a time, across processes, under a
+lease in ANALYTICS_INGEST_LOCKS_COLLECTION: each chunk reads the rows its keys
+replace and folds the difference into the rollups, and two chunks doing that
+for the same key at once would both find no stored row.
+
+In a plain collection each row is an unordered ``ReplaceOne``: on the stored
+row's _id, or an upsert on the natural key for a new row, which the unique
+``user_platform_date`` index keeps to one document per key even for writers
+that bypass the lease. A row that fails to write leaves the one it would have
+replaced in place. Time-series collections support neither upserts nor unique
+indexes, so there the lease is all that serializes writers of a key: new rows
+are inserted first and the rows they replace are deleted by _id afterwards,
+which needs MongoDB 7.0 or later. On older servers rows whose key is already
+stored are rejected rather than duplicated.
+
+Every chunk folds the rows it wrote, minus the rows they replaced, into the
+daily rollups and bumps the user's analytics version, so a request that fails
+halfway leaves consistent rollups and ETags for the chunks it did write.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config import settings
+from database import ANALYTICS_COLLECTION, ANALYTICS_INGEST_LOCKS_COLLECTION
+from models import AnalyticsCreate
+from .analytics_store import storage_query, to_storage, from_storage, supports_row_deletes
+from .rollups import apply_rollups
+from .changes import next_change_seq, ANALYTICS_SCOPE
+
+INGEST_CHUNK_SIZE = 1000
+
+# Longest one chunk may hold a user's ingest lease before its writer is presumed dead
+INGEST_LEASE_SECONDS = 60
+
+# How often a chunk waiting for the lease checks whether it is free
+INGEST_LEASE_POLL_SECONDS = 0.05
+
+# (platform, date) of a row; the user is the same for a whole ingestion
+RowKey = Tuple[str, datetime]
+
+
+def ingest_date(value: datetime) -> datetime:
+    """``value`` as MongoDB stores it: naive UTC, truncated to milliseconds."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def validate_row(row: Any) -> Dict[str, Any]:
+    """
+    Validate one incoming row, parsed or a raw JSON line, as ``AnalyticsCreate``.
+
+    Raises:
+        ValueError: with a readable message if the row is invalid
+    """
+    if isinstance(row, (bytes, str)):
+        try:
+            row = json.loads(row)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(row, dict):
+        raise ValueError("Row must be a JSON object")
+    try:
+        document = AnalyticsCreate(**row).dict(exclude={"user_id"})
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        ))
+    document["date"] = ingest_date(document["date"])
+    return document
+
+
+class IngestResult:
+    """Per-request tally of an ingestion, including the errors of individual rows."""
+
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.replaced = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, row: int, error: str):
+        self.errors.append({"row": row, "error": error})
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.replaced
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "replaced": self.replaced,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda error: error["row"])
+        }
+
+
+@asynccontextmanager
+async def _ingest_lease(db, user_id: ObjectId):
+    """Hold the user's ingest lease for the duration of the block, waiting for it if taken."""
+    leases = db[ANALYTICS_INGEST_LOCKS_COLLECTION]
+    owner = ObjectId()
+    while True:
+        now = datetime.utcnow()
+        try:
+            # Takes a free or expired lease; a live one makes the upsert collide on _id
+            await leases.update_one(
+                {"_id": user_id, "expires_at": {"$lte": now}},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=INGEST_LEASE_SECONDS)}},
+                upsert=True
+            )
+            break
+        except DuplicateKeyError:
+            await asyncio.sleep(INGEST_LEASE_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        await leases.delete_one({"_id": user_id, "owner": owner})
+
+
+async def _existing_rows(db, user_id: ObjectId, keys: Iterable[RowKey]) -> List[Dict[str, Any]]:
+    """Stored rows of the user matching any of ``keys``, in the flat layout."""
+    by_platform: Dict[str, List[datetime]] = {}
+    for platform, date in keys:
+        by_platform.setdefault(platform, []).append(date)
+
+    query = storage_query({"$or": [
+        {"user_id": user_id, "platform": platform, "date": {"$in": dates}}
+        for platform, dates in by_platform.items()
+    ]})
+    return [from_storage(row) async for row in db[ANALYTICS_COLLECTION].find(query).sort("_id", 1)]
+
+
+def _write_errors(e: BulkWriteError) -> Dict[int, str]:
+    return {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+
+
+async def _replace_rows(db, documents: List[Dict[str, Any]], existing: Dict[RowKey, Dict[str, Any]],
+                        replaced: List[Dict[str, Any]]) -> Tuple[Dict[int, str], List[Dict[str, Any]]]:
+    """
+    Replace the stored rows of ``documents``' keys, upserting new keys on the
+    natural key, and delete the other stored rows sharing their keys, in one
+    unordered bulk write.
+
+    Returns:
+        Tuple of (write errors by document index, stored rows that were replaced or deleted)
+    """
+    kept = {row["_id"] for row in existing.values()}
+    duplicates = [row for row in replaced if row["_id"] not in kept]
+    operations = [
+        ReplaceOne({"_id": document["_id"]}, to_storage(dict(document)))
+        if document["_id"] in kept else
+        ReplaceOne(
+            {"user_id": document["user_id"], "platform": document["platform"], "date": document["date"]},
+            to_storage(dict(document)), upsert=True
+        )
+        for document in documents
+    ]
+    operations += [DeleteOne({"_id": row["_id"]}) for row in duplicates]
+
+    errors: Dict[int, str] = {}
+    try:
+        await db[ANALYTICS_COLLECTION].bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        errors = _write_errors(e)
+
+    written_ids = {document["_id"] for index, document in enumerate(documents) if index not in errors}
+    removed = [row for row in existing.values() if row["_id"] in written_ids]
+    removed += [row for index, row in enumerate(duplicates, len(documents)) if index not in errors]
+    return {index: error for index, error in errors.items() if index < len(documents)}, removed
+
+
+async def _insert_then_delete(db, documents: List[Dict[str, Any]],
+                              replaced: List[Dict[str, Any]]) -> Tuple[Dict[int, str], List[Dict[str, Any]]]:
+    """
+    Insert ``documents`` under new _ids, then delete the stored rows sharing
+    the keys of those that were written.
+
+    Returns:
+        Tuple of (insert errors by document index, stored rows that were deleted)
+    """
+    for document in documents:
+        document["_id"] = ObjectId()
+
+    errors: Dict[int, str] = {}
+    try:
+        await db[ANALYTICS_COLLECTION].insert_many([to_storage(dict(document)) for document in documents], ordered=False)
+    except BulkWriteError as e:
+        errors = _write_errors(e)
+
+    written_keys = {
+        (document["platform"], document["date"]) for index, document in enumerate(documents) if index not in errors
+    }
+    removed = [row for row in replaced if (row["platform"], row["date"]) in written_keys]
+    if removed:
+        await db[ANALYTICS_COLLECTION].delete_many({"_id": {"$in": [row["_id"] for row in removed]}})
+    return errors, removed
+
+
+async def write_chunk(db, user_id: ObjectId, chunk: List[Tuple[int, Dict[str, Any]]], result: IngestResult):
+    """
+    Write one chunk of validated ``(row number, document)`` pairs.
+
+    Rows that fail to write are reported in ``result`` and leave the stored row
+    with their key, if any, as it was.
+    """
+    latest: Dict[RowKey, Tuple[int, Dict[str, Any]]] = {}
+    for number, document in chunk:
+        key = (document["platform"], document["date"])
+        if key in latest:
+            result.fail(latest[key][0], f"Superseded by row {number} with the same platform and date")
+        latest[key] = (number, document)
+
+    async with _ingest_lease(db, user_id):
+        await _write_latest(db, user_id, latest, result)
+
+
+async def _write_latest(db, user_id: ObjectId, latest: Dict[RowKey, Tuple[int, Dict[str, Any]]],
+                        result: IngestResult):
+    """Write the last row of each key in a chunk; called with the user's ingest lease held."""
+    # Rows tracked one at a time may share a key; all of them are replaced and
+    # the oldest one's _id is kept
+    replaced = await _existing_rows(db, user_id, latest.keys())
+    existing: Dict[RowKey, Dict[str, Any]] = {}
+    for row in replaced:
+        existing.setdefault((row["platform"], row["date"]), row)
+
+    timeseries = settings.ANALYTICS_TIMESERIES
+    if existing and not await supports_row_deletes(db, timeseries):
+        for key in list(existing):
+            result.fail(latest.pop(key)[0], "Replacing stored rows of a time-series collection needs MongoDB 7.0 or later")
+        existing, replaced = {}, []
+
+    now = datetime.utcnow()
+    numbers, documents = [], []
+    for key, (number, document) in latest.items():
+        document["user_id"] = user_id
+        document["updated_at"] = now
+        previous = existing.get(key)
+        if previous:
+            document["_id"] = previous["_id"]
+            document["created_at"] = previous.get("created_at") or now
+        else:
+            document["_id"] = ObjectId()
+            document["created_at"] = now
+        numbers.append(number)
+        documents.append(document)
+
+    if not documents:
+        return
+    if timeseries:
+        errors, removed = await _insert_then_delete(db, documents, replaced)
+    else:
+        errors, removed = await _replace_rows(db, documents, existing, replaced)
+    for index, error in errors.items():
+        result.fail(numbers[index], error)
+
+    written = [document for index, document in enumerate(documents) if index not in errors]
+    for document in written:
+        if (document["platform"], document["date"]) in existing:
+            result.replaced += 1
+        else:
+            result.inserted += 1
+    await apply_rollups(db, written, removed)
+    if written or removed:
+        await next_change_seq(db, user_id, ANALYTICS_SCOPE)
+
+
+async def ingest_rows(db, user_id: ObjectId, rows, max_rows: Optional[int] = None,
+                      chunk_size: int = INGEST_CHUNK_SIZE) -> IngestResult:
+    """
+    Validate and write rows from an async iterable of parsed JSON values or
+    raw JSON lines.
+
+    At most ``chunk_size`` validated rows are held in memory at a time. Once
+    ``max_rows`` rows have been read the rest of the input is ignored and
+    reported as a single error.
+    """
+    result = IngestResult()
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    async for row in rows:
+        number = result.received
+        if max_rows is not None and number >= max_rows:
+            result.fail(number, f"Too many rows; at most {max_rows} are accepted per request, the rest were ignored")
+            break
+        result.received += 1
+        try:
+            chunk.append((number, validate_row(row)))
+        except ValueError as e:
+            result.fail(number, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            await write_chunk(db, user_id, chunk, result)
+            chunk = []
+    if chunk:
+        await write_chunk(db, user_id, chunk, result)
+    return result
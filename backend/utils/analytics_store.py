@@ -0,0 +1,124 @@
+"""
+Storage layout of the raw analytics rows.
+
+By default ANALYTICS_COLLECTION is a plain collection of flat documents. With
+ANALYTICS_TIMESERIES enabled it is a MongoDB time-series collection (5.0+)
+with ``date`` as the timeField and ``{user_id, platform}`` as the metaField,
+which MongoDB buckets and compresses per series. Code that reads or writes raw
+rows goes through the helpers here so it works with either layout:
+``to_storage``/``from_storage`` convert documents and ``storage_query``/
+``field_ref`` rewrite filters and aggregation field paths.
+
+Existing data is moved over with ``python migrate_analytics_timeseries.py``.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import settings
+from database import ANALYTICS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+TIME_FIELD = "date"
+META_FIELD = "meta"
+META_KEYS = ("user_id", "platform")
+
+# Rows are daily metrics, so hour-sized buckets keep each series compact
+TIMESERIES_OPTIONS = {"timeField": TIME_FIELD, "metaField": META_FIELD, "granularity": "hours"}
+
+# Time-series collections only accept deletes filtering on fields other than
+# the metaField, such as _id, from this server version on
+TIMESERIES_DELETE_VERSION = (7, 0)
+
+_server_version: Optional[Tuple[int, ...]] = None
+
+
+def _timeseries(timeseries: Optional[bool]) -> bool:
+    return settings.ANALYTICS_TIMESERIES if timeseries is None else timeseries
+
+
+def storage_field(name: str, timeseries: Optional[bool] = None) -> str:
+    """Stored path of a flat analytics field."""
+    return f"{META_FIELD}.{name}" if _timeseries(timeseries) and name in META_KEYS else name
+
+
+def field_ref(name: str, timeseries: Optional[bool] = None) -> str:
+    """Aggregation expression referencing a flat analytics field."""
+    return "$" + storage_field(name, timeseries)
+
+
+def storage_query(query: Dict[str, Any], timeseries: Optional[bool] = None) -> Dict[str, Any]:
+    """Rewrite a filter on flat fields for the stored layout."""
+    rewritten = {}
+    for key, value in query.items():
+        if key in ("$and", "$or", "$nor"):
+            rewritten[key] = [storage_query(clause, timeseries) for clause in value]
+        else:
+            rewritten[storage_field(key, timeseries)] = value
+    return rewritten
+
+
+def to_storage(document: Dict[str, Any], timeseries: Optional[bool] = None) -> Dict[str, Any]:
+    """Stored form of a flat analytics row."""
+    if not _timeseries(timeseries):
+        return from_storage(document)
+    stored = {key: value for key, value in document.items() if key not in META_KEYS}
+    meta = dict(document.get(META_FIELD) or {})
+    meta.update({key: document[key] for key in META_KEYS if key in document})
+    stored[META_FIELD] = meta
+    return stored
+
+
+def from_storage(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Flat form of a stored analytics row, whichever layout it was stored in."""
+    if META_FIELD not in document:
+        return document
+    flat = {key: value for key, value in document.items() if key != META_FIELD}
+    flat.update(document[META_FIELD] or {})
+    return flat
+
+
+async def is_timeseries_collection(db, name: str = ANALYTICS_COLLECTION) -> Optional[bool]:
+    """Whether a collection is a time-series collection, or None if it does not exist."""
+    collections = await db.list_collections(filter={"name": name}).to_list(length=1)
+    if not collections:
+        return None
+    return collections[0].get("type") == "timeseries"
+
+
+async def ensure_analytics_collection(db, report: Optional[Callable[[str], None]] = None):
+    """
+    Create the analytics collection as a time-series collection when that mode
+    is enabled and it does not exist yet.
+
+    An existing plain collection is left alone: moving its data is the
+    migration's job, and dropping it here would lose history.
+    """
+    report = report or logger.info
+    if not settings.ANALYTICS_TIMESERIES:
+        return
+
+    current = await is_timeseries_collection(db)
+    if current is None:
+        await db.create_collection(ANALYTICS_COLLECTION, timeseries=TIMESERIES_OPTIONS)
+        report(f"  {ANALYTICS_COLLECTION}: created time-series collection")
+    elif not current:
+        report(
+            f"  {ANALYTICS_COLLECTION}: ANALYTICS_TIMESERIES is enabled but the collection is not "
+            f"time-series; run migrate_analytics_timeseries.py"
+        )
+
+
+async def server_version(db) -> Tuple[int, ...]:
+    """The MongoDB server version, read once per process."""
+    global _server_version
+    if _server_version is None:
+        info = await db.client.server_info()
+        _server_version = tuple(info.get("versionArray", [0])[:2])
+    return _server_version
+
+
+async def supports_row_deletes(db, timeseries: Optional[bool] = None) -> bool:
+    """Whether individual raw rows can be deleted by _id in the stored layout."""
+    return not _timeseries(timeseries) or await server_version(db) >= TIMESERIES_DELETE_VERSION
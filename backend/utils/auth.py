@@ -1,16 +1,36 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import random
 import string
+import time
+import uuid
 from config import settings
+from database import get_database, REVOKED_TOKENS_COLLECTION
+from .cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes made with a different cost than BCRYPT_ROUNDS are
+# reported by needs_update, so they get rehashed on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt is CPU bound; run it on a bounded pool instead of the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -23,6 +43,39 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password executor.
+
+    Returns:
+        Tuple of (is_valid, new_hash). new_hash is set when the stored hash uses
+        an outdated scheme or cost and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+# Decoded claims keyed by token; each entry expires with the token itself
+token_claims_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
+# Revocations are stored in MongoDB so every worker sees them. Each worker
+# caches the answers briefly: token keys map to whether the token is revoked,
+# user keys to the time before which all of the user's tokens are invalid
+# (0.0 if never). A revocation made on another worker takes effect here once
+# the cached answer expires.
+_revocation_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.REVOCATION_CACHE_TTL_SECONDS
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -31,21 +84,111 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify and decode a JWT token."""
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+async def decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Return the claims of a valid, unrevoked token, decoding each token only once while it is valid."""
+    claims = token_claims_cache.get(token)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
             return None
-        return email
-    except JWTError:
+        if claims.get("sub") is None:
+            return None
+        token_claims_cache.set(token, claims, ttl=claims.get("exp", 0) - time.time())
+    
+    if await is_token_revoked(token, claims):
         return None
+    return claims
+
+
+async def verify_token(token: str) -> Optional[str]:
+    """Verify and decode a JWT token."""
+    claims = await decode_token(token)
+    if claims is None:
+        return None
+    return claims["sub"]
+
+
+def _token_key(token: str, claims: Dict[str, Any]) -> str:
+    """Revocation key of a token; tokens issued before they carried a jti are keyed by their digest."""
+    return f"token:{claims.get('jti') or hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def _user_key(email: str) -> str:
+    return f"user:{email}"
+
+
+async def is_token_revoked(token: str, claims: Dict[str, Any]) -> bool:
+    """
+    Whether the token was revoked directly or by revoking all of its user's tokens.
+
+    If the revocations cannot be read, only what this worker already knows
+    is applied, so a database outage does not log everyone out.
+    """
+    token_key, user_key = _token_key(token, claims), _user_key(claims.get("sub"))
+    revoked = _revocation_cache.get(token_key)
+    revoked_at = _revocation_cache.get(user_key)
+    if revoked is None or revoked_at is None:
+        try:
+            db = get_database()
+            documents = await db[REVOKED_TOKENS_COLLECTION].find(
+                {"_id": {"$in": [token_key, user_key]}}
+            ).to_list(length=2)
+        except Exception as e:
+            logger.error(f"Error reading token revocations: {e}")
+        else:
+            found = {document["_id"]: document for document in documents}
+            revoked = token_key in found
+            revoked_at = found.get(user_key, {}).get("revoked_at", 0.0)
+            # A revoked token stays revoked, so that answer is kept for the token's lifetime
+            _revocation_cache.set(token_key, revoked, ttl=claims.get("exp", 0) - time.time() if revoked else None)
+            _revocation_cache.set(user_key, revoked_at)
+
+    return bool(revoked) or claims.get("iat", 0) < (revoked_at or 0.0)
+
+
+async def revoke_token(token: str):
+    """Revoke a single token, e.g. on logout."""
+    claims = token_claims_cache.get(token)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
+            return
+    token_claims_cache.invalidate(token)
+
+    key = _token_key(token, claims)
+    expires_at = claims.get("exp", time.time())
+    _revocation_cache.set(key, True, ttl=expires_at - time.time())
+    # The server removes the entry once the token would have expired anyway
+    db = get_database()
+    await db[REVOKED_TOKENS_COLLECTION].update_one(
+        {"_id": key},
+        {"$set": {"expires_at": datetime.utcfromtimestamp(expires_at)}},
+        upsert=True
+    )
+
+
+async def revoke_user_tokens(email: str):
+    """Revoke every token issued to a user up to now, e.g. on password change."""
+    now = time.time()
+    key = _user_key(email)
+    _revocation_cache.set(key, now)
+    # Kept until every token issued before now has expired
+    db = get_database()
+    await db[REVOKED_TOKENS_COLLECTION].update_one(
+        {"_id": key},
+        {"$set": {
+            "revoked_at": now,
+            "expires_at": datetime.utcfromtimestamp(now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        }},
+        upsert=True
+    )
 
 
 def generate_otp(length: int = 6) -> str:
@@ -0,0 +1,273 @@
+"""
+Per-user change sequences for delta sync.
+
+Every write to a user's posts takes the next number from a per-user counter
+and stamps it on the documents it touches as ``change_seq``. Deleted posts
+leave a tombstone carrying their own sequence number, so a client that knows
+the last sequence it has seen can ask for exactly what changed since then.
+
+A sequence number is allocated before the write that carries it commits, so
+for a moment a higher number can be visible while a lower one is still in
+flight. Writers therefore take their stamp through ``post_change``, which
+records the sequence as pending in the same update that allocates it and
+clears it once the write is done; sync cursors never advance past the lowest
+pending sequence. A pending sequence whose writer died is given up after
+CHANGE_LEASE_SECONDS.
+
+The same per-user counter document also versions the user's analytics and
+platform connections, which is what conditional GETs derive their ETags from.
+Versions only move once a write has committed, so nothing read before a write
+is ever served under the version that follows it. Posts are versioned by the
+count of finished writes rather than by the sequence, which is allocated
+before the write.
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import settings
+from database import POSTS_COLLECTION, CHANGE_COUNTERS_COLLECTION, POST_TOMBSTONES_COLLECTION
+from .pagination import encode_cursor, decode_cursor, clamp_page_size, InvalidCursorError
+
+POSTS_SCOPE = "posts"
+ANALYTICS_SCOPE = "analytics"
+PLATFORMS_SCOPE = "platforms"
+
+# Counter field listing the user's allocated but uncommitted post sequences
+PENDING_FIELD = "posts_pending"
+
+# Counter fields holding a scope's version where it is not the scope's own counter
+VERSION_FIELDS = {POSTS_SCOPE: "posts_committed"}
+
+# Longest a writer may hold a sequence before it is presumed to have died
+CHANGE_LEASE_SECONDS = 600
+
+# Seconds a client waits before polling again when a page ends at a pending change
+PENDING_RETRY_SECONDS = 1
+
+
+def _user_object_id(user_id) -> ObjectId:
+    return user_id if isinstance(user_id, ObjectId) else ObjectId(user_id)
+
+
+async def next_change_seq(db, user_id, scope: str = POSTS_SCOPE) -> int:
+    """
+    Allocate the next change sequence number for one of a user's scopes.
+
+    For analytics and platforms this is the scope's version, so call it after
+    the write has committed; posts go through ``post_change``.
+    """
+    counter = await db[CHANGE_COUNTERS_COLLECTION].find_one_and_update(
+        {"_id": _user_object_id(user_id)},
+        {"$inc": {scope: 1}},
+        projection={scope: 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter[scope]
+
+
+async def change_versions(db, user_id, scopes: Sequence[str]) -> Dict[str, int]:
+    """Current version of each scope, read in one lookup."""
+    fields = {scope: VERSION_FIELDS.get(scope, scope) for scope in scopes}
+    counter = await db[CHANGE_COUNTERS_COLLECTION].find_one(
+        {"_id": _user_object_id(user_id)}, {field: 1 for field in fields.values()}
+    )
+    return {scope: (counter or {}).get(field, 0) for scope, field in fields.items()}
+
+
+async def begin_post_change(db, user_id) -> Dict[str, Any]:
+    """
+    Allocate a change stamp for a write to a user's posts and record it as pending.
+
+    Prefer ``post_change``; a stamp taken here must be passed to
+    ``end_post_change`` once the write is done.
+    """
+    user_id = _user_object_id(user_id)
+    counters = db[CHANGE_COUNTERS_COLLECTION]
+    while True:
+        now = datetime.utcnow()
+        counter = await counters.find_one({"_id": user_id}, {POSTS_SCOPE: 1, PENDING_FIELD: 1}) or {}
+        if any(entry["expires_at"] <= now for entry in counter.get(PENDING_FIELD, [])):
+            await counters.update_one(
+                {"_id": user_id}, {"$pull": {PENDING_FIELD: {"expires_at": {"$lte": now}}}}
+            )
+
+        # Allocate and mark pending in one update, retried if another writer got there first
+        current = counter.get(POSTS_SCOPE)
+        seq = (current or 0) + 1
+        try:
+            result = await counters.update_one(
+                {"_id": user_id, POSTS_SCOPE: current if current is not None else {"$exists": False}},
+                {
+                    "$set": {POSTS_SCOPE: seq},
+                    "$push": {PENDING_FIELD: {
+                        "seq": seq, "expires_at": now + timedelta(seconds=CHANGE_LEASE_SECONDS)
+                    }}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            continue
+        if result.matched_count or result.upserted_id is not None:
+            return {"change_seq": seq, "changed_at": now}
+
+
+async def end_post_change(db, user_id, stamp: Dict[str, Any]):
+    """
+    Clear a stamp's pending sequence once its write has committed or failed,
+    and move the posts version on.
+    """
+    await db[CHANGE_COUNTERS_COLLECTION].update_one(
+        {"_id": _user_object_id(user_id)},
+        {
+            "$pull": {PENDING_FIELD: {"seq": stamp["change_seq"]}},
+            "$inc": {VERSION_FIELDS[POSTS_SCOPE]: 1}
+        }
+    )
+
+
+@asynccontextmanager
+async def post_change(db, user_id):
+    """
+    Change stamp for one write to a user's posts.
+
+    Yields the fields to ``$set`` on (or insert with) the written posts; the
+    write must happen inside the block, which keeps the sequence pending::
+
+        async with post_change(db, user_id) as stamp:
+            await db[POSTS_COLLECTION].update_one(query, {"$set": {**fields, **stamp}})
+    """
+    stamp = await begin_post_change(db, user_id)
+    try:
+        yield stamp
+    finally:
+        await end_post_change(db, user_id, stamp)
+
+
+async def committed_change_seq(db, user_id, now: Optional[datetime] = None) -> int:
+    """Highest post sequence at or below which no write is still in flight."""
+    now = now or datetime.utcnow()
+    counter = await db[CHANGE_COUNTERS_COLLECTION].find_one(
+        {"_id": _user_object_id(user_id)}, {POSTS_SCOPE: 1, PENDING_FIELD: 1}
+    ) or {}
+    pending = [entry["seq"] for entry in counter.get(PENDING_FIELD, []) if entry["expires_at"] > now]
+    return min(pending) - 1 if pending else counter.get(POSTS_SCOPE, 0)
+
+
+async def record_post_deletions(db, user_id, post_ids: List[ObjectId]):
+    """Leave tombstones for deleted posts so delta sync can report them."""
+    if not post_ids:
+        return
+    async with post_change(db, user_id) as stamp:
+        await db[POST_TOMBSTONES_COLLECTION].insert_many([
+            {"user_id": _user_object_id(user_id), "post_id": post_id, **stamp}
+            for post_id in post_ids
+        ])
+
+
+def encode_sync_cursor(seq: int, issued_at: Optional[datetime] = None) -> str:
+    return encode_cursor([seq, issued_at or datetime.utcnow()])
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[int, datetime]:
+    seq, issued_at = decode_cursor(cursor)
+    if not isinstance(seq, int) or not isinstance(issued_at, datetime):
+        raise InvalidCursorError("Invalid cursor")
+    return seq, issued_at.replace(tzinfo=None)
+
+
+async def fetch_post_changes(db, user_id, cursor: Optional[str], limit: Optional[int],
+                             projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Posts changed and deleted since a sync cursor.
+
+    Without a cursor nothing is returned except a cursor at the user's current
+    sequence: clients load the full list once, then poll for changes from there.
+    A cursor older than the tombstone retention window yields ``reset`` so the
+    client reloads the full list instead of missing deletions.
+
+    Changes above a sequence whose write is still in flight are returned but
+    the cursor stays before them. ``has_more`` is then false even if more
+    changes are stored, since polling again straight away would only return the
+    same page; ``retry_after`` gives the seconds to wait before polling again.
+
+    Returns:
+        Dict with changed ``posts``, ``deleted`` post ids, the next ``cursor``,
+        ``has_more``, ``retry_after`` (seconds or None) and ``reset``
+    """
+    user_id = _user_object_id(user_id)
+    now = datetime.utcnow()
+    retention = timedelta(days=settings.POST_TOMBSTONE_RETENTION_DAYS)
+
+    since, issued_at = (None, None) if not cursor else decode_sync_cursor(cursor)
+    # Read before the changes: anything at or below it that is not stored yet never will be
+    committed = await committed_change_seq(db, user_id, now)
+    if since is None or issued_at < now - retention:
+        return {
+            "posts": [],
+            "deleted": [],
+            "cursor": encode_sync_cursor(committed, now),
+            "has_more": False,
+            "retry_after": None,
+            "reset": since is not None
+        }
+
+    limit = clamp_page_size(limit)
+    query = {"user_id": user_id, "change_seq": {"$gt": since}}
+    sort = [("change_seq", 1), ("_id", 1)]
+    if projection is not None:
+        projection = {**projection, "change_seq": 1, "changed_at": 1}
+
+    # Read one past the page from both streams so a page boundary can be detected
+    posts = await db[POSTS_COLLECTION].find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+    tombstones = await db[POST_TOMBSTONES_COLLECTION].find(
+        query, {"post_id": 1, "change_seq": 1, "changed_at": 1}
+    ).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+
+    changes = sorted(
+        [(post["change_seq"], "post", post) for post in posts]
+        + [(tombstone["change_seq"], "deleted", tombstone) for tombstone in tombstones],
+        key=lambda change: change[0]
+    )
+    has_more = len(changes) > limit
+    if has_more:
+        # Never split one write's changes across pages
+        boundary = changes[limit][0]
+        changes = [change for change in changes[:limit] if change[0] != boundary]
+        if not changes:
+            # A single write larger than a page is returned whole
+            changes = await _whole_sequence(db, user_id, boundary, projection)
+
+    # Only advance past changes no lower in-flight sequence can still land under
+    next_seq = since
+    retry_after = None
+    for seq, _, _ in changes:
+        if seq > committed:
+            has_more = False
+            retry_after = PENDING_RETRY_SECONDS
+            break
+        next_seq = seq
+
+    return {
+        "posts": [document for _, kind, document in changes if kind == "post"],
+        "deleted": [str(document["post_id"]) for _, kind, document in changes if kind == "deleted"],
+        "cursor": encode_sync_cursor(next_seq, now),
+        "has_more": has_more,
+        "retry_after": retry_after,
+        "reset": False
+    }
+
+
+async def _whole_sequence(db, user_id: ObjectId, seq: int, projection: Optional[Dict[str, Any]]):
+    query = {"user_id": user_id, "change_seq": seq}
+    posts = await db[POSTS_COLLECTION].find(query, projection).to_list(length=None)
+    tombstones = await db[POST_TOMBSTONES_COLLECTION].find(
+        query, {"post_id": 1, "change_seq": 1, "changed_at": 1}
+    ).to_list(length=None)
+    return [(seq, "post", post) for post in posts] + [(seq, "deleted", tombstone) for tombstone in tombstones]
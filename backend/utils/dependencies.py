@@ -0,0 +1,57 @@
+"""
+Shared FastAPI dependencies.
+"""
+
+import logging
+from typing import Dict, Any
+
+from fastapi import HTTPException, status, Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from config import settings
+from database import get_database, USERS_COLLECTION
+from .auth import verify_token
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+security = HTTPBearer()
+
+# User documents keyed by email, so authenticated requests skip the users lookup
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(email: str):
+    """Drop a user from the cache after their document changed."""
+    user_cache.invalidate(email)
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    """Resolve the bearer token to the user document, served from cache when possible."""
+    email = await verify_token(credentials.credentials)
+    if not email:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    user = user_cache.get(email)
+    if user is None:
+        try:
+            db = get_database()
+            user = await db[USERS_COLLECTION].find_one({"email": email})
+        except Exception as e:
+            logger.error(f"Error loading user {email}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Database service unavailable"
+            )
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        user_cache.set(email, user)
+
+    # Handlers get their own copy so they cannot mutate the cached document
+    return dict(user)
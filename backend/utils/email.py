@@ -5,6 +5,8 @@ from config import settings
 import logging
 from jinja2 import Template
 
+from utils.resilience import smtp_breaker
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,7 +21,8 @@ async def send_email(to_email: str, subject: str, html_content: str) -> bool:
         html_part = MIMEText(html_content, "html")
         message.attach(html_part)
 
-        await aiosmtplib.send(
+        await smtp_breaker.call(
+            aiosmtplib.send,
             message,
             hostname=settings.smtp_server,
             port=settings.smtp_port,
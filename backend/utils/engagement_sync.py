@@ -0,0 +1,288 @@
+"""
+Background sync of post engagement from the platforms.
+
+Published posts are polled for likes, comments, shares and impressions, and
+the totals are stored in ``engagement_data``, which the analytics endpoints
+sort on. How often a post is polled depends on its age: fresh posts change
+quickly and are polled every few minutes, while month-old posts are polled
+weekly. When more posts are due than one run handles, never-polled posts go
+first, then the ones that have been due the longest, so none starve.
+
+Each run groups the due posts by (user, platform) and asks each adapter for
+the metrics of up to ``metrics_batch_size`` posts per call, so a run costs
+roughly one platform request per account and platform, not one per post.
+All updates are written with a single unordered ``bulk_write``, and the
+change in counts is folded into the posting-time heatmaps (utils/heatmap.py).
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from config import settings
+from database import get_database, POSTS_COLLECTION, PLATFORM_CONNECTIONS_COLLECTION
+from utils.changes import post_change
+from utils.heatmap import heatmap_operations, apply_heatmap
+from utils.publishers import publish_dispatcher, DELIVERY_POSTED, get_delivery
+
+logger = logging.getLogger(__name__)
+
+# (post age up to, poll interval), checked in order
+POLL_TIERS = [
+    (timedelta(hours=6), timedelta(minutes=15)),
+    (timedelta(days=2), timedelta(hours=1)),
+    (timedelta(days=7), timedelta(hours=6)),
+    (timedelta(days=30), timedelta(days=1)),
+]
+OLD_POST_POLL_INTERVAL = timedelta(days=7)
+
+# Posts whose platform call failed are retried sooner than their tier would
+FAILED_POLL_INTERVAL = timedelta(minutes=15)
+
+ENGAGEMENT_COUNTS = ("likes", "comments", "shares", "impressions")
+
+SYNC_PROJECTION = {
+    "user_id": 1, "platforms": 1, "deliveries": 1, "posted_at": 1,
+    "linkedin_post_id": 1, "engagement_data": 1
+}
+
+GroupKey = Tuple[Any, str]
+
+
+def poll_interval(post: Dict[str, Any], now: datetime) -> timedelta:
+    """How long to wait before polling a post again, given its age."""
+    try:
+        age = now - datetime.fromisoformat(post["posted_at"])
+    except (KeyError, TypeError, ValueError):
+        return OLD_POST_POLL_INTERVAL
+    for max_age, interval in POLL_TIERS:
+        if age <= max_age:
+            return interval
+    return OLD_POST_POLL_INTERVAL
+
+
+def remote_post_ids(post: Dict[str, Any]) -> Dict[str, str]:
+    """Remote id of the post on each platform it was delivered to."""
+    remote_ids = {}
+    for platform in post.get("platforms", []):
+        delivery = get_delivery(post, platform)
+        remote_id = delivery.get("remote_id") if delivery.get("state") == DELIVERY_POSTED else None
+        # Posts published before per-platform deliveries only kept the LinkedIn id
+        if not remote_id and platform == "linkedin":
+            remote_id = post.get("linkedin_post_id")
+        if remote_id:
+            remote_ids[platform] = remote_id
+    return remote_ids
+
+
+def build_engagement(previous: Optional[Dict[str, Any]], fetched: Dict[str, Dict[str, int]],
+                     now: datetime) -> Dict[str, Any]:
+    """
+    ``engagement_data`` for a post from freshly fetched per-platform counts.
+    Platforms that were not fetched this time keep their previous counts.
+    """
+    platforms = dict((previous or {}).get("platforms") or {})
+    platforms.update(fetched)
+    totals = {name: sum(counts.get(name, 0) for counts in platforms.values()) for name in ENGAGEMENT_COUNTS}
+    total_engagement = totals["likes"] + totals["comments"] + totals["shares"]
+    return {
+        **totals,
+        "total_engagement": total_engagement,
+        "engagement_rate": round(total_engagement / totals["impressions"] * 100, 2) if totals["impressions"] else 0.0,
+        "platforms": platforms,
+        "updated_at": now.isoformat()
+    }
+
+
+class EngagementSyncWorker:
+    def __init__(self, check_interval: int = settings.ENGAGEMENT_SYNC_INTERVAL_SECONDS,
+                 max_posts: int = settings.ENGAGEMENT_SYNC_MAX_POSTS, concurrency: int = 8):
+        self.is_running = False
+        self.check_interval = check_interval
+        self.max_posts = max_posts
+        self.concurrency = concurrency
+        self.synced_posts = 0
+        self.platform_calls = 0
+        self.failed_calls = 0
+        self.last_run_at: Optional[str] = None
+
+    async def start(self):
+        """Start the sync loop."""
+        if self.is_running:
+            logger.warning("Engagement sync is already running")
+            return
+
+        self.is_running = True
+        logger.info("Starting engagement sync...")
+
+        while self.is_running:
+            try:
+                await self.sync_due_posts()
+            except Exception as e:
+                logger.error(f"Error in engagement sync loop: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def stop(self):
+        """Stop the sync loop."""
+        self.is_running = False
+        logger.info("Stopping engagement sync...")
+
+    async def sync_due_posts(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Poll the platforms for every post that is due and store the results.
+
+        Returns:
+            Counts of posts synced and platform calls made and failed in this run
+        """
+        db = get_database()
+        now = now or datetime.now()
+
+        posts = await db[POSTS_COLLECTION].find({
+            "status": "posted",
+            "$or": [
+                {"engagement_next_sync_at": None},
+                {"engagement_next_sync_at": {"$lte": now.isoformat()}}
+            ]
+        }, SYNC_PROJECTION).sort("engagement_next_sync_at", 1).limit(self.max_posts).to_list(length=None)
+        if not posts:
+            return {"posts": 0, "calls": 0, "failed_calls": 0}
+
+        # (user, platform) -> remote id -> post id
+        groups: Dict[GroupKey, Dict[str, Any]] = defaultdict(dict)
+        for post in posts:
+            for platform, remote_id in remote_post_ids(post).items():
+                groups[(post["user_id"], platform)][remote_id] = post["_id"]
+
+        connections = await self._get_connections({user_id for user_id, _ in groups})
+        run = {"calls": 0, "failed_calls": 0}
+        fetched: Dict[Any, Dict[str, Dict[str, int]]] = defaultdict(dict)
+        failed: Dict[Any, List[str]] = defaultdict(list)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def sync_group(key: GroupKey, remote_ids: Dict[str, Any]):
+            user_id, platform = key
+            metrics, failed_ids = await self._fetch_group(
+                user_id, platform, list(remote_ids), connections.get(key), semaphore, run
+            )
+            for remote_id, post_id in remote_ids.items():
+                if remote_id in failed_ids:
+                    failed[post_id].append(platform)
+                elif remote_id in metrics:
+                    fetched[post_id][platform] = metrics[remote_id]
+
+        await asyncio.gather(*[sync_group(key, remote_ids) for key, remote_ids in groups.items()])
+
+        stamps: Dict[Any, Dict[str, Any]] = {}
+        operations = []
+        changed = []
+        # Every changed user's stamp stays pending until the bulk write is done
+        async with AsyncExitStack() as pending_stamps:
+            for post in posts:
+                interval = poll_interval(post, now)
+                if failed.get(post["_id"]):
+                    interval = min(interval, FAILED_POLL_INTERVAL)
+                update = {
+                    "engagement_synced_at": now.isoformat(),
+                    "engagement_next_sync_at": (now + interval).isoformat()
+                }
+
+                previous = post.get("engagement_data") or {}
+                engagement = build_engagement(previous, fetched.get(post["_id"], {}), now)
+                if engagement["platforms"] != (previous.get("platforms") or {}):
+                    # Only real changes count as post writes for delta sync and ETags
+                    if post["user_id"] not in stamps:
+                        stamps[post["user_id"]] = await pending_stamps.enter_async_context(
+                            post_change(db, post["user_id"])
+                        )
+                    update["engagement_data"] = engagement
+                    update.update(stamps[post["user_id"]])
+                    changed.append((post, previous.get("platforms") or {}, engagement["platforms"]))
+                operations.append(UpdateOne({"_id": post["_id"]}, {"$set": update}))
+
+            await db[POSTS_COLLECTION].bulk_write(operations, ordered=False)
+        await apply_heatmap(db, heatmap_operations(changed))
+
+        self.synced_posts += len(posts)
+        self.platform_calls += run["calls"]
+        self.failed_calls += run["failed_calls"]
+        self.last_run_at = now.isoformat()
+        logger.info(
+            f"Engagement sync: {len(posts)} posts, {len(stamps)} users changed, "
+            f"{run['calls']} platform calls ({run['failed_calls']} failed)"
+        )
+        return {"posts": len(posts), **run}
+
+    async def _get_connections(self, user_ids: Iterable[Any]) -> Dict[GroupKey, Dict[str, Any]]:
+        """Connected accounts of all users in the run, in one query."""
+        db = get_database()
+        connections = await db[PLATFORM_CONNECTIONS_COLLECTION].find({
+            "user_id": {"$in": list(user_ids)},
+            "is_connected": True
+        }).to_list(length=None)
+        return {(connection["user_id"], connection["platform"]): connection for connection in connections}
+
+    async def _fetch_group(self, user_id, platform: str, remote_ids: List[str],
+                           connection: Optional[Dict[str, Any]], semaphore: asyncio.Semaphore,
+                           run: Dict[str, int]) -> Tuple[Dict[str, Dict[str, int]], Set[str]]:
+        """
+        Metrics of one account's posts on one platform, in batched calls.
+
+        Returns:
+            Tuple of (remote id -> counts, remote ids whose call failed and
+            should be retried soon). Platforms that cannot be polled at all
+            return neither.
+        """
+        publisher = publish_dispatcher.get_publisher(platform)
+        if publisher is None or not connection:
+            return {}, set()
+
+        try:
+            access_token = await publisher.get_access_token(user_id, connection)
+        except Exception as e:
+            logger.error(f"Error getting {platform} token for engagement sync of user {user_id}: {e}")
+            return {}, set(remote_ids)
+        if not access_token:
+            return {}, set()
+
+        metrics: Dict[str, Dict[str, int]] = {}
+        failed_ids: Set[str] = set()
+        batch_size = publisher.metrics_batch_size
+        for offset in range(0, len(remote_ids), batch_size):
+            batch = remote_ids[offset:offset + batch_size]
+            async with semaphore:
+                run["calls"] += 1
+                try:
+                    metrics.update(await publisher.fetch_metrics(batch, connection, access_token))
+                except NotImplementedError:
+                    return {}, set()
+                except Exception as e:
+                    run["failed_calls"] += 1
+                    failed_ids.update(batch)
+                    logger.error(f"Error fetching {platform} engagement for user {user_id}: {e}")
+        return metrics, failed_ids
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "synced_posts": self.synced_posts,
+            "platform_calls": self.platform_calls,
+            "failed_calls": self.failed_calls,
+            "last_run_at": self.last_run_at
+        }
+
+
+# Global engagement sync worker
+engagement_sync = EngagementSyncWorker()
+
+
+async def start_engagement_sync():
+    await engagement_sync.start()
+
+
+async def stop_engagement_sync():
+    await engagement_sync.stop()
@@ -0,0 +1,65 @@
+"""
+Conditional GET support.
+
+A resource's ETag is derived from the user's change versions (see
+utils.changes) and the request URL, so it is known after one small lookup,
+before any of the resource's own queries run. A client presenting the current
+ETag in If-None-Match gets a bodyless 304.
+
+Versions only move after a write has committed. A request racing a write may
+therefore send new data under the old ETag, which costs the client one extra
+full response later, but never old data under the new one.
+"""
+
+import hashlib
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response, status
+
+from .changes import change_versions
+
+# Clients may keep a copy but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of ``etag`` against the request's If-None-Match header."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(tag.strip()) for tag in header.split(",")}
+
+
+async def resource_etag(db, user_id, scopes: Sequence[str], request: Request, *extra: Any) -> str:
+    """ETag for a user's resource built from the given change scopes."""
+    versions = await change_versions(db, user_id, scopes)
+    parts = [str(user_id), request.url.path, str(sorted(request.query_params.multi_items()))]
+    parts += [f"{scope}={versions[scope]}" for scope in scopes]
+    parts += [str(value) for value in extra]
+    return f'W/"{hashlib.sha1("|".join(parts).encode()).hexdigest()}"'
+
+
+async def check_not_modified(request: Request, response: Response, db, user_id,
+                             scopes: Sequence[str], *extra: Any) -> Optional[Response]:
+    """
+    Validate the request's If-None-Match against the resource's current ETag.
+
+    Returns:
+        A 304 response if the client's copy is current; otherwise None, with
+        the ETag set on ``response`` for the full response
+    """
+    etag = await resource_etag(db, user_id, scopes, request, *extra)
+    if etag_matches(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
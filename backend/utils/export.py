@@ -0,0 +1,97 @@
+"""
+Streaming export helpers.
+
+Documents are read from a Motor cursor in batches and encoded chunk by chunk,
+so an export holds at most one batch in memory regardless of its size.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _batched(cursor, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch = []
+    async for document in cursor.batch_size(batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_ndjson(cursor, serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+                        batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    async for batch in _batched(cursor, batch_size):
+        yield "".join(json.dumps(serialize(document), default=_json_default) + "\n" for document in batch)
+
+
+async def stream_csv(cursor, columns: List[str], serialize: Callable[[Dict[str, Any]], Dict[str, Any]],
+                     batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for batch in _batched(cursor, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for document in batch:
+            row = serialize(document)
+            writer.writerow([_csv_value(row.get(column)) for column in columns])
+        yield buffer.getvalue()
+
+
+def export_response(cursor, export_format: str, filename: str, columns: List[str],
+                    serialize: Callable[[Dict[str, Any]], Dict[str, Any]]) -> StreamingResponse:
+    """Stream a cursor as an NDJSON or CSV download."""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format. Use one of: {', '.join(EXPORT_MEDIA_TYPES)}"
+        )
+
+    if export_format == "csv":
+        body = stream_csv(cursor, columns, serialize)
+    else:
+        body = stream_ndjson(cursor, serialize)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
@@ -0,0 +1,166 @@
+"""
+Growth analytics over the daily rollups, computed with NumPy.
+
+MongoDB returns a user's rollups as parallel columns (platform index, day
+offset and metrics) in a single document. NumPy lays those out on a dense
+(platform x calendar day) grid, so every metric is an array operation over at
+most a few thousand cells, however long the window:
+totals, per-day engagement rates, a trailing rolling average, and period-over-
+period and week-over-week changes. Days without a rollup count as zero
+engagement. Follower counts carry over from the last day that has one.
+
+The grid covers the requested window plus the one before it, which the
+period-over-period change and the first rolling averages need.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+
+from database import ANALYTICS_DAILY_COLLECTION
+from .analytics import window_start, SUMMARY_PLATFORMS
+
+ROLLING_DAYS = 7
+WEEK_DAYS = 7
+
+# Rollup fields laid out on the grid
+GRID_FIELDS = ("followers_max", "engagement", "engagement_rate_sum", "engagement_rate_count")
+
+
+def growth_span(days: int) -> int:
+    """Calendar days of rollups needed for a ``days``-day growth report."""
+    return max(2 * days, days + ROLLING_DAYS - 1, 2 * WEEK_DAYS)
+
+
+def _percent_change(current: float, previous: float) -> Optional[float]:
+    return round(float((current - previous) / previous * 100), 2) if previous else None
+
+
+def _trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each cell and the ``window - 1`` cells before it, along the last axis."""
+    sums = np.cumsum(values, axis=-1, dtype=float)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    counts = np.minimum(np.arange(1, values.shape[-1] + 1), window)
+    return sums / counts
+
+
+def _carry_forward(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Each cell replaced by the value of the last present cell at or before it (0 before the first)."""
+    index = np.where(present, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(index, axis=-1, out=index)
+    filled = np.take_along_axis(values, index, axis=-1)
+    return np.where(np.logical_or.accumulate(present, axis=-1), filled, 0)
+
+
+def growth_pipeline(user_id: ObjectId, start: datetime, end_date: datetime,
+                    platforms: List[str] = SUMMARY_PLATFORMS) -> List[Dict[str, Any]]:
+    """
+    Aggregation returning a user's rollups from ``start`` on as one document
+    of parallel columns: platform index, day offset from ``start`` and the
+    grid fields.
+    """
+    return [
+        {"$match": {"user_id": user_id, "platform": {"$in": platforms}, "day": {"$gte": start, "$lte": end_date}}},
+        {"$group": {
+            "_id": None,
+            "platform": {"$push": {"$indexOfArray": [platforms, "$platform"]}},
+            "offset": {"$push": {"$toInt": {"$divide": [{"$subtract": ["$day", start]}, 86400000]}}},
+            **{field: {"$push": {"$ifNull": [f"${field}", 0]}} for field in GRID_FIELDS}
+        }}
+    ]
+
+
+def growth_grid(columns: Dict[str, list], span: int, platform_count: int) -> Dict[str, np.ndarray]:
+    """Lay the columns of ``growth_pipeline`` out as (platform, day) arrays of ``span`` days."""
+    rows = np.asarray(columns.get("platform", []), dtype=np.int64)
+    offsets = np.asarray(columns.get("offset", []), dtype=np.int64)
+    keep = (offsets >= 0) & (offsets < span)
+    rows, offsets = rows[keep], offsets[keep]
+
+    grid = {"present": np.zeros((platform_count, span), dtype=bool)}
+    grid["present"][rows, offsets] = True
+    for field in GRID_FIELDS:
+        grid[field] = np.zeros((platform_count, span), dtype=float)
+        grid[field][rows, offsets] = np.asarray(columns.get(field, []), dtype=float)[keep]
+    return grid
+
+
+def compute_growth(columns: Dict[str, list], days: int, end_date: datetime,
+                   platforms: List[str] = SUMMARY_PLATFORMS) -> Dict[str, Dict[str, Any]]:
+    """Per-platform growth report for the ``days`` days ending on ``end_date``'s day."""
+    span = growth_span(days)
+    start = window_start(end_date, span)
+    grid = growth_grid(columns, span, len(platforms))
+
+    present = grid["present"]
+    engagement = grid["engagement"]
+    followers = _carry_forward(grid["followers_max"], present)
+    rates = np.divide(grid["engagement_rate_sum"], grid["engagement_rate_count"],
+                      out=np.zeros_like(engagement), where=grid["engagement_rate_count"] > 0)
+    rolling = _trailing_mean(engagement, ROLLING_DAYS)
+
+    current = slice(span - days, span)
+    previous = slice(span - 2 * days, span - days)
+    dates = np.datetime_as_string(
+        np.arange(np.datetime64(start.date(), "D"), np.datetime64(start.date(), "D") + span), unit="D"
+    )[current]
+
+    engagement_total = engagement[:, current].sum(axis=1)
+    previous_engagement = engagement[:, previous].sum(axis=1)
+    rate_total = grid["engagement_rate_sum"][:, current].sum(axis=1)
+    rate_count = grid["engagement_rate_count"][:, current].sum(axis=1)
+    followers_max = np.where(present[:, current], grid["followers_max"][:, current], 0).max(axis=1)
+    last_week = engagement[:, span - WEEK_DAYS:].sum(axis=1)
+    week_before = engagement[:, span - 2 * WEEK_DAYS:span - WEEK_DAYS].sum(axis=1)
+
+    # Series are reported on the days that have a rollup
+    series = {
+        "followers": grid["followers_max"][:, current].astype(np.int64),
+        "engagement": engagement[:, current].astype(np.int64),
+        "engagement_rate": np.round(rates[:, current], 4),
+        "rolling_engagement": np.round(rolling[:, current], 2)
+    }
+
+    growth = {}
+    for index, platform in enumerate(platforms):
+        days_present = np.flatnonzero(present[index, current])
+        day_dates = dates[days_present].tolist()
+        values = {name: column[index, days_present].tolist() for name, column in series.items()}
+        growth[platform] = {
+            "followers_growth": [
+                {"date": date, "followers": value} for date, value in zip(day_dates, values["followers"])
+            ],
+            "engagement_growth": [
+                {"date": date, "engagement": value} for date, value in zip(day_dates, values["engagement"])
+            ],
+            "engagement_rate_growth": [
+                {"date": date, "engagement_rate": value} for date, value in zip(day_dates, values["engagement_rate"])
+            ],
+            "rolling_engagement": [
+                {"date": date, "engagement": value} for date, value in zip(day_dates, values["rolling_engagement"])
+            ],
+            "total_followers": int(followers_max[index]),
+            "total_engagement": int(engagement_total[index]),
+            "average_engagement_rate": float(rate_total[index] / rate_count[index]) if rate_count[index] else 0.0,
+            "period_over_period": {
+                "followers": int(followers[index, -1] - followers[index, span - days - 1]),
+                "engagement": int(engagement_total[index] - previous_engagement[index]),
+                "engagement_percent": _percent_change(engagement_total[index], previous_engagement[index])
+            },
+            "week_over_week": {
+                "followers_percent": _percent_change(followers[index, -1], followers[index, -1 - WEEK_DAYS]),
+                "engagement_percent": _percent_change(last_week[index], week_before[index])
+            }
+        }
+    return growth
+
+
+async def growth_analytics(db, user_id: ObjectId, days: int,
+                           end_date: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Read a user's rollups for the growth report as columns and compute it."""
+    end_date = end_date or datetime.utcnow()
+    start = window_start(end_date, growth_span(days))
+    result = await db[ANALYTICS_DAILY_COLLECTION].aggregate(growth_pipeline(user_id, start, end_date)).to_list(length=1)
+    return compute_growth(result[0] if result else {}, days, end_date)
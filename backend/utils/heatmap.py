@@ -0,0 +1,231 @@
+"""
+Posting-time heatmaps for best-time scheduling.
+
+Engagement of published posts is folded into one document per (user,
+platform, weekday, hour posted) in POSTING_HEATMAP_COLLECTION. The engagement
+sync keeps the cells current with ``$inc`` upserts of the change in each
+post's counts, and ``rebuild_heatmaps`` recomputes them from the posts with a
+server-side ``$merge``. Cells keep the engagement of posts deleted later,
+which still says when the audience is around.
+
+Scheduling ranks the hours of a day by how much more engagement than usual
+posts published in them got. Sparse cells are pulled towards the platform's
+average so a single lucky post does not decide the slot. The minute within
+the hour is spread per post, so posts do not all go out at the same instant.
+"""
+
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from database import POSTS_COLLECTION, POSTING_HEATMAP_COLLECTION
+
+ENGAGEMENT_FIELDS = ("likes", "comments", "shares")
+
+# A platform needs this many published posts before its heatmap is trusted
+MIN_HEATMAP_POSTS = 10
+
+# Posts' worth of the platform average each cell is smoothed with
+PRIOR_POSTS = 3
+
+# (weekday with Monday 0, hour)
+Slot = Tuple[int, int]
+
+
+def heatmap_cell(posted_at: Any) -> Optional[Slot]:
+    """Weekday and hour a post went out, from its ``posted_at``."""
+    try:
+        posted = posted_at if isinstance(posted_at, datetime) else datetime.fromisoformat(posted_at)
+    except (TypeError, ValueError):
+        return None
+    return posted.weekday(), posted.hour
+
+
+def _engagement(counts: Dict[str, int]) -> int:
+    return sum(counts.get(field, 0) for field in ENGAGEMENT_FIELDS)
+
+
+def heatmap_operations(posts: Iterable[Tuple[Dict[str, Any], Dict[str, Dict[str, int]], Dict[str, Dict[str, int]]]],
+                       now: Optional[datetime] = None) -> List[UpdateOne]:
+    """
+    One upsert per affected cell folding in the change of posts' counts.
+
+    Args:
+        posts: (post, previous per-platform counts, current per-platform counts)
+    """
+    now = now or datetime.utcnow()
+    increments: Dict[Tuple[ObjectId, str, int, int], Dict[str, int]] = {}
+    for post, previous, current in posts:
+        cell = heatmap_cell(post.get("posted_at"))
+        if cell is None:
+            continue
+        for platform, counts in current.items():
+            before = previous.get(platform)
+            totals = increments.setdefault((post["user_id"], platform, *cell), {"posts": 0, "engagement": 0, "impressions": 0})
+            totals["posts"] += 0 if before is not None else 1
+            totals["engagement"] += _engagement(counts) - _engagement(before or {})
+            totals["impressions"] += counts.get("impressions", 0) - (before or {}).get("impressions", 0)
+
+    return [
+        UpdateOne(
+            {"user_id": user_id, "platform": platform, "weekday": weekday, "hour": hour},
+            {"$inc": totals, "$set": {"updated_at": now}, "$setOnInsert": {"created_at": now}},
+            upsert=True
+        )
+        for (user_id, platform, weekday, hour), totals in increments.items() if any(totals.values())
+    ]
+
+
+async def apply_heatmap(db, operations: List[UpdateOne]):
+    if operations:
+        await db[POSTING_HEATMAP_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def rebuild_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation that recomputes the heatmap cells of the matched posts and merges them in."""
+    counts = "$platform_counts.v"
+    return [
+        {"$match": {**match, "status": "posted", "posted_at": {"$type": "string"},
+                    "engagement_data.platforms": {"$type": "object"}}},
+        {"$project": {
+            "user_id": 1,
+            # posted_at is an ISO string in server time: the date part gives the weekday
+            "weekday": {"$subtract": [
+                {"$isoDayOfWeek": {"$dateFromString": {"dateString": {"$substrCP": ["$posted_at", 0, 10]}}}}, 1
+            ]},
+            "hour": {"$toInt": {"$substrCP": ["$posted_at", 11, 2]}},
+            "platform_counts": {"$objectToArray": "$engagement_data.platforms"}
+        }},
+        {"$unwind": "$platform_counts"},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "platform": "$platform_counts.k", "weekday": "$weekday", "hour": "$hour"},
+            "posts": {"$sum": 1},
+            "engagement": {"$sum": {"$add": [{"$ifNull": [f"{counts}.{field}", 0]} for field in ENGAGEMENT_FIELDS]}},
+            "impressions": {"$sum": {"$ifNull": [f"{counts}.impressions", 0]}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "platform": "$_id.platform",
+            "weekday": "$_id.weekday",
+            "hour": "$_id.hour",
+            "posts": 1,
+            "engagement": 1,
+            "impressions": 1,
+            "created_at": "$$NOW",
+            "updated_at": "$$NOW"
+        }},
+        {"$merge": {
+            "into": POSTING_HEATMAP_COLLECTION,
+            "on": ["user_id", "platform", "weekday", "hour"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+
+
+async def rebuild_heatmaps(db, user_id: Optional[ObjectId] = None) -> int:
+    """
+    Rebuild the heatmaps from the posts' current engagement.
+
+    Cells in scope are dropped first. Engagement synced while the rebuild runs
+    may be counted twice or not at all, so run it at a quiet time.
+
+    Returns:
+        Number of heatmap cells in scope afterwards
+    """
+    scope: Dict[str, Any] = {"user_id": user_id} if user_id is not None else {}
+    await db[POSTING_HEATMAP_COLLECTION].delete_many(scope)
+    await db[POSTS_COLLECTION].aggregate(rebuild_pipeline(scope)).to_list(length=None)
+    return await db[POSTING_HEATMAP_COLLECTION].count_documents(scope)
+
+
+async def load_heatmaps(db, user_id: ObjectId,
+                        platforms: Optional[Iterable[str]] = None) -> Dict[str, Dict[Slot, Dict[str, int]]]:
+    """A user's heatmap cells by platform and slot."""
+    query: Dict[str, Any] = {"user_id": user_id}
+    if platforms is not None:
+        query["platform"] = {"$in": list(platforms)}
+    heatmaps: Dict[str, Dict[Slot, Dict[str, int]]] = {}
+    async for cell in db[POSTING_HEATMAP_COLLECTION].find(query, {"_id": 0, "created_at": 0, "updated_at": 0}):
+        heatmaps.setdefault(cell["platform"], {})[(cell["weekday"], cell["hour"])] = cell
+    return heatmaps
+
+
+def slot_lifts(cells: Dict[Slot, Dict[str, int]]) -> Dict[Slot, float]:
+    """
+    Engagement per post in each slot relative to the platform average, smoothed
+    towards 1.0 for slots with few posts. Empty if there is too little data.
+    """
+    posts = sum(cell.get("posts", 0) for cell in cells.values())
+    engagement = sum(cell.get("engagement", 0) for cell in cells.values())
+    if posts < MIN_HEATMAP_POSTS or engagement <= 0:
+        return {}
+    average = engagement / posts
+    return {
+        slot: (cell.get("engagement", 0) + PRIOR_POSTS * average) / (cell.get("posts", 0) + PRIOR_POSTS) / average
+        for slot, cell in cells.items() if cell.get("posts", 0) > 0
+    }
+
+
+def best_hour(heatmaps: Dict[str, Dict[Slot, Dict[str, int]]], platforms: Iterable[str], weekday: int,
+              earliest_hour: int = 0) -> Optional[int]:
+    """
+    Hour of ``weekday`` (from ``earliest_hour`` on) with the highest combined
+    lift over ``platforms``, or None if their heatmaps have too little data.
+    Hours with no posts on that weekday are judged by the same hour on all days.
+    """
+    lifts = [slot_lifts(heatmaps.get(platform, {})) for platform in platforms]
+    lifts = [platform_lifts for platform_lifts in lifts if platform_lifts]
+    if not lifts:
+        return None
+
+    scores: Dict[int, float] = {}
+    for platform_lifts in lifts:
+        by_hour: Dict[int, List[float]] = {}
+        for (_, hour), lift in platform_lifts.items():
+            by_hour.setdefault(hour, []).append(lift)
+        for hour in range(earliest_hour, 24):
+            if (weekday, hour) in platform_lifts:
+                lift = platform_lifts[(weekday, hour)]
+            elif hour in by_hour:
+                lift = sum(by_hour[hour]) / len(by_hour[hour])
+            else:
+                continue
+            scores[hour] = scores.get(hour, 0.0) + lift - 1.0
+    if not scores:
+        return None
+    return max(scores, key=lambda hour: (scores[hour], -hour))
+
+
+def spread_minute(post_id: Any) -> int:
+    """Stable minute within the hour for a post, so scheduled posts do not all fire at :00."""
+    return zlib.crc32(str(post_id).encode()) % 60
+
+
+def heatmap_report(heatmaps: Dict[str, Dict[Slot, Dict[str, int]]], top: int = 5) -> Dict[str, Any]:
+    """Per-platform cells and best slots, as served by the analytics API."""
+    report = {}
+    for platform, cells in sorted(heatmaps.items()):
+        lifts = slot_lifts(cells)
+        report[platform] = {
+            "posts": sum(cell.get("posts", 0) for cell in cells.values()),
+            "cells": [
+                {
+                    "weekday": weekday,
+                    "hour": hour,
+                    "posts": cell.get("posts", 0),
+                    "average_engagement": round(cell.get("engagement", 0) / cell["posts"], 2) if cell.get("posts") else 0.0,
+                    "lift": round(lifts[(weekday, hour)], 3) if (weekday, hour) in lifts else None
+                }
+                for (weekday, hour), cell in sorted(cells.items())
+            ],
+            "best_slots": [
+                {"weekday": weekday, "hour": hour, "lift": round(lift, 3)}
+                for (weekday, hour), lift in sorted(lifts.items(), key=lambda item: -item[1])[:top]
+            ]
+        }
+    return report
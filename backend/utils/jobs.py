@@ -0,0 +1,114 @@
+"""
+In-process background job queue with priorities.
+
+Work that does not need to finish inside a request (welcome emails, initial
+post generation) is queued here and run by a small pool of workers. Lower
+priority numbers run first; jobs with the same priority run in FIFO order.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Callable, Awaitable, Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+class Job:
+    """A queued coroutine call."""
+
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict, priority: int):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+
+class JobQueue:
+    def __init__(self, workers: int = 4):
+        self.workers = workers
+        self.is_running = False
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._counter = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+
+    def _get_queue(self) -> asyncio.PriorityQueue:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        return self._queue
+
+    def enqueue(self, name: str, func: Callable[..., Awaitable[Any]], *args,
+                priority: int = PRIORITY_NORMAL, **kwargs) -> Job:
+        """Queue ``func(*args, **kwargs)`` to run in the background."""
+        job = Job(name, func, args, kwargs, priority)
+        self._get_queue().put_nowait((priority, next(self._counter), job))
+        logger.info(f"Queued job {name} (priority {priority}, {self.pending} pending)")
+        return job
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self, index: int):
+        queue = self._get_queue()
+        while self.is_running:
+            _, _, job = await queue.get()
+            waited = time.monotonic() - job.enqueued_at
+            try:
+                await job.func(*job.args, **job.kwargs)
+                self.completed += 1
+                logger.info(f"Job {job.name} finished on worker {index} after waiting {waited:.2f}s")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Job {job.name} failed: {e}")
+            finally:
+                queue.task_done()
+
+    async def start(self):
+        """Start the worker pool."""
+        if self.is_running:
+            logger.warning("Job queue is already running")
+            return
+
+        self.is_running = True
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started job queue with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers. Jobs still queued are dropped."""
+        self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"Stopped job queue ({self.pending} jobs not run)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "workers": self.workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+# Global job queue
+job_queue = JobQueue()
+
+
+async def start_job_queue():
+    await job_queue.start()
+
+
+async def stop_job_queue():
+    await job_queue.stop()
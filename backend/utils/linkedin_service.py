@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 
 # Import from the config package that's actually being used
 from config import settings
+from utils.resilience import linkedin_breaker, CircuitOpenError, BulkheadFullError
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,12 @@ class LinkedInService:
         self.scope = settings.linkedin_scope
         self.base_url = "https://api.linkedin.com/v2"
         self.auth_url = "https://www.linkedin.com/oauth/v2"
+        self.request_timeout = 15
+    
+    async def _http(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Run a blocking HTTP call off the event loop, through the LinkedIn circuit breaker."""
+        kwargs.setdefault("timeout", self.request_timeout)
+        return await linkedin_breaker.call_in_thread(requests.request, method, url, **kwargs)
     
     def get_auth_url(self, state: str = None) -> str:
         """Generate LinkedIn OAuth authorization URL."""
@@ -81,7 +88,7 @@ class LinkedInService:
                     logger.info(f"  {key}: {value}")
             
             # Make the request
-            response = requests.post(token_url, data=data, headers=headers)
+            response = await self._http("POST", token_url, data=data, headers=headers)
             
             # Log response details
             logger.info("=== Response Details ===")
@@ -141,7 +148,7 @@ class LinkedInService:
                 "Accept": "application/json"
             }
             
-            response = requests.post(token_url, data=data, headers=headers)
+            response = await self._http("POST", token_url, data=data, headers=headers)
             response.raise_for_status()
             
             token_data = response.json()
@@ -154,7 +161,7 @@ class LinkedInService:
                 "expires_at": datetime.utcnow() + timedelta(seconds=token_data.get("expires_in", 3600))
             }
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, CircuitOpenError, BulkheadFullError) as e:
             logger.error(f"Error refreshing LinkedIn token: {e}")
             return None
     
@@ -173,13 +180,13 @@ class LinkedInService:
             logger.info(f"Requesting profile from URL: {profile_url}")
             
             # Make the request
-            response = requests.get(profile_url, headers=headers)
+            response = await self._http("GET", profile_url, headers=headers)
             
             # If v2/me fails, try alternative endpoint
             if response.status_code != 200:
                 logger.warning(f"v2/me failed with status {response.status_code}, trying alternative endpoint")
                 profile_url = "https://api.linkedin.com/v2/me?projection=(id,localizedFirstName,localizedLastName)"
-                response = requests.get(profile_url, headers=headers)
+                response = await self._http("GET", profile_url, headers=headers)
             
             # Log the response details
             logger.info(f"Profile request status code: {response.status_code}")
@@ -241,10 +248,10 @@ class LinkedInService:
                 "X-Restli-Protocol-Version": "2.0.0"
             }
             
-            response = requests.get(f"{self.base_url}/me", headers=headers)
+            response = await self._http("GET", f"{self.base_url}/me", headers=headers)
             return response.status_code == 200
             
-        except requests.exceptions.RequestException:
+        except (requests.exceptions.RequestException, CircuitOpenError, BulkheadFullError):
             return False
 
 
@@ -0,0 +1,142 @@
+"""
+Background jobs run after a user signs up.
+
+Signup only inserts the user and queues these jobs, so its latency no longer
+includes AI generation or SMTP round trips.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from bson import ObjectId
+
+from database import get_database, USERS_COLLECTION, POSTS_COLLECTION
+from .ai_generator import ai_generator
+from .email import send_welcome_email
+from .dependencies import invalidate_user
+from .jobs import job_queue, PRIORITY_HIGH, PRIORITY_NORMAL
+from .changes import post_change
+
+logger = logging.getLogger(__name__)
+
+INITIAL_BATCH_QUEUED = "queued"
+INITIAL_BATCH_GENERATING = "generating"
+INITIAL_BATCH_READY = "ready"
+INITIAL_BATCH_FAILED = "failed"
+
+# A generation job that has not finished after this long is assumed lost
+INITIAL_BATCH_LEASE_MINUTES = 30
+
+DEFAULT_PLATFORMS = ["instagram", "linkedin", "facebook", "twitter"]
+
+
+async def generate_initial_batch(user_id: ObjectId):
+    """Generate the first 7 days of posts for a new user."""
+    db = get_database()
+    now = datetime.now()
+
+    # Claim the job so a requeued duplicate does not generate a second batch
+    user = await db[USERS_COLLECTION].find_one_and_update(
+        {"_id": user_id, "initial_batch_status": INITIAL_BATCH_QUEUED},
+        {"$set": {"initial_batch_status": INITIAL_BATCH_GENERATING, "initial_batch_started_at": now.isoformat()}}
+    )
+    if not user:
+        return
+    invalidate_user(user["email"])
+
+    try:
+        logger.info(f"Auto-generating 7 days of posts for new user: {user['email']}")
+
+        # Generate 7 days of posts starting from tomorrow
+        start_date = now + timedelta(days=1)
+        generated_posts = await ai_generator.generate_7_day_batch(
+            interests=user.get("interests", []),
+            custom_prompt=user.get("custom_prompt"),
+            platforms=DEFAULT_PLATFORMS,
+            start_date=start_date
+        )
+
+        batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        posts_to_insert = []
+        for post_data in generated_posts:
+            posts_to_insert.append({
+                "user_id": user_id,
+                "caption": post_data["caption"],
+                "hashtags": post_data["hashtags"],
+                "scheduled_date": post_data["scheduled_date"],
+                "platforms": post_data.get("platforms", ["instagram"]),
+                "status": "pending_approval",
+                "custom_prompt": user.get("custom_prompt"),
+                "image_prompt": post_data["image_prompt"],
+                "image_url": post_data.get("image_url"),
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat(),
+                "batch_id": batch_id,
+                "is_auto_generated": True
+            })
+
+        if posts_to_insert:
+            async with post_change(db, user_id) as stamp:
+                await db[POSTS_COLLECTION].insert_many([{**post, **stamp} for post in posts_to_insert])
+
+        await db[USERS_COLLECTION].update_one(
+            {"_id": user_id},
+            {"$set": {
+                "initial_batch_status": INITIAL_BATCH_READY,
+                "initial_batch_posts": len(posts_to_insert)
+            }}
+        )
+        logger.info(f"Generated {len(posts_to_insert)} posts for user {user['email']}")
+
+    except Exception as e:
+        logger.error(f"Error auto-generating posts for user {user['email']}: {e}")
+        await db[USERS_COLLECTION].update_one(
+            {"_id": user_id},
+            {"$set": {"initial_batch_status": INITIAL_BATCH_FAILED}}
+        )
+    finally:
+        invalidate_user(user["email"])
+
+
+def queue_signup_jobs(user_doc: Dict[str, Any]):
+    """Queue the welcome email and, for individual users, the initial batch."""
+    job_queue.enqueue(
+        f"welcome_email:{user_doc['email']}",
+        send_welcome_email, user_doc["email"], user_doc.get("full_name", ""),
+        priority=PRIORITY_HIGH
+    )
+    if user_doc.get("initial_batch_status") == INITIAL_BATCH_QUEUED:
+        job_queue.enqueue(
+            f"initial_batch:{user_doc['_id']}",
+            generate_initial_batch, user_doc["_id"],
+            priority=PRIORITY_NORMAL
+        )
+
+
+async def requeue_initial_batches():
+    """Requeue initial batches that were queued, or lost mid-run, before a restart."""
+    db = get_database()
+    stale_before = (datetime.now() - timedelta(minutes=INITIAL_BATCH_LEASE_MINUTES)).isoformat()
+
+    await db[USERS_COLLECTION].update_many(
+        {
+            "initial_batch_status": INITIAL_BATCH_GENERATING,
+            "initial_batch_started_at": {"$lt": stale_before}
+        },
+        {"$set": {"initial_batch_status": INITIAL_BATCH_QUEUED}}
+    )
+
+    users = await db[USERS_COLLECTION].find(
+        {"initial_batch_status": INITIAL_BATCH_QUEUED},
+        {"_id": 1}
+    ).to_list(length=None)
+
+    for user in users:
+        job_queue.enqueue(
+            f"initial_batch:{user['_id']}",
+            generate_initial_batch, user["_id"],
+            priority=PRIORITY_NORMAL
+        )
+    if users:
+        logger.info(f"Requeued initial batch generation for {len(users)} users")
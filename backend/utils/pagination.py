@@ -0,0 +1,80 @@
+"""
+Keyset pagination helpers.
+
+Pages are ordered by (sort field, _id) and the cursor is the opaque encoding of
+the last row's values, so each page is a bounded index range scan no matter
+how deep the client pages.
+"""
+
+import base64
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque cursor for the given key values."""
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def keyset_sort(field: str) -> List[Tuple[str, int]]:
+    return [(field, 1), ("_id", 1)]
+
+
+def keyset_filter(field: str, cursor: Optional[str]) -> Dict[str, Any]:
+    """Query clause selecting rows strictly after the cursor."""
+    if not cursor:
+        return {}
+    value, last_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$gt": value}},
+        {field: value, "_id": {"$gt": last_id}}
+    ]}
+
+
+async def fetch_page(collection, query: Dict[str, Any], field: str, cursor: Optional[str],
+                     limit: Optional[int], projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of ``query`` ordered by (field, _id).
+
+    Returns:
+        Tuple of (documents, cursor for the next page or None on the last page)
+    """
+    limit = clamp_page_size(limit)
+    after = keyset_filter(field, cursor)
+    if after:
+        query = {"$and": [query, after]}
+
+    # One extra row tells us whether another page exists
+    documents = await collection.find(query, projection).sort(keyset_sort(field)).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor([last.get(field), last["_id"]])
+    return documents, next_cursor
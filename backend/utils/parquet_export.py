@@ -0,0 +1,298 @@
+"""
+Columnar export of analytics and post engagement to Parquet.
+
+Two datasets are written under the export root, partitioned Hive-style so
+pyarrow.dataset, Spark, DuckDB and friends read the partition keys back as
+columns:
+
+    analytics/user_id=<id>/platform=<platform>/month=YYYY-MM/part-0.parquet
+    post_engagement/user_id=<id>/platform=<platform>/month=YYYY-MM/part-0.parquet
+
+``analytics`` holds the raw analytics rows, ``post_engagement`` one row per
+posted post and platform with the counts from ``engagement_data``.
+
+Each partition is streamed from a cursor into record batches of at most
+``batch_size`` rows and written batch by batch, so memory stays bounded
+however large a partition is. Files are written to a temporary name and
+renamed into place, so readers never see half a file.
+
+Reruns are incremental. A manifest per dataset records a fingerprint of
+every partition it wrote: row count plus the newest rollup ``updated_at`` for
+analytics, and row count plus the highest ``change_seq`` for posts. The
+fingerprints are computed from the daily rollups and posts, and only
+partitions that are new or whose fingerprint changed are written again.
+Partitions whose data is gone are removed.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bson import ObjectId
+
+from database import ANALYTICS_COLLECTION, ANALYTICS_DAILY_COLLECTION, POSTS_COLLECTION
+from .analytics_store import storage_query, from_storage
+from .engagement_sync import remote_post_ids
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 10000
+MANIFEST_NAME = "_manifest.json"
+PART_NAME = "part-0.parquet"
+
+ANALYTICS_DATASET = "analytics"
+POSTS_DATASET = "post_engagement"
+
+ANALYTICS_SCHEMA = pa.schema([
+    ("analytics_id", pa.string()),
+    ("date", pa.timestamp("ms")),
+    ("followers_count", pa.int64()),
+    ("likes_count", pa.int64()),
+    ("comments_count", pa.int64()),
+    ("shares_count", pa.int64()),
+    ("impressions_count", pa.int64()),
+    ("reach_count", pa.int64()),
+    ("engagement_rate", pa.float64()),
+])
+
+POSTS_SCHEMA = pa.schema([
+    ("post_id", pa.string()),
+    ("batch_id", pa.string()),
+    ("posted_at", pa.timestamp("ms")),
+    ("remote_id", pa.string()),
+    ("is_auto_generated", pa.bool_()),
+    ("likes", pa.int64()),
+    ("comments", pa.int64()),
+    ("shares", pa.int64()),
+    ("impressions", pa.int64()),
+    ("total_engagement", pa.int64()),
+    ("engagement_rate", pa.float64()),
+    ("synced_at", pa.timestamp("ms")),
+])
+
+# (user_id, platform, "YYYY-MM")
+PartitionKey = Tuple[str, str, str]
+
+
+def partition_path(key: PartitionKey) -> str:
+    user_id, platform, month = key
+    return os.path.join(f"user_id={user_id}", f"platform={platform}", f"month={month}")
+
+
+def month_bounds(month: str) -> Tuple[datetime, datetime]:
+    """First instant of ``month`` ("YYYY-MM") and of the month after it."""
+    start = datetime.strptime(month, "%Y-%m")
+    following = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, following
+
+
+def _parse_iso(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def analytics_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "analytics_id": str(row["_id"]),
+        "date": row.get("date"),
+        **{field.name: row.get(field.name) or 0 for field in ANALYTICS_SCHEMA if field.name.endswith("_count")},
+        "engagement_rate": float(row.get("engagement_rate") or 0)
+    }
+
+
+def post_record(post: Dict[str, Any], platform: str) -> Dict[str, Any]:
+    counts = ((post.get("engagement_data") or {}).get("platforms") or {}).get(platform) or {}
+    likes, comments, shares = counts.get("likes", 0), counts.get("comments", 0), counts.get("shares", 0)
+    impressions = counts.get("impressions", 0)
+    total = likes + comments + shares
+    return {
+        "post_id": str(post["_id"]),
+        "batch_id": post.get("batch_id"),
+        "posted_at": _parse_iso(post.get("posted_at")),
+        "remote_id": remote_post_ids(post).get(platform),
+        "is_auto_generated": post.get("is_auto_generated"),
+        "likes": likes,
+        "comments": comments,
+        "shares": shares,
+        "impressions": impressions,
+        "total_engagement": total,
+        "engagement_rate": round(total / impressions * 100, 2) if impressions else 0.0,
+        "synced_at": _parse_iso((post.get("engagement_data") or {}).get("updated_at"))
+    }
+
+
+async def analytics_fingerprints(db, user_id: Optional[ObjectId] = None) -> Dict[PartitionKey, Dict[str, Any]]:
+    """Row count and last change of every analytics partition, from the daily rollups."""
+    match: Dict[str, Any] = {"user_id": user_id} if user_id is not None else {}
+    fingerprints = {}
+    async for group in db[ANALYTICS_DAILY_COLLECTION].aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "platform": "$platform",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$day"}}
+            },
+            "rows": {"$sum": "$rows"},
+            "updated_at": {"$max": "$updated_at"}
+        }},
+        {"$match": {"rows": {"$gt": 0}}}
+    ]):
+        key = (str(group["_id"]["user_id"]), group["_id"]["platform"], group["_id"]["month"])
+        fingerprints[key] = {"rows": group["rows"], "version": str(group["updated_at"])}
+    return fingerprints
+
+
+async def post_fingerprints(db, user_id: Optional[ObjectId] = None) -> Dict[PartitionKey, Dict[str, Any]]:
+    """Row count and highest change sequence of every post engagement partition."""
+    match: Dict[str, Any] = {"status": "posted", "posted_at": {"$type": "string"}}
+    if user_id is not None:
+        match["user_id"] = user_id
+    fingerprints = {}
+    async for group in db[POSTS_COLLECTION].aggregate([
+        {"$match": match},
+        {"$unwind": "$platforms"},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "platform": "$platforms", "month": {"$substrCP": ["$posted_at", 0, 7]}},
+            "rows": {"$sum": 1},
+            "change_seq": {"$max": "$change_seq"}
+        }}
+    ]):
+        key = (str(group["_id"]["user_id"]), group["_id"]["platform"], group["_id"]["month"])
+        fingerprints[key] = {"rows": group["rows"], "version": group.get("change_seq")}
+    return fingerprints
+
+
+def analytics_cursor(db, key: PartitionKey, batch_size: int):
+    user_id, platform, month = key
+    start, end = month_bounds(month)
+    return db[ANALYTICS_COLLECTION].find(storage_query({
+        "user_id": ObjectId(user_id), "platform": platform, "date": {"$gte": start, "$lt": end}
+    })).sort([("date", 1), ("_id", 1)]).batch_size(batch_size)
+
+
+async def analytics_records(db, key: PartitionKey, batch_size: int):
+    async for row in analytics_cursor(db, key, batch_size):
+        yield analytics_record(from_storage(row))
+
+
+async def post_records(db, key: PartitionKey, batch_size: int):
+    user_id, platform, month = key
+    start, end = month_bounds(month)
+    cursor = db[POSTS_COLLECTION].find({
+        "user_id": ObjectId(user_id),
+        "status": "posted",
+        "platforms": platform,
+        "posted_at": {"$gte": start.isoformat()[:7], "$lt": end.isoformat()[:7]}
+    }, {
+        "platforms": 1, "batch_id": 1, "posted_at": 1, "is_auto_generated": 1,
+        "engagement_data": 1, "deliveries": 1, "linkedin_post_id": 1
+    }).sort([("posted_at", 1), ("_id", 1)]).batch_size(batch_size)
+    async for post in cursor:
+        yield post_record(post, platform)
+
+
+async def write_partition(path: str, schema: pa.Schema, records, batch_size: int) -> int:
+    """Stream records into a Parquet file batch by batch; returns rows written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Dot-prefixed so dataset readers skip it if a run dies halfway
+    temporary = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    rows = 0
+    batch: List[Dict[str, Any]] = []
+    with pq.ParquetWriter(temporary, schema, compression="zstd") as writer:
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                rows += len(batch)
+                batch = []
+        if batch or not rows:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            rows += len(batch)
+    os.replace(temporary, path)
+    return rows
+
+
+def load_manifest(dataset_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(dataset_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"partitions": {}}
+
+
+def save_manifest(dataset_dir: str, manifest: Dict[str, Any]):
+    os.makedirs(dataset_dir, exist_ok=True)
+    path = os.path.join(dataset_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+DATASETS: Dict[str, Tuple[pa.Schema, Callable, Callable]] = {
+    ANALYTICS_DATASET: (ANALYTICS_SCHEMA, analytics_fingerprints, analytics_records),
+    POSTS_DATASET: (POSTS_SCHEMA, post_fingerprints, post_records),
+}
+
+
+async def export_dataset(db, root: str, dataset: str, user_id: Optional[ObjectId] = None, full: bool = False,
+                         batch_size: int = EXPORT_BATCH_SIZE,
+                         report: Optional[Callable[[str], None]] = None) -> Dict[str, int]:
+    """
+    Bring one dataset under ``root`` up to date.
+
+    Args:
+        user_id: Only consider this user's partitions
+        full: Rewrite every partition regardless of the manifest
+
+    Returns:
+        Counts of partitions written, skipped and removed, and rows written
+    """
+    report = report or logger.info
+    schema, fingerprints_of, records_of = DATASETS[dataset]
+    dataset_dir = os.path.join(root, dataset)
+    manifest = load_manifest(dataset_dir)
+    exported = manifest["partitions"]
+
+    current = {partition_path(key): (key, fingerprint)
+               for key, fingerprint in (await fingerprints_of(db, user_id)).items()}
+    stats = {"written": 0, "skipped": 0, "removed": 0, "rows": 0}
+
+    for path, (key, fingerprint) in sorted(current.items()):
+        previous = exported.get(path)
+        if not full and previous and previous["fingerprint"] == fingerprint:
+            stats["skipped"] += 1
+            continue
+        rows = await write_partition(
+            os.path.join(dataset_dir, path, PART_NAME), schema, records_of(db, key, batch_size), batch_size
+        )
+        exported[path] = {"fingerprint": fingerprint, "rows": rows, "written_at": datetime.utcnow().isoformat()}
+        stats["written"] += 1
+        stats["rows"] += rows
+        report(f"  {dataset}/{path}: {rows} rows")
+        # Saved as it goes so an interrupted run resumes where it stopped
+        save_manifest(dataset_dir, manifest)
+
+    user_prefix = f"user_id={user_id}{os.sep}" if user_id is not None else ""
+    for path in [path for path in exported if path.startswith(user_prefix) and path not in current]:
+        shutil.rmtree(os.path.join(dataset_dir, path), ignore_errors=True)
+        del exported[path]
+        stats["removed"] += 1
+        report(f"  {dataset}/{path}: removed")
+
+    save_manifest(dataset_dir, manifest)
+    return stats
+
+
+async def export_parquet(db, root: str, datasets: Iterable[str] = tuple(DATASETS), **options) -> Dict[str, Dict[str, int]]:
+    """Export every requested dataset; see ``export_dataset`` for the options."""
+    return {dataset: await export_dataset(db, root, dataset, **options) for dataset in datasets}
@@ -0,0 +1,23 @@
+from .base import (
+    PlatformPublisher, PublishResult, PublishError, PublishOutcomeUnknown, RetryPolicy, engagement_counts
+)
+from .dispatcher import PublishDispatcher, publish_dispatcher
+from .deliveries import (
+    DELIVERY_PENDING, DELIVERY_PUBLISHING, DELIVERY_POSTED, DELIVERY_FAILED, DELIVERY_SKIPPED,
+    MAX_DELIVERY_ATTEMPTS, get_delivery, platforms_to_publish, build_delivery, summarize_deliveries,
+    status_fields
+)
+from .outbox import (
+    PUBLISH_LEASE_SECONDS, make_idempotency_key, claim_delivery, claim_deliveries,
+    confirmation_update, reconcile_pending_intents
+)
+
+__all__ = [
+    "PlatformPublisher", "PublishResult", "PublishError", "PublishOutcomeUnknown", "RetryPolicy", "engagement_counts",
+    "PublishDispatcher", "publish_dispatcher",
+    "DELIVERY_PENDING", "DELIVERY_PUBLISHING", "DELIVERY_POSTED", "DELIVERY_FAILED", "DELIVERY_SKIPPED",
+    "MAX_DELIVERY_ATTEMPTS", "get_delivery", "platforms_to_publish", "build_delivery", "summarize_deliveries",
+    "status_fields",
+    "PUBLISH_LEASE_SECONDS", "make_idempotency_key", "claim_delivery", "claim_deliveries",
+    "confirmation_update", "reconcile_pending_intents"
+]
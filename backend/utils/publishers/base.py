@@ -0,0 +1,249 @@
+"""
+Base publisher interface shared by all platform adapters.
+Each adapter owns a pooled HTTP client, its own connection limits and retry policy.
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+import aiohttp
+
+from utils.resilience import get_breaker, CircuitOpenError, BulkheadFullError
+
+logger = logging.getLogger(__name__)
+
+
+class PublishError(Exception):
+    """Raised when a platform rejects or fails a publish request."""
+
+    # Whether the platform may have carried out the request despite the error
+    outcome_unknown = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class PublishOutcomeUnknown(PublishError):
+    """
+    Raised when a non-idempotent request was sent but its outcome is unknown,
+    e.g. it timed out or the platform answered 5xx. Retrying it could publish
+    twice, so the delivery is left in flight for ``reconcile_pending_intents``
+    to look up on the platform.
+    """
+
+    outcome_unknown = True
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for transient platform errors."""
+
+    RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+    # Statuses that say the request was not processed, so any method may be retried
+    NOT_PROCESSED_STATUS_CODES = {429}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self.RETRYABLE_STATUS_CODES
+
+    def is_idempotent(self, method: str) -> bool:
+        return method.upper() in self.IDEMPOTENT_METHODS
+
+    def get_delay(self, attempt: int) -> float:
+        """Delay before the given retry attempt (1-based)."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+
+class PublishResult:
+    """Outcome of publishing one post to one platform."""
+
+    def __init__(self, platform: str, success: bool, remote_id: Optional[str] = None,
+                 error: Optional[str] = None, skipped: bool = False, retryable: bool = True,
+                 outcome_unknown: bool = False):
+        self.platform = platform
+        self.success = success
+        self.remote_id = remote_id
+        self.error = error
+        self.skipped = skipped
+        self.retryable = retryable
+        # The post may have been published; leave the intent for reconciliation
+        self.outcome_unknown = outcome_unknown
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "platform": self.platform,
+            "success": self.success,
+            "remote_id": self.remote_id,
+            "error": self.error,
+            "skipped": self.skipped,
+            "retryable": self.retryable,
+            "outcome_unknown": self.outcome_unknown
+        }
+
+
+def engagement_counts(likes: int = 0, comments: int = 0, shares: int = 0, impressions: int = 0) -> Dict[str, int]:
+    """Engagement of one remote post, in the shape every adapter reports it."""
+    return {
+        "likes": int(likes or 0),
+        "comments": int(comments or 0),
+        "shares": int(shares or 0),
+        "impressions": int(impressions or 0)
+    }
+
+
+class PlatformPublisher:
+    """Base class for platform publishing adapters."""
+
+    platform: str = ""
+    max_connections: int = 10
+    timeout_seconds: float = 30.0
+    max_hashtags: Optional[int] = None
+    max_length: Optional[int] = None
+    # Most remote posts whose metrics one fetch_metrics call may ask for
+    metrics_batch_size: int = 50
+
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = get_breaker(self.platform)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the adapter's pooled HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def format_content(self, post: Dict[str, Any]) -> str:
+        """Build the text body for this platform from caption and hashtags."""
+        content = post.get("caption", "")
+        hashtags = post.get("hashtags", [])
+        if self.max_hashtags is not None:
+            hashtags = hashtags[:self.max_hashtags]
+
+        if hashtags:
+            content += "\n\n" + " ".join(hashtags)
+
+        if self.max_length is not None and len(content) > self.max_length:
+            content = content[:self.max_length - 1] + "…"
+        return content
+
+    async def _request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                       **kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Send a request through the platform's circuit breaker, retrying transient
+        failures according to the retry policy.
+
+        Only idempotent requests are retried once they may have reached the
+        platform; others are retried only if they provably were not processed
+        (connection failures, 429) and otherwise raise PublishOutcomeUnknown.
+
+        Args:
+            idempotent: Whether repeating the request is harmless; defaults to
+                whether the method is idempotent
+
+        Returns:
+            Tuple of (JSON body, response headers)
+        """
+        if idempotent is None:
+            idempotent = self.retry_policy.is_idempotent(method)
+        try:
+            return await self.breaker.call(self._request_with_retries, method, url, idempotent, **kwargs)
+        except (CircuitOpenError, BulkheadFullError) as e:
+            raise PublishError(str(e), retryable=True)
+
+    async def _request_with_retries(self, method: str, url: str, idempotent: bool,
+                                    **kwargs) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        session = self._get_session()
+        attempt = 0
+
+        while True:
+            attempt += 1
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status < 400:
+                        data = {}
+                        if response.content_type == "application/json":
+                            data = await response.json()
+                        return data, dict(response.headers)
+
+                    body = await response.text()
+                    message = f"{self.platform} API error {response.status}: {body[:500]}"
+                    retryable = self.retry_policy.is_retryable_status(response.status)
+                    if retryable and not idempotent and response.status not in self.retry_policy.NOT_PROCESSED_STATUS_CODES:
+                        raise PublishOutcomeUnknown(message, status_code=response.status, retryable=True)
+                    error = PublishError(message, status_code=response.status, retryable=retryable)
+            except aiohttp.ClientConnectorError as e:
+                # The connection was never established, so nothing was sent
+                error = PublishError(f"{self.platform} request failed: {e}", retryable=True)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not idempotent:
+                    raise PublishOutcomeUnknown(f"{self.platform} request failed: {e}", retryable=True)
+                error = PublishError(f"{self.platform} request failed: {e}", retryable=True)
+
+            if not error.retryable or attempt >= self.retry_policy.max_attempts:
+                raise error
+
+            delay = self.retry_policy.get_delay(attempt)
+            logger.warning(f"{error} - retrying in {delay:.2f}s (attempt {attempt}/{self.retry_policy.max_attempts})")
+            await asyncio.sleep(delay)
+
+    async def get_access_token(self, user_id, connection: Dict[str, Any]) -> Optional[str]:
+        """Return a usable access token for the connection."""
+        return connection.get("access_token")
+
+    async def publish(self, post: Dict[str, Any], connection: Dict[str, Any], access_token: str) -> PublishResult:
+        """Publish a post using the given connection. Implemented by each adapter."""
+        raise NotImplementedError
+
+    async def find_published(self, post: Dict[str, Any], connection: Dict[str, Any],
+                             access_token: str, since: datetime) -> Optional[str]:
+        """
+        Look for this post on the platform, published at or after ``since``.
+        Used to reconcile publish intents that were never confirmed.
+
+        Returns:
+            Remote post id if found, None if the platform has no such post
+
+        Raises:
+            NotImplementedError if the adapter cannot look posts up
+        """
+        raise NotImplementedError
+
+    async def fetch_metrics(self, remote_ids: List[str], connection: Dict[str, Any],
+                            access_token: str) -> Dict[str, Dict[str, int]]:
+        """
+        Fetch engagement counts for up to ``metrics_batch_size`` published posts
+        in as few platform calls as the API allows.
+
+        Returns:
+            Mapping of remote post id to ``engagement_counts``; posts the
+            platform no longer knows are left out
+
+        Raises:
+            NotImplementedError if the adapter cannot read metrics
+        """
+        raise NotImplementedError
+
+    def matches_content(self, post: Dict[str, Any], remote_text: Optional[str]) -> bool:
+        """Whether text returned by the platform is this post's content."""
+        return bool(remote_text) and remote_text.strip() == self.format_content(post).strip()
@@ -0,0 +1,149 @@
+"""
+Per-platform delivery state for posts.
+
+Each post carries a ``deliveries`` sub-document keyed by platform:
+
+    {
+        "state": "pending" | "publishing" | "posted" | "failed" | "skipped",
+        "attempts": int,
+        "idempotency_key": str | None,
+        "intent_at": ISO timestamp | None,
+        "remote_id": str | None,
+        "last_error": str | None,
+        "next_attempt_at": ISO timestamp | None,
+        "updated_at": ISO timestamp
+    }
+
+Retries only target platforms that are not yet ``posted`` or ``skipped``.
+A ``publishing`` delivery is an in-flight intent (see ``outbox.py``) and is
+never picked up for publishing again until it has been reconciled.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from .base import PublishResult
+
+DELIVERY_PENDING = "pending"
+DELIVERY_PUBLISHING = "publishing"
+DELIVERY_POSTED = "posted"
+DELIVERY_FAILED = "failed"
+DELIVERY_SKIPPED = "skipped"
+
+MAX_DELIVERY_ATTEMPTS = 5
+RETRY_BASE_DELAY_SECONDS = 60
+
+
+def get_delivery(post: Dict[str, Any], platform: str) -> Dict[str, Any]:
+    """Return the delivery sub-document for a platform, defaulting to pending."""
+    return post.get("deliveries", {}).get(platform) or {"state": DELIVERY_PENDING, "attempts": 0}
+
+
+def can_retry(delivery: Dict[str, Any]) -> bool:
+    """Whether a failed delivery still has attempts left."""
+    return (
+        delivery.get("state") == DELIVERY_FAILED
+        and delivery.get("retryable", True)
+        and delivery.get("attempts", 0) < MAX_DELIVERY_ATTEMPTS
+    )
+
+
+def platforms_to_publish(post: Dict[str, Any], now: Optional[datetime] = None) -> List[str]:
+    """Platforms on the post that still need a publish attempt now."""
+    now_iso = (now or datetime.now()).isoformat()
+    platforms = []
+    for platform in post.get("platforms", []):
+        delivery = get_delivery(post, platform)
+        state = delivery.get("state", DELIVERY_PENDING)
+        if state == DELIVERY_PENDING:
+            platforms.append(platform)
+        elif can_retry(delivery) and (delivery.get("next_attempt_at") or "") <= now_iso:
+            platforms.append(platform)
+    return platforms
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next delivery attempt."""
+    return timedelta(seconds=RETRY_BASE_DELAY_SECONDS * (2 ** max(attempts - 1, 0)))
+
+
+def build_delivery(post: Dict[str, Any], result: PublishResult, now: datetime) -> Dict[str, Any]:
+    """Merge a publish result into the platform's delivery sub-document."""
+    previous = get_delivery(post, result.platform)
+    attempts = previous.get("attempts", 0) + (0 if result.skipped else 1)
+
+    if result.success:
+        state = DELIVERY_POSTED
+    elif result.skipped:
+        state = DELIVERY_SKIPPED
+    else:
+        state = DELIVERY_FAILED
+
+    delivery = {
+        "state": state,
+        "attempts": attempts,
+        "remote_id": result.remote_id or previous.get("remote_id"),
+        "idempotency_key": previous.get("idempotency_key"),
+        "intent_at": previous.get("intent_at"),
+        "last_error": result.error,
+        "retryable": result.retryable,
+        "next_attempt_at": None,
+        "updated_at": now.isoformat()
+    }
+    if state == DELIVERY_FAILED and can_retry(delivery):
+        delivery["next_attempt_at"] = (now + retry_delay(attempts)).isoformat()
+    return delivery
+
+
+def summarize_deliveries(platforms: List[str], deliveries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Derive post-level fields from per-platform deliveries.
+
+    Returns:
+        Dict with status, posted_to and next_attempt_at
+    """
+    posted_to = [p for p in platforms if deliveries.get(p, {}).get("state") == DELIVERY_POSTED]
+    retrying = [deliveries[p] for p in platforms if p in deliveries and can_retry(deliveries[p])]
+    unfinished = [
+        p for p in platforms
+        if deliveries.get(p, {}).get("state", DELIVERY_PENDING) in (DELIVERY_PENDING, DELIVERY_PUBLISHING)
+    ]
+    failed = [p for p in platforms if deliveries.get(p, {}).get("state") == DELIVERY_FAILED]
+
+    if unfinished or retrying:
+        status = "scheduled"
+    elif failed and not posted_to:
+        status = "failed"
+    else:
+        # Fully delivered, partially delivered with exhausted retries, or nothing connected
+        status = "posted"
+
+    next_attempt_at = min((d["next_attempt_at"] for d in retrying if d.get("next_attempt_at")), default=None)
+
+    return {
+        "status": status,
+        "posted_to": posted_to,
+        "failed_platforms": failed,
+        "next_attempt_at": next_attempt_at
+    }
+
+
+def status_fields(post: Dict[str, Any], deliveries: Dict[str, Dict[str, Any]], now: datetime,
+                  platforms: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Post-level fields to ``$set`` after the post's deliveries changed.
+
+    Args:
+        post: The post as it was before the change
+        deliveries: The post's merged deliveries
+        platforms: Platforms to summarize, defaulting to the post's
+    """
+    summary = summarize_deliveries(platforms if platforms is not None else post.get("platforms", []), deliveries)
+    fields = {
+        "status": summary["status"],
+        "posted_to": summary["posted_to"],
+        "next_attempt_at": summary["next_attempt_at"]
+    }
+    if summary["posted_to"] and not post.get("posted_at"):
+        fields["posted_at"] = now.isoformat()
+    return fields
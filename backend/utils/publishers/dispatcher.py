@@ -0,0 +1,101 @@
+"""
+Fans a post out to all of its platforms concurrently and collects per-platform outcomes.
+"""
+
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List
+
+from database import get_database, PLATFORM_CONNECTIONS_COLLECTION
+from .base import PlatformPublisher, PublishResult, PublishError
+from .linkedin import LinkedInPublisher
+from .instagram import InstagramPublisher
+from .facebook import FacebookPublisher
+from .twitter import TwitterPublisher
+
+logger = logging.getLogger(__name__)
+
+
+class PublishDispatcher:
+    """Routes posts to the platform adapters."""
+
+    def __init__(self):
+        self.publishers: Dict[str, PlatformPublisher] = {
+            publisher.platform: publisher
+            for publisher in (
+                LinkedInPublisher(),
+                InstagramPublisher(),
+                FacebookPublisher(),
+                TwitterPublisher()
+            )
+        }
+
+    def get_publisher(self, platform: str) -> Optional[PlatformPublisher]:
+        return self.publishers.get(platform)
+
+    async def get_connections(self, user_id) -> Dict[str, Dict[str, Any]]:
+        """Load all connected platform accounts for a user in one query."""
+        db = get_database()
+        connections = await db[PLATFORM_CONNECTIONS_COLLECTION].find({
+            "user_id": user_id,
+            "is_connected": True
+        }).to_list(length=None)
+        return {connection["platform"]: connection for connection in connections}
+
+    async def publish_to_platform(self, post: Dict[str, Any], platform: str,
+                                  connection: Optional[Dict[str, Any]]) -> PublishResult:
+        """Publish to a single platform, converting every failure into a result."""
+        publisher = self.get_publisher(platform)
+        if publisher is None:
+            return PublishResult(platform, success=False, error="Unsupported platform", skipped=True)
+
+        if not connection:
+            return PublishResult(platform, success=False, error="Platform not connected", skipped=True)
+
+        try:
+            access_token = await publisher.get_access_token(post["user_id"], connection)
+            if not access_token:
+                return PublishResult(platform, success=False, error="Access token not available or invalid")
+
+            result = await publisher.publish(post, connection, access_token)
+            logger.info(f"Published post {post['_id']} to {platform}: {result.remote_id}")
+            return result
+
+        except PublishError as e:
+            logger.error(f"Error publishing post {post['_id']} to {platform}: {e}")
+            return PublishResult(platform, success=False, error=str(e), retryable=e.retryable,
+                                 outcome_unknown=e.outcome_unknown)
+        except Exception as e:
+            logger.error(f"Error publishing post {post['_id']} to {platform}: {e}")
+            return PublishResult(platform, success=False, error=str(e))
+
+    async def publish_post(self, post: Dict[str, Any], platforms: Optional[List[str]] = None,
+                           connections: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, PublishResult]:
+        """
+        Publish a post to all of its platforms concurrently.
+
+        Args:
+            post: The post document
+            platforms: Platforms to publish to (defaults to the post's platforms)
+            connections: Preloaded connections keyed by platform
+
+        Returns:
+            Mapping of platform to its publish result
+        """
+        platforms = platforms if platforms is not None else post.get("platforms", [])
+        if connections is None:
+            connections = await self.get_connections(post["user_id"])
+
+        results = await asyncio.gather(*[
+            self.publish_to_platform(post, platform, connections.get(platform))
+            for platform in platforms
+        ])
+        return {result.platform: result for result in results}
+
+    async def close(self):
+        """Close every adapter's HTTP session."""
+        await asyncio.gather(*[publisher.close() for publisher in self.publishers.values()])
+
+
+# Global instance
+publish_dispatcher = PublishDispatcher()
@@ -0,0 +1,88 @@
+"""
+Facebook publishing adapter (Graph API page feed).
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from .base import PlatformPublisher, PublishResult, PublishError, engagement_counts
+
+logger = logging.getLogger(__name__)
+
+
+class FacebookPublisher(PlatformPublisher):
+    """Publishes posts to the connected Facebook page."""
+
+    platform = "facebook"
+    max_connections = 10
+    max_length = 5000
+    graph_url = "https://graph.facebook.com/v18.0"
+
+    async def publish(self, post: Dict[str, Any], connection: Dict[str, Any], access_token: str) -> PublishResult:
+        page_id = connection.get("platform_user_id")
+        if not page_id:
+            raise PublishError("Facebook page id missing on connection")
+
+        message = self.format_content(post)
+        image_url = post.get("image_url")
+
+        if image_url and image_url.startswith("http"):
+            data, _ = await self._request(
+                "POST",
+                f"{self.graph_url}/{page_id}/photos",
+                data={"url": image_url, "caption": message, "access_token": access_token}
+            )
+            remote_id = data.get("post_id") or data.get("id")
+        else:
+            data, _ = await self._request(
+                "POST",
+                f"{self.graph_url}/{page_id}/feed",
+                data={"message": message, "access_token": access_token}
+            )
+            remote_id = data.get("id")
+
+        return PublishResult(self.platform, success=True, remote_id=remote_id)
+
+    async def find_published(self, post: Dict[str, Any], connection: Dict[str, Any],
+                             access_token: str, since: datetime) -> Optional[str]:
+        page_id = connection.get("platform_user_id")
+        if not page_id:
+            raise PublishError("Facebook page id missing on connection")
+
+        data, _ = await self._request(
+            "GET",
+            f"{self.graph_url}/{page_id}/posts",
+            params={
+                "fields": "id,message",
+                "since": int(since.timestamp()),
+                "access_token": access_token
+            }
+        )
+
+        for item in data.get("data", []):
+            if self.matches_content(post, item.get("message")):
+                return item.get("id")
+        return None
+
+    async def fetch_metrics(self, remote_ids: List[str], connection: Dict[str, Any],
+                            access_token: str) -> Dict[str, Dict[str, int]]:
+        # One multi-id Graph request; summaries give totals without paging through reactions
+        data, _ = await self._request(
+            "GET",
+            f"{self.graph_url}/",
+            params={
+                "ids": ",".join(remote_ids),
+                "fields": "shares,likes.summary(true).limit(0),comments.summary(true).limit(0)",
+                "access_token": access_token
+            }
+        )
+
+        return {
+            remote_id: engagement_counts(
+                likes=item.get("likes", {}).get("summary", {}).get("total_count"),
+                comments=item.get("comments", {}).get("summary", {}).get("total_count"),
+                shares=item.get("shares", {}).get("count")
+            )
+            for remote_id, item in data.items()
+        }
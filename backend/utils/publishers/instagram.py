@@ -0,0 +1,93 @@
+"""
+Instagram publishing adapter (Graph API content publishing).
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from config.instagram import INSTAGRAM_GRAPH_API_URL
+from .base import PlatformPublisher, PublishResult, PublishError, engagement_counts
+
+logger = logging.getLogger(__name__)
+
+
+class InstagramPublisher(PlatformPublisher):
+    """Publishes image posts to a connected Instagram business account."""
+
+    platform = "instagram"
+    max_connections = 10
+    max_hashtags = 30
+    max_length = 2200
+    graph_url = INSTAGRAM_GRAPH_API_URL
+
+    async def publish(self, post: Dict[str, Any], connection: Dict[str, Any], access_token: str) -> PublishResult:
+        ig_user_id = connection.get("platform_user_id")
+        if not ig_user_id:
+            raise PublishError("Instagram account id missing on connection")
+
+        image_url = post.get("image_url")
+        if not image_url or not image_url.startswith("http"):
+            raise PublishError("Instagram posts require a publicly reachable image URL")
+
+        # Step 1: create a media container; unpublished containers are harmless to repeat
+        container, _ = await self._request(
+            "POST",
+            f"{self.graph_url}/{ig_user_id}/media",
+            idempotent=True,
+            data={
+                "image_url": image_url,
+                "caption": self.format_content(post),
+                "access_token": access_token
+            }
+        )
+        creation_id = container.get("id")
+        if not creation_id:
+            raise PublishError("Instagram did not return a media container id")
+
+        # Step 2: publish the container
+        data, _ = await self._request(
+            "POST",
+            f"{self.graph_url}/{ig_user_id}/media_publish",
+            data={"creation_id": creation_id, "access_token": access_token}
+        )
+
+        return PublishResult(self.platform, success=True, remote_id=data.get("id"))
+
+    async def find_published(self, post: Dict[str, Any], connection: Dict[str, Any],
+                             access_token: str, since: datetime) -> Optional[str]:
+        ig_user_id = connection.get("platform_user_id")
+        if not ig_user_id:
+            raise PublishError("Instagram account id missing on connection")
+
+        data, _ = await self._request(
+            "GET",
+            f"{self.graph_url}/{ig_user_id}/media",
+            params={
+                "fields": "id,caption,timestamp",
+                "since": int(since.timestamp()),
+                "access_token": access_token
+            }
+        )
+
+        for item in data.get("data", []):
+            if self.matches_content(post, item.get("caption")):
+                return item.get("id")
+        return None
+
+    async def fetch_metrics(self, remote_ids: List[str], connection: Dict[str, Any],
+                            access_token: str) -> Dict[str, Dict[str, int]]:
+        data, _ = await self._request(
+            "GET",
+            f"{self.graph_url}/",
+            params={
+                "ids": ",".join(remote_ids),
+                "fields": "like_count,comments_count",
+                "access_token": access_token
+            }
+        )
+
+        return {
+            remote_id: engagement_counts(likes=item.get("like_count"), comments=item.get("comments_count"))
+            for remote_id, item in data.items()
+        }
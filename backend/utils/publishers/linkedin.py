@@ -0,0 +1,124 @@
+"""
+LinkedIn publishing adapter (UGC Posts API).
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from urllib.parse import quote
+
+from database import get_database, PLATFORM_CONNECTIONS_COLLECTION
+from utils.token_manager import linkedin_token_manager
+from .base import PlatformPublisher, PublishResult, PublishError, engagement_counts
+
+logger = logging.getLogger(__name__)
+
+
+class LinkedInPublisher(PlatformPublisher):
+    """Publishes posts to a member's LinkedIn feed."""
+
+    platform = "linkedin"
+    max_connections = 10
+    max_hashtags = 5
+    max_length = 3000
+    base_url = "https://api.linkedin.com/v2"
+
+    async def get_access_token(self, user_id, connection: Dict[str, Any]) -> Optional[str]:
+        """Use the token manager so expired LinkedIn tokens are refreshed."""
+        return await linkedin_token_manager.get_valid_token(user_id)
+
+    async def _get_author_urn(self, connection: Dict[str, Any], access_token: str) -> str:
+        """Resolve the member URN, caching the LinkedIn id on the connection."""
+        member_id = connection.get("platform_user_id")
+        if not member_id:
+            profile, _ = await self._request(
+                "GET",
+                f"{self.base_url}/me",
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
+            member_id = profile.get("id")
+            if not member_id:
+                raise PublishError("Could not resolve LinkedIn member id")
+
+            db = get_database()
+            await db[PLATFORM_CONNECTIONS_COLLECTION].update_one(
+                {"_id": connection["_id"]},
+                {"$set": {"platform_user_id": member_id}}
+            )
+        return f"urn:li:person:{member_id}"
+
+    async def publish(self, post: Dict[str, Any], connection: Dict[str, Any], access_token: str) -> PublishResult:
+        author = await self._get_author_urn(connection, access_token)
+
+        share_content = {
+            "shareCommentary": {"text": self.format_content(post)},
+            "shareMediaCategory": "NONE"
+        }
+
+        # LinkedIn requires uploaded assets for native images; public URLs are shared as articles
+        image_url = post.get("image_url")
+        if image_url and image_url.startswith("http"):
+            share_content["shareMediaCategory"] = "ARTICLE"
+            share_content["media"] = [{"status": "READY", "originalUrl": image_url}]
+
+        payload = {
+            "author": author,
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {"com.linkedin.ugc.ShareContent": share_content},
+            "visibility": {"com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"}
+        }
+
+        data, headers = await self._request(
+            "POST",
+            f"{self.base_url}/ugcPosts",
+            json=payload,
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "X-Restli-Protocol-Version": "2.0.0"
+            }
+        )
+
+        remote_id = data.get("id") or headers.get("X-RestLi-Id") or headers.get("x-restli-id")
+        return PublishResult(self.platform, success=True, remote_id=remote_id)
+
+    async def find_published(self, post: Dict[str, Any], connection: Dict[str, Any],
+                             access_token: str, since: datetime) -> Optional[str]:
+        author = await self._get_author_urn(connection, access_token)
+        data, _ = await self._request(
+            "GET",
+            f"{self.base_url}/ugcPosts?q=authors&authors=List({quote(author, safe='')})&sortBy=CREATED&count=20",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "X-Restli-Protocol-Version": "2.0.0"
+            }
+        )
+
+        since_ms = since.timestamp() * 1000
+        for element in data.get("elements", []):
+            if element.get("created", {}).get("time", 0) < since_ms:
+                continue
+            share = element.get("specificContent", {}).get("com.linkedin.ugc.ShareContent", {})
+            if self.matches_content(post, share.get("shareCommentary", {}).get("text")):
+                return element.get("id")
+        return None
+
+    async def fetch_metrics(self, remote_ids: List[str], connection: Dict[str, Any],
+                            access_token: str) -> Dict[str, Dict[str, int]]:
+        # Batch get of social actions; LinkedIn does not report shares or impressions for members
+        ids = ",".join(quote(remote_id, safe="") for remote_id in remote_ids)
+        data, _ = await self._request(
+            "GET",
+            f"{self.base_url}/socialActions?ids=List({ids})",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "X-Restli-Protocol-Version": "2.0.0"
+            }
+        )
+
+        return {
+            remote_id: engagement_counts(
+                likes=actions.get("likesSummary", {}).get("totalLikes"),
+                comments=actions.get("commentsSummary", {}).get("aggregatedTotalComments")
+            )
+            for remote_id, actions in data.get("results", {}).items()
+        }
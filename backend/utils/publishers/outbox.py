@@ -0,0 +1,204 @@
+"""
+Outbox-style publish protocol.
+
+Publishing a post to a platform happens in three steps:
+
+1. Claim: atomically move the platform's delivery to ``publishing`` and record
+   an idempotency key and intent timestamp. The claim only succeeds if the
+   delivery is not already ``publishing`` or ``posted``, so concurrent workers
+   and retries can never publish the same (post, platform) twice.
+2. Publish: call the platform adapter.
+3. Confirm: write the outcome and clear the intent.
+
+If the process dies between 2 and 3 the delivery stays ``publishing``, as it
+does when the publish request may have gone through but its outcome is unknown
+(a timeout or 5xx, see ``PublishOutcomeUnknown``). ``reconcile_pending_intents``
+looks those up on the platform after a lease expires instead of republishing
+blindly.
+"""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+
+from database import POSTS_COLLECTION
+from utils.changes import post_change
+from .base import PublishResult
+from .deliveries import (
+    DELIVERY_PENDING, DELIVERY_PUBLISHING, DELIVERY_POSTED, DELIVERY_FAILED,
+    get_delivery, build_delivery, status_fields
+)
+
+logger = logging.getLogger(__name__)
+
+# How long an unconfirmed intent may stay in flight before it is reconciled
+PUBLISH_LEASE_SECONDS = 600
+
+
+def make_idempotency_key(post: Dict[str, Any], platform: str) -> str:
+    """Stable key for one (post, platform) publish."""
+    return hashlib.sha256(f"{post['_id']}:{platform}".encode()).hexdigest()[:32]
+
+
+async def claim_delivery(db, post: Dict[str, Any], platform: str, now: datetime) -> Optional[str]:
+    """
+    Write a pending publish intent for a platform.
+
+    Returns:
+        The idempotency key if the claim succeeded, None if another worker holds
+        the intent or the platform was already delivered
+    """
+    key = make_idempotency_key(post, platform)
+    async with post_change(db, post["user_id"]) as stamp:
+        result = await db[POSTS_COLLECTION].update_one(
+            {
+                "_id": post["_id"],
+                f"deliveries.{platform}.state": {"$nin": [DELIVERY_PUBLISHING, DELIVERY_POSTED]}
+            },
+            {
+                "$set": {
+                    f"deliveries.{platform}.state": DELIVERY_PUBLISHING,
+                    f"deliveries.{platform}.idempotency_key": key,
+                    f"deliveries.{platform}.intent_at": now.isoformat(),
+                    f"deliveries.{platform}.updated_at": now.isoformat(),
+                    **stamp
+                },
+                "$addToSet": {"pending_intents": platform}
+            }
+        )
+    if result.modified_count == 0:
+        return None
+
+    # Keep the in-memory copy in step with the claimed document
+    delivery = dict(get_delivery(post, platform))
+    delivery.update({
+        "state": DELIVERY_PUBLISHING,
+        "idempotency_key": key,
+        "intent_at": now.isoformat()
+    })
+    post.setdefault("deliveries", {})[platform] = delivery
+    return key
+
+
+async def claim_deliveries(db, post: Dict[str, Any], platforms: List[str], now: datetime) -> List[str]:
+    """Claim several platforms of a post; returns the platforms that were claimed."""
+    keys = await asyncio.gather(*[claim_delivery(db, post, platform, now) for platform in platforms])
+    return [platform for platform, key in zip(platforms, keys) if key]
+
+
+def confirmation_update(post: Dict[str, Any], results: Dict[str, PublishResult],
+                        now: datetime) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Build the update that confirms claimed deliveries.
+
+    Returns:
+        Tuple of (Mongo update document, merged deliveries for the post)
+    """
+    deliveries = dict(post.get("deliveries", {}))
+    set_fields = {"updated_at": now.isoformat()}
+    confirmed = []
+    for platform, result in results.items():
+        if result.outcome_unknown:
+            # The post may be live: keep the intent in flight for reconciliation
+            deliveries[platform] = {**get_delivery(post, platform), "last_error": result.error}
+            set_fields[f"deliveries.{platform}.last_error"] = result.error
+            continue
+        deliveries[platform] = build_delivery(post, result, now)
+        set_fields[f"deliveries.{platform}"] = deliveries[platform]
+        confirmed.append(platform)
+
+    update = {"$set": set_fields}
+    if confirmed:
+        update["$pull"] = {"pending_intents": {"$in": confirmed}}
+    return update, deliveries
+
+
+async def reconcile_pending_intents(db, dispatcher, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Resolve publish intents whose lease expired without confirmation.
+
+    Each intent is looked up on the platform: if the post is there it is marked
+    posted, if it is provably absent it goes back to pending, and if the platform
+    cannot be checked it is marked failed for manual review rather than republished.
+    The post's status, posted_to and next_attempt_at are derived again from its
+    deliveries, so a requeued platform is picked up by the scheduler.
+    """
+    now = now or datetime.now()
+    cutoff = (now - timedelta(seconds=PUBLISH_LEASE_SECONDS)).isoformat()
+    counts = {"confirmed": 0, "requeued": 0, "unresolved": 0}
+
+    posts = await db[POSTS_COLLECTION].find(
+        {"pending_intents": {"$type": "string"}}
+    ).to_list(length=None)
+
+    for post in posts:
+        connections = None
+        for platform in list(post.get("pending_intents", [])):
+            delivery = get_delivery(post, platform)
+            if delivery.get("state") != DELIVERY_PUBLISHING:
+                # Stale marker left by an interrupted confirm
+                await db[POSTS_COLLECTION].update_one({"_id": post["_id"]}, {"$pull": {"pending_intents": platform}})
+                continue
+            if (delivery.get("intent_at") or "") > cutoff:
+                continue
+
+            if connections is None:
+                connections = await dispatcher.get_connections(post["user_id"])
+
+            remote_id = None
+            lookup_error = None
+            publisher = dispatcher.get_publisher(platform)
+            connection = connections.get(platform)
+            try:
+                if publisher is None or connection is None:
+                    raise NotImplementedError(f"No connected {platform} account to check")
+                access_token = await publisher.get_access_token(post["user_id"], connection)
+                if not access_token:
+                    raise NotImplementedError(f"No {platform} access token to check with")
+                remote_id = await publisher.find_published(
+                    post, connection, access_token, datetime.fromisoformat(delivery["intent_at"])
+                )
+            except Exception as e:
+                lookup_error = str(e) or e.__class__.__name__
+
+            changes: Dict[str, Any] = {"updated_at": now.isoformat()}
+            if remote_id:
+                changes.update({"state": DELIVERY_POSTED, "remote_id": remote_id, "last_error": None})
+                counts["confirmed"] += 1
+            elif lookup_error is None:
+                changes["state"] = DELIVERY_PENDING
+                counts["requeued"] += 1
+            else:
+                changes.update({
+                    "state": DELIVERY_FAILED,
+                    "retryable": False,
+                    "last_error": (
+                        f"Publish outcome unknown after interruption ({lookup_error}); "
+                        f"verify on {platform} before retrying"
+                    )
+                })
+                counts["unresolved"] += 1
+
+            deliveries = {**post.get("deliveries", {}), platform: {**delivery, **changes}}
+            platforms = list(dict.fromkeys([*post.get("platforms", []), platform]))
+            update = {f"deliveries.{platform}.{field}": value for field, value in changes.items()}
+            update.update(status_fields(post, deliveries, now, platforms))
+
+            # Only resolve the intent if it is still the one we inspected
+            async with post_change(db, post["user_id"]) as stamp:
+                result = await db[POSTS_COLLECTION].update_one(
+                    {
+                        "_id": post["_id"],
+                        f"deliveries.{platform}.state": DELIVERY_PUBLISHING,
+                        f"deliveries.{platform}.intent_at": delivery.get("intent_at")
+                    },
+                    {"$set": {**update, **stamp}, "$pull": {"pending_intents": platform}}
+                )
+            if result.modified_count:
+                post["deliveries"] = deliveries
+                post["posted_at"] = post.get("posted_at") or update.get("posted_at")
+            logger.info(f"Reconciled {platform} intent for post {post['_id']}: {update}")
+
+    return counts
@@ -0,0 +1,71 @@
+"""
+Twitter/X publishing adapter (API v2, OAuth 2.0 user context).
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+
+from .base import PlatformPublisher, PublishResult, PublishError, engagement_counts
+
+logger = logging.getLogger(__name__)
+
+
+class TwitterPublisher(PlatformPublisher):
+    """Publishes text posts as tweets."""
+
+    platform = "twitter"
+    max_connections = 10
+    max_hashtags = 3
+    max_length = 280
+    metrics_batch_size = 100
+    api_url = "https://api.twitter.com/2"
+
+    async def publish(self, post: Dict[str, Any], connection: Dict[str, Any], access_token: str) -> PublishResult:
+        data, _ = await self._request(
+            "POST",
+            f"{self.api_url}/tweets",
+            json={"text": self.format_content(post)},
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+        return PublishResult(self.platform, success=True, remote_id=data.get("data", {}).get("id"))
+
+    async def find_published(self, post: Dict[str, Any], connection: Dict[str, Any],
+                             access_token: str, since: datetime) -> Optional[str]:
+        twitter_user_id = connection.get("platform_user_id")
+        if not twitter_user_id:
+            raise PublishError("Twitter user id missing on connection")
+
+        start_time = since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        data, _ = await self._request(
+            "GET",
+            f"{self.api_url}/users/{twitter_user_id}/tweets",
+            params={"start_time": start_time, "max_results": 20},
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+        for tweet in data.get("data", []):
+            if self.matches_content(post, tweet.get("text")):
+                return tweet.get("id")
+        return None
+
+    async def fetch_metrics(self, remote_ids: List[str], connection: Dict[str, Any],
+                            access_token: str) -> Dict[str, Dict[str, int]]:
+        data, _ = await self._request(
+            "GET",
+            f"{self.api_url}/tweets",
+            params={"ids": ",".join(remote_ids), "tweet.fields": "public_metrics"},
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+        metrics = {}
+        for tweet in data.get("data", []):
+            public = tweet.get("public_metrics", {})
+            metrics[tweet["id"]] = engagement_counts(
+                likes=public.get("like_count"),
+                comments=public.get("reply_count"),
+                shares=(public.get("retweet_count") or 0) + (public.get("quote_count") or 0),
+                impressions=public.get("impression_count")
+            )
+        return metrics
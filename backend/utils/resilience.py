@@ -0,0 +1,223 @@
+"""
+Failure isolation for external dependencies.
+
+Every upstream (Gemini, OpenAI, Unsplash, SMTP and each social platform) gets its
+own circuit breaker and concurrency bulkhead, so a slow or failing dependency
+fails fast instead of tying up the event loop and its connections.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the dependency's circuit is open."""
+
+
+class BulkheadFullError(Exception):
+    """Raised when a dependency already has its maximum number of calls in flight."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with a concurrency bulkhead.
+
+    closed    -> calls pass through; consecutive failures are counted
+    open      -> calls fail immediately until ``recovery_timeout`` has passed
+    half_open -> a limited number of trial calls decide whether to close again
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, max_concurrency: int = 10,
+                 max_wait: float = 1.0, call_timeout: Optional[float] = None,
+                 is_failure: Optional[Callable[[BaseException], bool]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.call_timeout = call_timeout
+        self.is_failure = is_failure or (lambda e: True)
+
+        self.state = STATE_CLOSED
+        self.failure_count = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_calls = 0
+        self.in_flight = 0
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_rejections = 0
+        self.last_error: Optional[str] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _before_call(self):
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = STATE_HALF_OPEN
+                self.half_open_calls = 0
+                logger.info(f"Circuit '{self.name}' half-open, allowing trial calls")
+            else:
+                self.total_rejections += 1
+                raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+        if self.state == STATE_HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.total_rejections += 1
+                raise CircuitOpenError(f"Circuit '{self.name}' is half-open and busy")
+            self.half_open_calls += 1
+
+    def _end_trial(self):
+        """Give back the half-open trial slot of a call that ended without an outcome."""
+        if self.state == STATE_HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def _on_success(self):
+        if self.state != STATE_CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = STATE_CLOSED
+        self.failure_count = 0
+        self.opened_at = None
+
+    def _on_failure(self, error: BaseException):
+        self.total_failures += 1
+        self.failure_count += 1
+        self.last_error = str(error) or error.__class__.__name__
+        if self.state == STATE_HALF_OPEN or self.failure_count >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self.failure_count} failures: {self.last_error}")
+            self.state = STATE_OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run ``func`` through the breaker and bulkhead."""
+        return await self._call(lambda: asyncio.ensure_future(func(*args, **kwargs)), cancellable=True)
+
+    async def call_in_thread(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run blocking ``func`` in a worker thread through the breaker and bulkhead.
+
+        A thread cannot be cancelled, so a call that times out keeps its
+        bulkhead slot until the thread has finished; otherwise sustained
+        timeouts would pile up threads far beyond ``max_concurrency``.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await self._call(
+            lambda: loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs)),
+            cancellable=False
+        )
+
+    def _release(self, work: asyncio.Future):
+        self.in_flight -= 1
+        self._semaphore.release()
+        if not work.cancelled():
+            # Outcomes nobody waited for any more (timed out) are dropped here
+            work.exception()
+
+    async def _call(self, start: Callable[[], asyncio.Future], cancellable: bool) -> Any:
+        self._before_call()
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.total_rejections += 1
+            self._end_trial()
+            raise BulkheadFullError(f"Too many concurrent calls to '{self.name}'")
+        except asyncio.CancelledError:
+            self._end_trial()
+            raise
+
+        self.in_flight += 1
+        self.total_calls += 1
+        # The slot is held until the work itself is done, not just until we stop waiting
+        try:
+            work = start()
+        except BaseException:
+            self.in_flight -= 1
+            self._semaphore.release()
+            raise
+        work.add_done_callback(self._release)
+        waiter = work if cancellable else asyncio.shield(work)
+        try:
+            if self.call_timeout is not None:
+                result = await asyncio.wait_for(waiter, timeout=self.call_timeout)
+            else:
+                result = await waiter
+        except asyncio.CancelledError:
+            # The caller went away, which says nothing about the dependency; a
+            # half-open trial must still free its slot or the circuit never closes
+            self._end_trial()
+            raise
+        except BaseException as e:
+            if self.is_failure(e):
+                self._on_failure(e)
+            elif self.state == STATE_HALF_OPEN:
+                self._on_success()
+            raise
+        else:
+            self._on_success()
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current breaker state for health reporting."""
+        retry_in = None
+        if self.state == STATE_OPEN and self.opened_at is not None:
+            retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+
+        return {
+            "state": self.state,
+            "failure_count": self.failure_count,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "total_rejections": self.total_rejections,
+            "retry_in_seconds": retry_in,
+            "last_error": self.last_error
+        }
+
+
+# Breakers for every external dependency
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def register_breaker(breaker: CircuitBreaker) -> CircuitBreaker:
+    _breakers[breaker.name] = breaker
+    return breaker
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the named breaker, creating one with default limits if needed."""
+    if name not in _breakers:
+        register_breaker(CircuitBreaker(name))
+    return _breakers[name]
+
+
+def get_breaker_states() -> Dict[str, Dict[str, Any]]:
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
+
+
+def _is_upstream_failure(error: BaseException) -> bool:
+    """Errors flagged as non-retryable (bad request, missing ids) are caller bugs and do not trip the breaker."""
+    return getattr(error, "retryable", True)
+
+
+gemini_breaker = register_breaker(CircuitBreaker("gemini", max_concurrency=8, call_timeout=45.0))
+openai_breaker = register_breaker(CircuitBreaker("openai", max_concurrency=4, call_timeout=60.0))
+unsplash_breaker = register_breaker(CircuitBreaker("unsplash", max_concurrency=8, call_timeout=15.0))
+smtp_breaker = register_breaker(CircuitBreaker("smtp", max_concurrency=4, call_timeout=20.0))
+linkedin_breaker = register_breaker(CircuitBreaker("linkedin", max_concurrency=20, is_failure=_is_upstream_failure))
+instagram_breaker = register_breaker(CircuitBreaker("instagram", max_concurrency=20, is_failure=_is_upstream_failure))
+facebook_breaker = register_breaker(CircuitBreaker("facebook", max_concurrency=20, is_failure=_is_upstream_failure))
+twitter_breaker = register_breaker(CircuitBreaker("twitter", max_concurrency=20, is_failure=_is_upstream_failure))
@@ -0,0 +1,93 @@
+"""
+Per-user cache of computed endpoint results with single-flight coalescing.
+
+Results are keyed on the user, the endpoint and its parameters, and the
+user's change versions (see utils.changes) for the scopes the result depends
+on. Any analytics write or post change bumps a version, so the next request
+looks up a new key and recomputes; stale entries are never served and simply
+age out. Because the versions live in MongoDB, this holds across worker
+processes even though each process has its own cache.
+
+Concurrent requests for the same key share one computation: the first starts
+it as a task and the others await the same task instead of running the
+queries again. The task is shielded, so a client disconnecting does not
+cancel the computation for everyone else.
+
+Cached values are shared between requests and must not be mutated.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Sequence, Tuple
+
+from config import settings
+from .cache import TTLCache
+from .changes import change_versions
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, "asyncio.Task[Tuple[Any, float]]"] = {}
+        self.coalesced = 0
+        self.compute_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached result for ``key``, or the result of ``compute`` run at most once at a time."""
+        entry = self._cache.get(key)
+        if entry is not None:
+            value, elapsed = entry
+            self.saved_seconds += elapsed
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            value, elapsed = await asyncio.shield(task)
+            self.saved_seconds += elapsed
+            return value
+
+        task = asyncio.ensure_future(self._compute(key, compute))
+        self._inflight[key] = task
+        value, _ = await asyncio.shield(task)
+        return value
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        try:
+            value = await compute()
+            elapsed = time.perf_counter() - started
+            self.compute_seconds += elapsed
+            self._cache.set(key, (value, elapsed))
+            return value, elapsed
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+            "compute_seconds": round(self.compute_seconds, 3),
+            "saved_seconds": round(self.saved_seconds, 3)
+        }
+
+
+# Analytics endpoint results
+analytics_cache = ResultCache(maxsize=settings.ANALYTICS_CACHE_MAX_SIZE, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+async def cached_result(db, user_id, name: str, scopes: Sequence[str], params: Sequence[Any],
+                        compute: Callable[[], Awaitable[Any]], cache: ResultCache = analytics_cache) -> Any:
+    """
+    ``compute``'s result for one of a user's endpoints, cached until one of
+    ``scopes`` changes. ``params`` must identify everything else the result
+    depends on, including any time window.
+    """
+    versions = await change_versions(db, user_id, scopes)
+    key = (name, str(user_id), tuple(params), tuple(versions[scope] for scope in scopes))
+    return await cache.get_or_compute(key, compute)
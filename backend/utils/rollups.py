@@ -0,0 +1,156 @@
+"""
+Daily analytics rollups.
+
+Raw analytics rows are folded into one document per (user, platform, day) in
+ANALYTICS_DAILY_COLLECTION as they are written, using ``$inc`` upserts, so the
+read endpoints scan at most one document per platform and day no matter how
+many raw rows there are. ``backfill_rollups`` rebuilds the rollups from the
+raw rows with a server-side ``$merge``.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from database import ANALYTICS_COLLECTION, ANALYTICS_DAILY_COLLECTION
+from .analytics_store import storage_query, field_ref
+
+# Raw analytics field -> summed rollup field
+ROLLUP_SUMS = {
+    "followers_count": "followers",
+    "likes_count": "likes",
+    "comments_count": "comments",
+    "shares_count": "shares",
+    "impressions_count": "impressions",
+    "reach_count": "reach"
+}
+
+ENGAGEMENT_FIELDS = ("likes_count", "comments_count", "shares_count")
+
+
+def rollup_day(date: datetime) -> datetime:
+    """Midnight (UTC, naive like the stored dates) of the day ``date`` falls on."""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return datetime(date.year, date.month, date.day)
+
+
+def rollup_key(document: Dict[str, Any]) -> Tuple[ObjectId, str, datetime]:
+    return document["user_id"], document["platform"], rollup_day(document["date"])
+
+
+def rollup_increments(document: Dict[str, Any], sign: int = 1) -> Dict[str, Any]:
+    """``$inc`` amounts that add (or, with ``sign=-1``, remove) one raw row."""
+    increments = {"rows": sign}
+    for field, total in ROLLUP_SUMS.items():
+        increments[total] = sign * (document.get(field) or 0)
+    increments["engagement"] = sign * sum(document.get(field) or 0 for field in ENGAGEMENT_FIELDS)
+
+    # Only positive rates count towards the average engagement rate
+    rate = document.get("engagement_rate") or 0
+    increments["engagement_rate_sum"] = sign * rate if rate > 0 else 0
+    increments["engagement_rate_count"] = sign if rate > 0 else 0
+    return increments
+
+
+def rollup_operations(added: Iterable[Dict[str, Any]],
+                      removed: Iterable[Dict[str, Any]] = (),
+                      now: Optional[datetime] = None) -> List[UpdateOne]:
+    """One upsert per affected (user, platform, day) folding in added rows and taking out removed ones."""
+    now = now or datetime.utcnow()
+    increments: Dict[Tuple[ObjectId, str, datetime], Dict[str, Any]] = {}
+    followers_max: Dict[Tuple[ObjectId, str, datetime], int] = {}
+
+    for document, sign in [(document, 1) for document in added] + [(document, -1) for document in removed]:
+        key = rollup_key(document)
+        totals = increments.setdefault(key, {})
+        for field, amount in rollup_increments(document, sign).items():
+            totals[field] = totals.get(field, 0) + amount
+        if sign > 0:
+            followers_max[key] = max(followers_max.get(key, 0), document.get("followers_count") or 0)
+
+    operations = []
+    for (user_id, platform, day), totals in increments.items():
+        update = {
+            "$inc": totals,
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"created_at": now}
+        }
+        if (user_id, platform, day) in followers_max:
+            update["$max"] = {"followers_max": followers_max[(user_id, platform, day)]}
+        operations.append(UpdateOne({"user_id": user_id, "platform": platform, "day": day}, update, upsert=True))
+    return operations
+
+
+async def apply_rollups(db, added: Iterable[Dict[str, Any]], removed: Iterable[Dict[str, Any]] = ()):
+    """Fold raw rows that were just written (and rows they replaced) into the daily rollups."""
+    operations = rollup_operations(added, removed)
+    if operations:
+        await db[ANALYTICS_DAILY_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def backfill_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation that recomputes the rollups of the matched raw rows and merges them in."""
+    group = {
+        "_id": {
+            "user_id": field_ref("user_id"),
+            "platform": field_ref("platform"),
+            "day": {"$dateFromParts": {
+                "year": {"$year": "$date"}, "month": {"$month": "$date"}, "day": {"$dayOfMonth": "$date"}
+            }}
+        },
+        "rows": {"$sum": 1},
+        "followers_max": {"$max": {"$ifNull": ["$followers_count", 0]}},
+        "engagement": {"$sum": {"$add": [{"$ifNull": [f"${field}", 0]} for field in ENGAGEMENT_FIELDS]}},
+        "engagement_rate_sum": {"$sum": {"$cond": [{"$gt": ["$engagement_rate", 0]}, "$engagement_rate", 0]}},
+        "engagement_rate_count": {"$sum": {"$cond": [{"$gt": ["$engagement_rate", 0]}, 1, 0]}}
+    }
+    for field, total in ROLLUP_SUMS.items():
+        group[total] = {"$sum": {"$ifNull": [f"${field}", 0]}}
+
+    fields = [name for name in group if name != "_id"]
+    return [
+        {"$match": storage_query(match)},
+        {"$group": group},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "platform": "$_id.platform",
+            "day": "$_id.day",
+            **{name: 1 for name in fields},
+            "created_at": "$$NOW",
+            "updated_at": "$$NOW"
+        }},
+        {"$merge": {
+            "into": ANALYTICS_DAILY_COLLECTION,
+            "on": ["user_id", "platform", "day"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+
+
+async def backfill_rollups(db, user_id: Optional[ObjectId] = None, since: Optional[datetime] = None) -> int:
+    """
+    Rebuild the daily rollups from the raw analytics rows.
+
+    Rollups in scope are dropped first so days whose raw rows are gone do not
+    linger. Rows tracked while the backfill runs may be counted twice or not
+    at all, so run it before the rollups are relied on or at a quiet time.
+
+    Returns:
+        Number of rollup documents in scope afterwards
+    """
+    match: Dict[str, Any] = {}
+    scope: Dict[str, Any] = {}
+    if user_id is not None:
+        match["user_id"] = scope["user_id"] = user_id
+    if since is not None:
+        match["date"] = {"$gte": rollup_day(since)}
+        scope["day"] = {"$gte": rollup_day(since)}
+
+    await db[ANALYTICS_DAILY_COLLECTION].delete_many(scope)
+    await db[ANALYTICS_COLLECTION].aggregate(backfill_pipeline(match)).to_list(length=None)
+    return await db[ANALYTICS_DAILY_COLLECTION].count_documents(scope)
@@ -1,13 +1,21 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional
+from bson import ObjectId
 from database import get_database, POSTS_COLLECTION, USERS_COLLECTION
-from utils.linkedin_service import linkedin_service
-from utils.token_manager import linkedin_token_manager
+from utils.changes import post_change
+from utils.heatmap import load_heatmaps, best_hour, spread_minute
+from utils.publishers import (
+    publish_dispatcher, platforms_to_publish, status_fields, DELIVERY_FAILED,
+    claim_deliveries, confirmation_update, reconcile_pending_intents
+)
 
 logger = logging.getLogger(__name__)
 
+# Posting hour for users without a schedule time or enough engagement data
+DEFAULT_SCHEDULE_TIME = "09:00"
+
 class PostScheduler:
     def __init__(self):
         self.is_running = False
@@ -40,13 +48,27 @@ class PostScheduler:
         try:
             db = get_database()
             
-            # Get posts that are scheduled and due for posting
+            # Resolve publish intents left behind by an interrupted run before
+            # picking up new work, so nothing is republished blindly
             now = datetime.now()
+            try:
+                reconciled = await reconcile_pending_intents(db, publish_dispatcher, now)
+                if any(reconciled.values()):
+                    logger.info(f"Reconciled pending publish intents: {reconciled}")
+            except Exception as e:
+                logger.error(f"Error reconciling pending publish intents: {e}")
+            
+            # Get posts that are scheduled and due for posting
             scheduled_posts = await db[POSTS_COLLECTION].find({
                 "status": "scheduled",
                 "scheduled_date": {
                     "$lte": now.isoformat()
-                }
+                },
+                # Posts waiting on a per-platform retry are skipped until their backoff elapses
+                "$or": [
+                    {"next_attempt_at": None},
+                    {"next_attempt_at": {"$lte": now.isoformat()}}
+                ]
             }).to_list(length=None)
             
             if not scheduled_posts:
@@ -60,122 +82,89 @@ class PostScheduler:
                 except Exception as e:
                     logger.error(f"Error posting post {post['_id']}: {e}")
                     # Mark post as failed
-                    await db[POSTS_COLLECTION].update_one(
-                        {"_id": post["_id"]},
-                        {
-                            "$set": {
-                                "status": "failed",
-                                "error_message": str(e),
-                                "updated_at": now.isoformat()
+                    async with post_change(db, post["user_id"]) as stamp:
+                        await db[POSTS_COLLECTION].update_one(
+                            {"_id": post["_id"]},
+                            {
+                                "$set": {
+                                    "status": "failed",
+                                    "error_message": str(e),
+                                    "updated_at": now.isoformat(),
+                                    **stamp
+                                }
                             }
-                        }
-                    )
+                        )
                     
         except Exception as e:
             logger.error(f"Error checking scheduled posts: {e}")
     
     async def post_single_post(self, post: Dict[str, Any]):
-        """Post a single post to all connected platforms."""
+        """Publish a post to every platform that has not been delivered yet."""
         try:
             db = get_database()
             now = datetime.now()
             
-            # Get user's platform connections
+            # Get user
             user = await db[USERS_COLLECTION].find_one({"_id": post["user_id"]})
             if not user:
                 logger.error(f"User not found for post {post['_id']}")
                 return
             
-            # Check which platforms are connected
-            connected_platforms = []
-            
-            # Check LinkedIn connection
-            if hasattr(linkedin_token_manager, 'get_user_token'):
-                linkedin_token = await linkedin_token_manager.get_user_token(str(user["_id"]))
-                if linkedin_token:
-                    connected_platforms.append("linkedin")
-            
-            # TODO: Add checks for other platforms (Instagram, Facebook, Twitter)
-            # For now, we'll just simulate posting to connected platforms
-            
-            if connected_platforms:
-                # Post to connected platforms
-                for platform in connected_platforms:
-                    if platform == "linkedin" and "linkedin" in post.get("platforms", []):
-                        await self.post_to_linkedin(post, user)
-                    # Add other platform posting logic here
-                
-                # Mark post as posted
-                await db[POSTS_COLLECTION].update_one(
-                    {"_id": post["_id"]},
-                    {
-                        "$set": {
-                            "status": "posted",
-                            "posted_at": now.isoformat(),
-                            "posted_to": connected_platforms,
-                            "updated_at": now.isoformat()
-                        }
-                    }
+            # Only publish to platforms that are pending or due for a retry, and
+            # only once a publish intent has been recorded for each of them
+            platforms = platforms_to_publish(post, now)
+            claimed = await claim_deliveries(db, post, platforms, now) if platforms else []
+            results = await publish_dispatcher.publish_post(post, claimed) if claimed else {}
+            
+            # Confirm the intents together with the derived post status
+            update, deliveries = confirmation_update(post, results, now)
+            update["$set"].update(status_fields(post, deliveries, now))
+            failed_platforms = [
+                p for p in post.get("platforms", []) if deliveries.get(p, {}).get("state") == DELIVERY_FAILED
+            ]
+            if failed_platforms:
+                update["$set"]["error_message"] = "; ".join(
+                    f"{p}: {deliveries[p].get('last_error')}" for p in failed_platforms
                 )
-                
-                logger.info(f"Successfully posted post {post['_id']} to {connected_platforms}")
-                
+            async with post_change(db, post["user_id"]) as stamp:
+                update["$set"].update(stamp)
+                await db[POSTS_COLLECTION].update_one({"_id": post["_id"]}, update)
+            
+            newly_posted = [platform for platform, result in results.items() if result.success]
+            logger.info(
+                f"Post {post['_id']} {update['$set']['status']}: posted to {newly_posted}, "
+                f"failed on {failed_platforms}"
+            )
+            
+            if newly_posted:
                 # Send success notification
                 try:
                     from utils.notifications import notify_posting_success
-                    await notify_posting_success(str(user["_id"]), 1, connected_platforms)
+                    await notify_posting_success(str(user["_id"]), 1, newly_posted)
                 except Exception as e:
                     logger.error(f"Error sending posting success notification: {e}")
-            else:
-                # No platforms connected, mark as posted anyway
-                await db[POSTS_COLLECTION].update_one(
-                    {"_id": post["_id"]},
-                    {
-                        "$set": {
-                            "status": "posted",
-                            "posted_at": now.isoformat(),
-                            "posted_to": [],
-                            "updated_at": now.isoformat()
-                        }
-                    }
-                )
-                logger.info(f"Post {post['_id']} marked as posted (no platforms connected)")
                 
         except Exception as e:
             logger.error(f"Error posting single post {post['_id']}: {e}")
             raise
     
-    async def post_to_linkedin(self, post: Dict[str, Any], user: Dict[str, Any]):
-        """Post content to LinkedIn."""
-        try:
-            # Prepare the content for LinkedIn
-            content = post.get("caption", "")
-            hashtags = post.get("hashtags", [])
-            
-            if hashtags:
-                content += "\n\n" + " ".join(hashtags[:5])  # Limit to 5 hashtags
-            
-            # Post to LinkedIn
-            result = await linkedin_service.post_content(
-                user_id=str(user["_id"]),
-                content=content,
-                image_url=post.get("image_url")
-            )
-            
-            logger.info(f"Posted to LinkedIn: {result}")
-            
-        except Exception as e:
-            logger.error(f"Error posting to LinkedIn: {e}")
-            raise
-    
-    async def schedule_posts_for_user(self, user_id: str, schedule_time: str = "09:00"):
-        """Schedule all approved posts for a user at the specified time."""
+    async def schedule_posts_for_user(self, user_id: str, schedule_time: Optional[str] = None):
+        """
+        Schedule all approved posts for a user.
+
+        With a ``schedule_time`` ("HH:MM") every post goes out at that time on
+        its day. Without one, each post goes out in the hour its platforms'
+        posting-time heatmaps rate best for that weekday, or around
+        DEFAULT_SCHEDULE_TIME until there is enough engagement data; a post
+        for today that has no such hour left moves to the next day. Either
+        way the minute is spread per post.
+        """
         try:
             db = get_database()
             
             # Get all approved posts for the user
             approved_posts = await db[POSTS_COLLECTION].find({
-                "user_id": user_id,
+                "user_id": ObjectId(user_id),
                 "status": "approved"
             }).to_list(length=None)
             
@@ -183,27 +172,48 @@ class PostScheduler:
                 logger.info(f"No approved posts found for user {user_id}")
                 return
             
-            # Parse schedule time
-            hour, minute = map(int, schedule_time.split(":"))
+            now = datetime.now()
+            heatmaps = {}
+            if schedule_time is None:
+                platforms = {platform for post in approved_posts for platform in post.get("platforms", [])}
+                heatmaps = await load_heatmaps(db, ObjectId(user_id), platforms)
             
             for post in approved_posts:
                 # Parse the scheduled date and set the time
                 scheduled_date = datetime.fromisoformat(post["scheduled_date"])
+                if schedule_time is not None:
+                    hour, minute = map(int, schedule_time.split(":"))
+                else:
+                    default_hour = int(DEFAULT_SCHEDULE_TIME.split(":")[0])
+                    earliest_hour = now.hour + 1 if scheduled_date.date() == now.date() else 0
+                    hour = best_hour(heatmaps, post.get("platforms", []), scheduled_date.weekday(), earliest_hour)
+                    if hour is None and default_hour < earliest_hour:
+                        # No usable hour is left today (e.g. at 23:xx), so the
+                        # post goes out at the best hour of the next day instead
+                        scheduled_date += timedelta(days=1)
+                        hour = best_hour(heatmaps, post.get("platforms", []), scheduled_date.weekday())
+                    if hour is None:
+                        hour = default_hour
+                    minute = spread_minute(post["_id"])
                 scheduled_date = scheduled_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
                 
                 # Update the post with the new scheduled date
-                await db[POSTS_COLLECTION].update_one(
-                    {"_id": post["_id"]},
-                    {
-                        "$set": {
-                            "scheduled_date": scheduled_date.isoformat(),
-                            "status": "scheduled",
-                            "updated_at": datetime.now().isoformat()
+                async with post_change(db, post["user_id"]) as stamp:
+                    await db[POSTS_COLLECTION].update_one(
+                        {"_id": post["_id"]},
+                        {
+                            "$set": {
+                                "scheduled_date": scheduled_date.isoformat(),
+                                "status": "scheduled",
+                                "updated_at": datetime.now().isoformat(),
+                                **stamp
+                            }
                         }
-                    }
-                )
+                    )
             
-            logger.info(f"Scheduled {len(approved_posts)} posts for user {user_id} at {schedule_time}")
+            logger.info(
+                f"Scheduled {len(approved_posts)} posts for user {user_id} at {schedule_time or 'their best times'}"
+            )
             
         except Exception as e:
             logger.error(f"Error scheduling posts for user {user_id}: {e}")
@@ -219,7 +229,8 @@ async def start_scheduler():
 async def stop_scheduler():
     """Stop the global scheduler."""
     await scheduler.stop()
+    await publish_dispatcher.close()
 
-async def schedule_user_posts(user_id: str, schedule_time: str = "09:00"):
+async def schedule_user_posts(user_id: str, schedule_time: Optional[str] = None):
     """Schedule posts for a specific user."""
     await scheduler.schedule_posts_for_user(user_id, schedule_time) 
\ No newline at end of file
@@ -10,6 +10,7 @@ from bson import ObjectId
 
 from database import get_database, PLATFORM_CONNECTIONS_COLLECTION
 from utils.linkedin_service import linkedin_service
+from utils.changes import next_change_seq, PLATFORMS_SCOPE
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +117,7 @@ class LinkedInTokenManager:
                     }
                 }
             )
+            await next_change_seq(db, connection["user_id"], PLATFORMS_SCOPE)
             
             logger.info(f"Successfully refreshed token for user {connection['user_id']}")
             return token_data["access_token"]
@@ -172,6 +174,7 @@ class LinkedInTokenManager:
                 connection_doc,
                 upsert=True
             )
+            await next_change_seq(db, user_id, PLATFORMS_SCOPE)
             
             logger.info(f"Successfully stored LinkedIn token for user {user_id}")
             return True
@@ -209,6 +212,7 @@ class LinkedInTokenManager:
                     }
                 }
             )
+            await next_change_seq(db, user_id, PLATFORMS_SCOPE)
             
             logger.info(f"Successfully revoked LinkedIn token for user {user_id}")
             return True
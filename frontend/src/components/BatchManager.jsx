@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useAuth } from '../contexts/AuthContext.jsx'
-import { postsAPI } from '../services/api.js'
+import { postsAPI, fetchAllPages } from '../services/api.js'
 import { 
   CheckCircle, 
   Clock, 
@@ -28,7 +28,7 @@ export function BatchManager({ onUpdate }) {
       setIsLoading(true)
       const [batchesResponse, pendingResponse] = await Promise.all([
         postsAPI.getUserBatches(),
-        postsAPI.getPendingApprovalPosts()
+        fetchAllPages(postsAPI.getPendingApprovalPosts, { view: 'list', limit: 200 })
       ])
 
       setBatches(batchesResponse.data || [])
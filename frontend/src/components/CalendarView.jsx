@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useAuth } from '../contexts/AuthContext.jsx'
-import { postsAPI } from '../services/api.js'
+import { postsAPI, fetchAllPages } from '../services/api.js'
 import { 
   Calendar, 
   Clock, 
@@ -33,9 +33,9 @@ export function CalendarView() {
     try {
       setIsLoading(true)
       const [postsResponse, batchesResponse, pendingResponse] = await Promise.all([
-        postsAPI.getUserPosts(),
+        fetchAllPages(postsAPI.getUserPosts, { view: 'calendar', limit: 200 }),
         postsAPI.getUserBatches(),
-        postsAPI.getPendingApprovalPosts()
+        fetchAllPages(postsAPI.getPendingApprovalPosts, { view: 'calendar', limit: 200 })
       ])
 
       setPosts(postsResponse.data || [])
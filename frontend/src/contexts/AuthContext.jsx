@@ -65,6 +65,11 @@ export function AuthProvider({ children }) {
   }
 
   const logout = () => {
+    // Revoke the token server-side; the local session ends either way
+    const token = localStorage.getItem('token')
+    if (token) {
+      api.post('/auth/logout', null, { headers: { Authorization: `Bearer ${token}` } }).catch(() => {})
+    }
     localStorage.removeItem('token')
     setUser(null)
     toast.success('Logged out successfully')
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext.jsx'
-import { analyticsAPI, platformsAPI, postsAPI } from '../services/api.js'
+import { dashboardAPI, postsAPI, fetchAllPages } from '../services/api.js'
 import { CalendarView } from '../components/CalendarView.jsx'
 import { BatchManager } from '../components/BatchManager.jsx'
 import {
@@ -44,21 +44,29 @@ export function DashboardPage() {
 
   const loadDashboardData = async () => {
     try {
-      const [analyticsResponse, platformResponse, pendingResponse] = await Promise.all([
-        analyticsAPI.getSummary(),
-        platformsAPI.getStatus(),
-        postsAPI.getPendingApprovalPosts()
-      ])
+      const { data } = await dashboardAPI.getDashboard(200)
+      const { summary, platforms, pending_approval: pending } = data
 
       setStats({
-        totalFollowers: analyticsResponse.data.total_followers || 0,
-        totalEngagement: analyticsResponse.data.total_engagement || 0,
-        averageEngagementRate: analyticsResponse.data.average_engagement_rate || 0,
-        totalPosts: analyticsResponse.data.top_posts?.length || 0
+        totalFollowers: summary.total_followers || 0,
+        totalEngagement: summary.total_engagement || 0,
+        averageEngagementRate: summary.average_engagement_rate || 0,
+        totalPosts: summary.top_posts?.length || 0
       })
 
-      setPlatformStatus(platformResponse.data)
-      setPendingPosts(pendingResponse.data || [])
+      setPlatformStatus(Object.fromEntries(
+        Object.entries(platforms).map(([platform, connection]) => [platform, connection.connected])
+      ))
+
+      // Only the first page of pending posts comes with the dashboard
+      let pendingPosts = pending.posts
+      if (pending.next_cursor) {
+        const rest = await fetchAllPages(postsAPI.getPendingApprovalPosts, {
+          view: 'calendar', limit: 200, cursor: pending.next_cursor
+        })
+        pendingPosts = [...pendingPosts, ...rest.data]
+      }
+      setPendingPosts(pendingPosts)
     } catch (error) {
       console.error('Error loading dashboard data:', error)
     } finally {
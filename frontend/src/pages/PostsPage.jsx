@@ -1,17 +1,27 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useForm } from 'react-hook-form'
 import { Plus, Check, X, Trash2, FileText, Calendar, Linkedin, Share2 } from 'lucide-react'
 import { toast } from 'react-hot-toast'
 import { postsAPI, platformsAPI } from '../services/api'
 
+// How often the list picks up changes made elsewhere, e.g. posts the scheduler published
+const SYNC_INTERVAL_MS = 30000
+// Posts per "Load more" page
+const PAGE_SIZE = 50
+
+const byScheduledDate = (a, b) => new Date(a.scheduled_date) - new Date(b.scheduled_date)
+
 export function PostsPage() {
   const [posts, setPosts] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [isLoading, setIsLoading] = useState(true)
   const [isGenerating, setIsGenerating] = useState(false)
   const [showGenerateForm, setShowGenerateForm] = useState(false)
   const [selectedPosts, setSelectedPosts] = useState([])
   const [isPostingToLinkedIn, setIsPostingToLinkedIn] = useState(false)
   const [linkedinConnected, setLinkedinConnected] = useState(false)
+  const syncCursor = useRef(null)
 
   const {
     register,
@@ -23,6 +33,8 @@ export function PostsPage() {
   useEffect(() => {
     loadPosts()
     checkLinkedInConnection()
+    const timer = setInterval(syncChanges, SYNC_INTERVAL_MS)
+    return () => clearInterval(timer)
   }, [])
 
   const checkLinkedInConnection = async () => {
@@ -37,8 +49,12 @@ export function PostsPage() {
 
   const loadPosts = async () => {
     try {
-      const response = await postsAPI.getPosts()
+      // Take the sync cursor before the list so no change in between is missed
+      const changes = await postsAPI.getChanges({ view: 'list' })
+      syncCursor.current = changes.data.cursor
+      const response = await postsAPI.getPosts({ view: 'list', limit: PAGE_SIZE })
       setPosts(response.data)
+      setNextCursor(response.headers['x-next-cursor'] || null)
     } catch (error) {
       console.error('Error loading posts:', error)
       toast.error('Failed to load posts')
@@ -47,6 +63,59 @@ export function PostsPage() {
     }
   }
 
+  const syncChanges = async () => {
+    if (!syncCursor.current || document.hidden) return
+    try {
+      let hasMore = true
+      while (hasMore) {
+        const { data } = await postsAPI.getChanges({ since: syncCursor.current, view: 'list' })
+        if (data.reset) {
+          loadPosts()
+          return
+        }
+        syncCursor.current = data.cursor
+        applyChanges(data.posts, data.deleted)
+        // Changes still settling come again on the next poll
+        hasMore = data.has_more
+      }
+    } catch (error) {
+      console.error('Error syncing post changes:', error)
+    }
+  }
+
+  const applyChanges = (changed, deleted) => {
+    if (changed.length === 0 && deleted.length === 0) return
+    setPosts(prev => {
+      const updates = new Map(changed.map(post => [post._id, post]))
+      const known = new Set(prev.map(post => post._id))
+      return [
+        ...prev
+          .filter(post => !deleted.includes(post._id))
+          .map(post => updates.get(post._id) || post),
+        ...changed.filter(post => !known.has(post._id))
+      ].sort(byScheduledDate)
+    })
+  }
+
+  const loadMorePosts = async () => {
+    if (!nextCursor) return
+    setIsLoadingMore(true)
+    try {
+      const response = await postsAPI.getPosts({ view: 'list', limit: PAGE_SIZE, cursor: nextCursor })
+      // Posts picked up by change sync may already be in the list
+      setPosts(prev => {
+        const known = new Set(prev.map(post => post._id))
+        return [...prev, ...response.data.filter(post => !known.has(post._id))]
+      })
+      setNextCursor(response.headers['x-next-cursor'] || null)
+    } catch (error) {
+      console.error('Error loading more posts:', error)
+      toast.error('Failed to load more posts')
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
   const handleGeneratePosts = async (data) => {
     setIsGenerating(true)
     try {
@@ -144,19 +213,32 @@ export function PostsPage() {
     }
 
     setIsPostingToLinkedIn(true)
+    const total = selectedPosts.length
+    let completed = 0
+    const progressToast = toast.loading(`Posting 0 of ${total} posts to LinkedIn...`)
     try {
-      const response = await postsAPI.batchPostToLinkedIn(selectedPosts)
+      const summary = await postsAPI.streamBatchPostToLinkedIn(selectedPosts, (result) => {
+        completed += 1
+        toast.loading(`Posting ${completed} of ${total} posts to LinkedIn...`, { id: progressToast })
+        if (result.success) {
+          setPosts(prev => prev.map(post =>
+            post._id === result.post_id
+              ? { ...post, status: 'posted', posted_to_linkedin: true }
+              : post
+          ))
+        }
+      })
       
-      if (response.data.success) {
-        toast.success(`Posted ${response.data.successful_posts} out of ${response.data.total_posts} posts to LinkedIn!`)
+      if (summary && summary.successful_posts > 0) {
+        toast.success(`Posted ${summary.successful_posts} out of ${summary.total_posts} posts to LinkedIn!`, { id: progressToast })
         setSelectedPosts([])
         loadPosts() // Reload to get updated status
       } else {
-        toast.error('Failed to post some posts to LinkedIn')
+        toast.error('Failed to post some posts to LinkedIn', { id: progressToast })
       }
     } catch (error) {
       console.error('Error batch posting to LinkedIn:', error)
-      toast.error('Failed to post to LinkedIn')
+      toast.error(error.response?.data?.detail || 'Failed to post to LinkedIn', { id: progressToast })
     } finally {
       setIsPostingToLinkedIn(false)
     }
@@ -433,6 +515,18 @@ export function PostsPage() {
         ))}
       </div>
 
+      {nextCursor && (
+        <div className="text-center">
+          <button
+            onClick={loadMorePosts}
+            disabled={isLoadingMore}
+            className="btn-secondary"
+          >
+            {isLoadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
+
       {/* Empty State */}
       {posts.length === 0 && (
         <div className="text-center py-12">
@@ -97,6 +97,8 @@ export const authAPI = {
   requestOTP: (data) => api.post('/auth/request-otp', data),
   verifyOTP: (data) => api.post('/auth/verify-otp', data),
   getMe: () => api.get('/auth/me'),
+  logout: () => api.post('/auth/logout'),
+  changePassword: (data) => api.post('/auth/change-password', data),
 }
 
 export const usersAPI = {
@@ -122,6 +124,18 @@ export const usersAPI = {
   },
 }
 
+// Follow X-Next-Cursor until the last page of a paginated listing
+export const fetchAllPages = async (fetchPage, params = {}) => {
+  const items = []
+  let cursor = null
+  do {
+    const response = await fetchPage(cursor ? { ...params, cursor } : params)
+    items.push(...response.data)
+    cursor = response.headers['x-next-cursor'] || null
+  } while (cursor)
+  return { data: items }
+}
+
 export const postsAPI = {
   generatePosts: (data) => {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
@@ -131,9 +145,14 @@ export const postsAPI = {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
     return api.get('/posts/', { params })
   },
-  getUserPosts: () => {
+  getUserPosts: (params) => {
+    if (!ensureToken()) return Promise.reject(new Error('No token'))
+    return api.get('/posts/', { params })
+  },
+  // params: since (sync cursor; omit to get a starting cursor), view, limit
+  getChanges: (params) => {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
-    return api.get('/posts/')
+    return api.get('/posts/changes', { params })
   },
   getPost: (id) => {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
@@ -175,9 +194,14 @@ export const postsAPI = {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
     return api.post('/posts/regenerate-next-batch')
   },
-  getPendingApprovalPosts: () => {
+  // params: format ('ndjson' | 'csv'), start_date, end_date, status_filter, platform
+  exportPosts: (params) => {
+    if (!ensureToken()) return Promise.reject(new Error('No token'))
+    return api.get('/posts/export', { params, responseType: 'blob' })
+  },
+  getPendingApprovalPosts: (params) => {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
-    return api.get('/posts/pending-approval')
+    return api.get('/posts/pending-approval', { params })
   },
   getUserBatches: () => {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
@@ -196,6 +220,50 @@ export const postsAPI = {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
     return api.post('/posts/batch-post-to-linkedin', { post_ids: postIds })
   },
+  // Streams one NDJSON result per post as it finishes; resolves with the summary line
+  streamBatchPostToLinkedIn: async (postIds, onResult) => {
+    if (!ensureToken()) throw new Error('No token')
+    const response = await fetch(`${api.defaults.baseURL}/posts/batch-post-to-linkedin?stream=true`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'application/x-ndjson',
+        Authorization: `Bearer ${localStorage.getItem('token')}`,
+      },
+      body: JSON.stringify({ post_ids: postIds }),
+    })
+    if (!response.ok) {
+      const error = new Error('Batch post to LinkedIn failed')
+      error.response = { status: response.status, data: await response.json().catch(() => ({})) }
+      throw error
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let summary = null
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop()
+      for (const line of lines) {
+        if (!line.trim()) continue
+        const message = JSON.parse(line)
+        if (message.type === 'summary') {
+          summary = message
+        } else if (onResult) {
+          onResult(message)
+        }
+      }
+    }
+    return summary
+  },
+  retryFailedPlatforms: (postId) => {
+    if (!ensureToken()) return Promise.reject(new Error('No token'))
+    return api.post(`/posts/${postId}/retry`)
+  },
 }
 
 export const platformsAPI = {
@@ -285,6 +353,11 @@ export const analyticsAPI = {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
     return api.post('/analytics/track', data)
   },
+  // params: format ('ndjson' | 'csv'), start_date, end_date, platform
+  exportAnalytics: (params) => {
+    if (!ensureToken()) return Promise.reject(new Error('No token'))
+    return api.get('/analytics/export', { params, responseType: 'blob' })
+  },
   getGrowthAnalytics: (days) => {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
     return api.get('/analytics/growth', { params: { days } })
@@ -293,4 +366,12 @@ export const analyticsAPI = {
     if (!ensureToken()) return Promise.reject(new Error('No token'))
     return api.get('/analytics/posts-performance', { params: { limit } })
   },
-}
\ No newline at end of file
+}
+
+export const dashboardAPI = {
+  // One round trip for the dashboard: profile, summary, platforms, batches and posts
+  getDashboard: (limit) => {
+    if (!ensureToken()) return Promise.reject(new Error('No token'))
+    return api.get('/dashboard', { params: { limit } })
+  },
+}